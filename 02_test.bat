@@ -3,13 +3,29 @@
 pytest -v tests/avatar/test_avatar.py
 pytest -v tests/avatar/test_avatar_dialog.py
 pytest -v tests/avatar/test_avatar_part.py
+pytest -v tests/avatar/test_avatar_part_model.py
+pytest -v tests/avatar/test_avatar_anime.py
+pytest -v tests/avatar/test_avatar_scheduler.py
+pytest -v tests/avatar/test_avatar_command.py
+pytest -v tests/avatar/test_window_backend.py
+pytest -v tests/avatar/test_window_tracker.py
+pytest -v tests/avatar/test_avatar_layout.py
+pytest -v tests/avatar/test_anime_engine.py
+pytest -v tests/avatar/test_compositor.py
+pytest -v tests/avatar/test_image_cache.py
+pytest -v tests/avatar/test_asset_bundle.py
+pytest -v tests/avatar/test_asset_store.py
 pytest -v tests/avatar/test_load_image.py
 pytest -v tests/avatar/test_right_click_context_menu.py
 pytest -v tests/avatar/test_update_frame.py
 pytest -v tests/avatar/test_update_position.py
 
 pytest -v tests/test_avatar_manager.py
+pytest -v tests/test_avatar_process.py
+pytest -v tests/test_avatar_state.py
+pytest -v tests/test_config.py
 pytest -v tests/test_emotion.py
+pytest -v tests/test_import_time.py
 pytest -v tests/test_service.py
 pytest -v tests/test_speak.py
 pytest -v tests/test_speakers.py
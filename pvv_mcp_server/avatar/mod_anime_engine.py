@@ -0,0 +1,111 @@
+"""
+mod_anime_engine.py
+アバターのアニメーションエンジン (Qt非依存)
+
+全アバター・全パーツのアニメーション状態(AvatarPartModel)を1回の走査で進め、
+表示画像が変わったパーツだけを報告する。
+時計と乱数のシードを外部から渡せるため、GUI無しでテスト・ベンチマークできる。
+アニメーションは時計の時刻で進むため、advance()を呼ぶ頻度(フレームレート)を変えても速さは変わらない。
+"""
+
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pvv_mcp_server.avatar.mod_avatar_part_model import AvatarPartModel, DEFAULT_TICK_MS
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class AnimeEngine:
+    """アニメーションエンジン"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, seed: Optional[int] = None):
+        """
+        Args:
+            clock: 現在時刻(秒)を返す単調増加の時計
+            seed: 乱数のシード。Noneならランダム
+        """
+        self.clock = clock
+        self.rng = random.Random(seed)
+        # 直近のadvance()の時刻とtick数
+        self.now = clock()
+        self.tick_count = 0
+
+    def create_part(self, part_name, image_files, config=None, tick_ms=DEFAULT_TICK_MS) -> AvatarPartModel:
+        """
+        このエンジンの乱数を使うパーツを作成する
+
+        Args:
+            part_name: パーツ名
+            image_files: 画像ファイルのリスト
+            config: 初期設定辞書
+            tick_ms: 旧形式の設定(tick数)を変換する時の1tickの長さ(ミリ秒)
+
+        Returns:
+            AvatarPartModel
+        """
+        return AvatarPartModel(part_name, image_files, config, rng=self.rng, tick_ms=tick_ms)
+
+    def advance(self, animes: Iterable) -> Dict[object, List[AvatarPartModel]]:
+        """
+        時計の現在時刻までアニメーションを進める
+
+        Args:
+            animes: 進めるAvatarAnime(part_listを持つオブジェクト)のリスト
+
+        Returns:
+            アニメーション -> 表示画像が変わったパーツのリスト
+        """
+        self.now = self.clock()
+        self.tick_count += 1
+        now_ms = self.now * 1000
+
+        changed = {}
+        for anime in animes:
+            changed[anime] = [part for part in anime.part_list if part.tick(now_ms)]
+        return changed
+
+
+# グローバル変数
+_engine: Optional[AnimeEngine] = None
+
+
+def get_engine() -> AnimeEngine:
+    """
+    共有のアニメーションエンジンを取得する
+
+    Returns:
+        AnimeEngine
+    """
+    global _engine
+    if _engine is None:
+        _engine = AnimeEngine()
+    return _engine
+
+
+if __name__ == "__main__":
+    # ベンチマーク: 4アバター x 11パーツ を 10000tick(50ms刻みの仮想時刻) 進める
+    #   python -m pvv_mcp_server.avatar.mod_anime_engine
+    class _Anime:
+        def __init__(self, engine):
+            files = [f"{i:02}.png" for i in range(8)]
+            config = {"selected_files": files[1:4], "interval_ms": 100, "anime_type": "ランダムA"}
+            self.part_list = [engine.create_part(str(i), files, config) for i in range(11)]
+
+    logging.disable(logging.INFO)
+    virtual_time = iter(i * 0.05 for i in range(1000000))
+    engine = AnimeEngine(clock=lambda: next(virtual_time), seed=0)
+    animes = [_Anime(engine) for _ in range(4)]
+
+    ticks = 10000
+    start = time.perf_counter()
+    changed_parts = 0
+    for _ in range(ticks):
+        for parts in engine.advance(animes).values():
+            changed_parts += len(parts)
+    elapsed = time.perf_counter() - start
+
+    print(f"{ticks} ticks: {elapsed * 1000:.1f} ms ({elapsed / ticks * 1e6:.1f} us/tick), changed parts: {changed_parts}")
@@ -0,0 +1,291 @@
+"""
+mod_asset_bundle.py
+コンパイル済みアバター素材バンドルモジュール
+
+ローカルZIPのキャラ素材を一度だけ解析・デコードし、ZIPと同じフォルダに
+バンドルファイル(<ZIPファイル名>.pvvbundle)として書き出す。
+次回以降の起動では、バンドルをメモリマップしてマニフェストを読むだけで読み込みが完了する。
+
+バンドルは無圧縮の画素データのため、ZIPの数倍〜数十倍の大きさになる。
+そのため書き出しは、--compile-avatar で指定された場合か、
+avatar.compile_bundle が有効な場合(configure(True))だけ行う。
+デコードできないPNGが1つでもあればバンドルは作らず、ZIPから直接読み込ませる。
+
+バンドルのレイアウト:
+    ヘッダ     : MAGIC(8バイト) + マニフェスト位置(uint64) + マニフェスト長(uint64)
+    画素データ : Format_ARGB32_Premultiplied の画素列。内容が同一のPNGは1つにまとめる
+    マニフェスト: JSON
+        - format    : フォーマットバージョン
+        - source    : 元ZIPのサイズ・更新日時(一致しなければ再コンパイル)
+        - images    : [画素データ位置, 幅, 高さ, 1行のバイト数] のリスト
+        - categories: {カテゴリ: {ファイル名: imagesのインデックス}}
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections import defaultdict
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
+from PySide6.QtGui import QImage
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+BUNDLE_SUFFIX = ".pvvbundle"
+BUNDLE_FORMAT = 1
+
+_MAGIC = b"PVVBNDL\x01"
+_HEADER = struct.Struct("<8sQQ")
+# 画素データの先頭アドレスの境界
+_ALIGN = 64
+
+# グローバル変数
+_auto_compile = False  # load_or_compile()でバンドルが無い時に書き出すか
+
+
+class _DecodeError(Exception):
+    """バンドルに書き出せない(デコードできない)PNGがある"""
+
+
+def bundle_path(zip_path: str) -> str:
+    """
+    ZIPファイルに対応するバンドルファイルのパスを返す
+
+    Args:
+        zip_path: ZIPファイルのパス
+
+    Returns:
+        バンドルファイルのパス
+    """
+    return zip_path + BUNDLE_SUFFIX
+
+
+def configure(auto_compile: bool = False) -> None:
+    """
+    バンドルの自動書き出しを設定する
+
+    Args:
+        auto_compile: Trueならload_or_compile()でバンドルが無いか古い時に書き出す
+    """
+    global _auto_compile
+    _auto_compile = bool(auto_compile)
+
+
+def load_or_compile(zip_path: str) -> Optional[Dict[str, Any]]:
+    """
+    バンドルを読み込む。無いか古い場合、自動書き出しが有効ならコンパイルしてから読み込む。
+
+    Args:
+        zip_path: ZIPファイルのパス
+
+    Returns:
+        カテゴリ別の画像データ辞書。読み込めない場合はNone
+    """
+    zip_data = load_bundle(zip_path)
+    if zip_data is not None or not _auto_compile:
+        return zip_data
+
+    if not compile_bundle(zip_path):
+        return None
+
+    return load_bundle(zip_path)
+
+
+def load_bundle(zip_path: str) -> Optional[Dict[str, Any]]:
+    """
+    バンドルを読み込む
+
+    Args:
+        zip_path: ZIPファイルのパス
+
+    Returns:
+        カテゴリ別の画像データ辞書。バンドルが無いか元ZIPと一致しない場合はNone
+    """
+    path = bundle_path(zip_path)
+    if not os.path.exists(path):
+        return None
+
+    bundle = None
+    try:
+        bundle = _Bundle(path)
+        # 使わないバンドルは閉じる(開いたままだと再コンパイル時に上書きできない)
+        if bundle.manifest.get("format") != BUNDLE_FORMAT:
+            logger.info(f"バンドルのフォーマットが異なります: {path}")
+            bundle.close()
+            return None
+        if bundle.manifest.get("source") != _source_stamp(zip_path):
+            logger.info(f"バンドルが元ZIPと一致しません: {path}")
+            bundle.close()
+            return None
+
+        zip_data = defaultdict(dict)
+        for cat, files in bundle.manifest["categories"].items():
+            zip_data[cat] = _BundleMembers(bundle, files)
+
+        logger.info(f"バンドルを読み込みました: {path}")
+        return zip_data
+
+    except Exception as e:
+        logger.warning(f"バンドル読み込みエラー: {path}, {e}")
+        if bundle is not None:
+            bundle.close()
+        return None
+
+
+def compile_bundle(zip_path: str) -> bool:
+    """
+    ZIPファイルを解析・デコードしてバンドルを書き出す
+
+    Args:
+        zip_path: ZIPファイルのパス
+
+    Returns:
+        書き出しに成功した場合True。デコードできないPNGがある場合はFalse
+    """
+    from pvv_mcp_server.avatar.mod_load_image import PARTS_FOLDER, _load_local_zip, close_image
+
+    path = bundle_path(zip_path)
+    tmp_path = None
+    zip_data = None
+    try:
+        source = _source_stamp(zip_path)
+        zip_data = _load_local_zip(zip_path, PARTS_FOLDER)
+
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path), dir=os.path.dirname(path) or ".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, 0, 0))
+
+            images = []
+            hashes = {}
+            categories = {}
+            for cat, members in zip_data.items():
+                files = {}
+                for fname in members:
+                    png_dat = members[fname]
+                    digest = hashlib.sha1(png_dat).hexdigest()
+                    if digest not in hashes:
+                        image = QImage()
+                        if not image.loadFromData(png_dat):
+                            # 読み飛ばすとパーツが消えるため、バンドル自体を作らない
+                            raise _DecodeError(f"画像のデコードに失敗しました: {cat}/{fname}")
+                        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+                        hashes[digest] = len(images)
+                        images.append(_write_pixels(f, image))
+                    files[fname] = hashes[digest]
+                categories[cat] = files
+
+            manifest = {
+                "format": BUNDLE_FORMAT,
+                "source": source,
+                "images": images,
+                "categories": categories,
+            }
+            manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+            manifest_offset = f.tell()
+            f.write(manifest_bytes)
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, manifest_offset, len(manifest_bytes)))
+
+        os.replace(tmp_path, path)
+        tmp_path = None
+        logger.info(f"バンドルを書き出しました: {path} ({len(images)} images)")
+        return True
+
+    except Exception as e:
+        logger.warning(f"バンドル書き出しエラー: {path}, {e}")
+        return False
+
+    finally:
+        if zip_data is not None:
+            close_image(zip_data)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+#
+# private function
+#
+def _source_stamp(zip_path: str) -> Dict[str, int]:
+    """元ZIPの同一性判定用の情報"""
+    st = os.stat(zip_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _write_pixels(f, image: QImage):
+    """画素データを境界を揃えて書き込み、マニフェスト用の情報を返す"""
+    offset = f.tell()
+    pad = -offset % _ALIGN
+    f.write(b"\0" * pad)
+    offset += pad
+
+    size = image.bytesPerLine() * image.height()
+    f.write(bytes(image.constBits())[:size])
+    return [offset, image.width(), image.height(), image.bytesPerLine()]
+
+
+class _Bundle:
+    """メモリマップしたバンドルファイル"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, manifest_offset, manifest_len = _HEADER.unpack_from(self.mapped, 0)
+            if magic != _MAGIC:
+                raise ValueError("invalid bundle header")
+
+            self.manifest = json.loads(self.mapped[manifest_offset:manifest_offset + manifest_len])
+        except Exception:
+            self.mapped.close()
+            raise
+
+    def close(self):
+        """バンドルファイルを閉じる(複数回呼び出してもよい)"""
+        self.mapped.close()
+
+    def decode(self, index) -> QImage:
+        """画素データからQImageを作成する"""
+        offset, width, height, bytes_per_line = self.manifest["images"][index]
+        with memoryview(self.mapped) as view:
+            with view[offset:offset + bytes_per_line * height] as pixels:
+                # mmapの寿命に依存しないようコピーを返す
+                return QImage(pixels, width, height, bytes_per_line,
+                              QImage.Format_ARGB32_Premultiplied).copy()
+
+
+class _BundleMembers(Mapping):
+    """
+    カテゴリ内のファイル名 -> 画素データ
+
+    decode()でデコード済みのQImageを直接取得できる。
+    """
+
+    def __init__(self, bundle, files):
+        self._bundle = bundle
+        self._files = files
+
+    def decode(self, fname) -> QImage:
+        return self._bundle.decode(self._files[fname])
+
+    def close(self):
+        self._bundle.close()
+
+    def __getitem__(self, fname):
+        offset, width, height, bytes_per_line = self._bundle.manifest["images"][self._files[fname]]
+        return self._bundle.mapped[offset:offset + bytes_per_line * height]
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, fname):
+        return fname in self._files
@@ -0,0 +1,174 @@
+"""
+mod_asset_store.py
+アバター画像データの共有ストア
+
+同じ画像ソース(ZIP・URL・フォルダ・ポートレート)を使うアバター間で、
+読み込んだ画像データ(zip_data)を参照カウント付きで共有する。
+デコード済み画像は mod_image_cache が zip_data 単位でキャッシュしているため、
+zip_data を共有することでデコード結果も共有される。
+最後の利用者が release() した時点で、画像データとデコード済み画像を破棄し、
+画像データが開いているファイル(ZIP・バンドル)を閉じる。
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable
+import pvv_mcp_server.avatar.mod_image_cache
+import pvv_mcp_server.avatar.mod_load_image
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """共有中の画像データ"""
+
+    def __init__(self, key):
+        self.key = key
+        self.zip_data = None
+        self.refs = 0
+        # 同じソースの読み込みを1回にまとめるためのロック
+        self.lock = threading.Lock()
+
+
+# グローバル変数
+# 正規化したソース -> _Entry
+_entries: Dict[Hashable, _Entry] = {}
+# id(zip_data) -> _Entry
+_entries_by_data: Dict[int, _Entry] = {}
+_lock = threading.Lock()
+
+
+def source_key(source, speaker_name=None) -> Hashable:
+    """
+    画像ソースを正規化したキーを返す
+
+    Args:
+        source: load_image()に渡す画像ソース
+        speaker_name: 話者名(ポートレートの場合のみ使用)
+
+    Returns:
+        同じ画像データになるソースで一致するキー
+    """
+    if source == "portrait":
+        return ("portrait", speaker_name)
+
+    if not isinstance(source, str):
+        return source
+
+    if source.startswith("http://") or source.startswith("https://"):
+        return source
+
+    return os.path.normcase(os.path.realpath(source))
+
+
+def acquire(source, speaker_name, loader: Callable[[Any, Any], Any]):
+    """
+    画像データを取得する。未読み込みの場合は読み込む。
+
+    複数スレッドから同じソースを同時に要求した場合も、読み込みは1回だけ行う。
+    取得した画像データは、不要になったら release() すること。
+
+    Args:
+        source: 画像ソース
+        speaker_name: 話者名
+        loader: 画像データの読み込み関数 (load_image)
+
+    Returns:
+        画像データ辞書
+    """
+    key = source_key(source, speaker_name)
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            entry = _Entry(key)
+            _entries[key] = entry
+        entry.refs += 1
+
+    try:
+        with entry.lock:
+            if entry.zip_data is None:
+                zip_data = loader(source, speaker_name)
+                with _lock:
+                    entry.zip_data = zip_data
+                    _entries_by_data[id(zip_data)] = entry
+                logger.info(f"画像データを読み込みました: {key}")
+            else:
+                logger.info(f"画像データを共有します: {key} (refs={entry.refs})")
+            return entry.zip_data
+    except Exception:
+        _release_entry(entry)
+        raise
+
+
+def release(zip_data) -> None:
+    """
+    画像データの利用を終了する
+
+    Args:
+        zip_data: acquire()で取得した画像データ
+    """
+    with _lock:
+        entry = _entries_by_data.get(id(zip_data))
+    if entry is None or entry.zip_data is not zip_data:
+        return
+    _release_entry(entry)
+
+
+def refcount(zip_data) -> int:
+    """
+    画像データの参照数を返す
+
+    Args:
+        zip_data: acquire()で取得した画像データ
+
+    Returns:
+        参照数。ストアで管理していない場合は0
+    """
+    entry = _entries_by_data.get(id(zip_data))
+    if entry is None or entry.zip_data is not zip_data:
+        return 0
+    return entry.refs
+
+
+def clear() -> None:
+    """全ての画像データを破棄する"""
+    with _lock:
+        entries = list(_entries.values())
+        _entries.clear()
+        _entries_by_data.clear()
+
+    for entry in entries:
+        if entry.zip_data is not None:
+            _dispose(entry.zip_data)
+
+
+#
+# private function
+#
+def _release_entry(entry: _Entry) -> None:
+    """参照数を減らし、0になったら破棄する"""
+    with _lock:
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+        if _entries.get(entry.key) is entry:
+            del _entries[entry.key]
+        zip_data = entry.zip_data
+        if zip_data is not None:
+            _entries_by_data.pop(id(zip_data), None)
+
+    if zip_data is not None:
+        _dispose(zip_data)
+        logger.info(f"画像データを破棄しました: {entry.key}")
+
+
+def _dispose(zip_data) -> None:
+    """デコード済み画像を破棄し、画像データのファイルを閉じる"""
+    pvv_mcp_server.avatar.mod_image_cache.clear(zip_data)
+    try:
+        pvv_mcp_server.avatar.mod_load_image.close_image(zip_data)
+    except Exception as e:
+        logger.warning(f"画像データのクローズに失敗しました: {e}")
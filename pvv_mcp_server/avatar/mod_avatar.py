@@ -1,24 +1,43 @@
 import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtWidgets import QWidget, QLabel, QApplication
-from PySide6.QtCore import Qt, QTimer, QPoint, Slot
+from PySide6.QtCore import Qt, QPoint, Slot, Signal
 from PySide6.QtGui import QPixmap, QShortcut, QKeySequence
-from pvv_mcp_server.avatar.mod_load_image import load_image
+from pvv_mcp_server.avatar.mod_load_image import load_image, _create_empty_zip_data
 from pvv_mcp_server.avatar.mod_update_frame import update_frame
 from pvv_mcp_server.avatar.mod_right_click_context_menu import right_click_context_menu
 from pvv_mcp_server.avatar.mod_avatar_dialog import AvatarDialog
+from pvv_mcp_server.avatar.mod_avatar_anime import AvatarAnime, prepare_images
 import pvv_mcp_server.avatar.mod_update_position
+import pvv_mcp_server.avatar.mod_avatar_layout
+import pvv_mcp_server.avatar.mod_asset_store
+import pvv_mcp_server.avatar.mod_avatar_scheduler
 import logging
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# 発話・感情表現が無い状態がこの時間続いたら、アイドル状態として更新間隔を落とす(秒)
+DEFAULT_IDLE_TIMEOUT = 300
+
+# 画像読み込み用のスレッドプール(全アバターで共有し、並列に読み込む)
+_loader = ThreadPoolExecutor(max_workers=4, thread_name_prefix="avatar-loader")
+
 
 class AvatarWindow(QWidget):
     """YMMアバター表示ウィンドウ"""
+
+    # 画像の読み込み完了通知(読み込みスレッド → GUIスレッド)
+    assets_loaded = Signal(object)
+    # 保存する設定が変わった通知
+    config_changed = Signal()
     
     def __init__(self, style_id, speaker_name, zip_path=None,
                  app_title="Claude", anime_types=None, flip=False,
-                 scale_percent=100, position="right_out", config=None):
+                 scale_percent=100, position="right_out", config=None,
+                 async_load=False, idle_timeout=DEFAULT_IDLE_TIMEOUT):
         """
         コンストラクタ
         
@@ -29,6 +48,10 @@ class AvatarWindow(QWidget):
             flip: 左右反転フラグ
             scale_percent: 縮尺パーセント
             position: 表示位置 (left_out, left_in, right_in, right_out)
+            config: save_config()で保存した設定
+            async_load: Trueの場合、画像をスレッドプールで読み込み、
+                        完了までプレースホルダーを表示する
+            idle_timeout: アイドル状態になるまでの時間(秒)
         """
         logger.info(f"AvatarDialog.__init__ 開始: config={config is not None}")
         super().__init__()
@@ -57,41 +80,50 @@ class AvatarWindow(QWidget):
         self.frame_timer_interval = 50
         self.follow_timer_interval = 150
         
-        # zip読み込み
-        self.zip_data = load_image(self.zip_path,  self.speaker_name)  # [パーツ][PNGファイル[バイナリデータ]
-
         # アニメーション設定
         self.anime_types = anime_types or ["立ち絵", "口パク"]
         self.anime_type = anime_types[0] if anime_types else "立ち絵"  # 現在のアニメーションタイプ
-        
-        # YMMダイアログ管理
-        self.dialogs = {}
-        for anime_type in self.anime_types:
-            conf = None
-            if config and "dialogs" in config and anime_type in config["dialogs"]:
-                conf = config["dialogs"][anime_type]
-            
-            dialog = AvatarDialog(self, self.zip_data, self.scale_percent, self.flip, self.frame_timer_interval, conf)
-            dialog.setWindowTitle(f"pvv-mcp-server - {self.speaker_name} - {anime_type} ダイアログ")
-            self.dialogs[anime_type] = dialog
-            # ★ 初回show→hideで初期化(ウィンドウマネージャーに登録)
-            #dialog.show()
-            #QApplication.processEvents()  # イベント処理を強制
-            #dialog.hide()
 
-        # 初期表示
-        update_frame(self)
-        self.update_position()
-        
-        # タイマー設定
-        self.frame_timer = QTimer()
-        self.frame_timer.timeout.connect(lambda: update_frame(self))
-        self.frame_timer.start(self.frame_timer_interval)
-        
-        self.follow_timer = QTimer()
-        self.follow_timer.timeout.connect(lambda: self.update_position())
-        self.follow_timer.start(self.follow_timer_interval)
-        
+        # アニメーションタイプ毎のアニメーション状態(画像の読み込み完了後に作成)
+        # 編集ダイアログは「編集」が選ばれた時にopen_editor()で作成する
+        self.animes = {}
+        self.zip_data = None
+        self.loading = True
+        # 破棄済みフラグ(読み込みスレッドと共有するため_load_lockで保護する)
+        self.disposed = False
+        self._load_lock = threading.Lock()
+        self._pending_config = config  # ダイアログ作成前に受け取った設定
+        self._pending_anime_type = None  # 読み込み中に受け取ったアニメーションタイプ
+        self.shown_frame_version = None  # 表示中のフレーム (anime, frame_version)
+        self.frame_count = 0  # スケジューラが描画したフレーム数(操作の反映後の描画待ちに使う)
+        self.config_revision = 0  # 保存する設定が変わる毎にカウントアップする
+
+        # フレーム更新・位置追随は共通のスケジューラが行う(フレーム更新は読み込み完了後に開始)
+        self.animating = False
+        self.follow_enabled = True
+        self.idle_timeout = idle_timeout
+        self.last_active = time.monotonic()  # 最後に発話・感情表現があった時刻
+        self.scheduler = pvv_mcp_server.avatar.mod_avatar_scheduler.get_scheduler()
+        self.scheduler.register(self)
+
+        # 追随対象ウィンドウはタイトル毎に共有のトラッカーで追跡し、
+        # 同じ追随対象のアバターはまとめて重ならないように配置する
+        self.avatar_layout = pvv_mcp_server.avatar.mod_avatar_layout.get_layout(self.app_title)
+        self.avatar_layout.add(self)
+        self.tracker = self.avatar_layout.tracker
+        # 位置追随に対応していない環境では追随しない
+        if not self.tracker.supported:
+            self.follow_enabled = False
+
+        # zip読み込み
+        self.assets_loaded.connect(self._on_assets_loaded)
+        if async_load:
+            # 読み込み中はプレースホルダーを表示し、画像はスレッドプールで読み込む
+            self._show_placeholder()
+            _loader.submit(self._load_assets)
+        else:
+            self._on_assets_loaded(self._acquire_assets())  # [パーツ][PNGファイル[バイナリデータ]
+
         # ドラッグ用変数
         self._drag_pos = None
         
@@ -111,8 +143,6 @@ class AvatarWindow(QWidget):
         Returns:
             dict: 設定辞書
         """
-        self.frame_timer.stop()
-
         config = {
             "zip_path": self.zip_path,
             "app_title": self.app_title,
@@ -125,13 +155,15 @@ class AvatarWindow(QWidget):
             "dialogs" : {}
         }
 
-        for animetype, dialog in self.dialogs.items():
-            conf = dialog.save_config()
-            config["dialogs"][animetype] = conf
+        # 保存する設定のキーは互換性のため"dialogs"のまま
+        for animetype, anime in self.animes.items():
+            config["dialogs"][animetype] = anime.save_config()
+
+        # 読み込み中は受け取った設定をそのまま引き継ぐ
+        if self.loading and self._pending_config:
+            config["dialogs"] = dict(self._pending_config.get("dialogs", {}))
         
         logger.info(f"save_config [AvatarWindow]: {config}")
-        
-        self.frame_timer.start(self.frame_timer_interval)
 
         return config
 
@@ -145,14 +177,14 @@ class AvatarWindow(QWidget):
         """
         logger.info(f"load_config [AvatarWindow]")
         
-        self.frame_timer.stop()
+        self.animating = False
 
         if "zip_path" in config:
             self.zip_path = config["zip_path"]
             logger.info(f"  zip_path: {config['zip_path']}")
 
         if "app_title" in config:
-            self.app_title = config["app_title"]
+            self.set_app_title(config["app_title"])
             logger.info(f"  app_title: {config['app_title']}")
 
         if "position" in config:
@@ -180,19 +212,185 @@ class AvatarWindow(QWidget):
             logger.info(f"  follow_timer_interval: {config['follow_timer_interval']}")
         
 
-        if "dialogs" in config:
-            for anitype, dialog_config in config["dialogs"].items():
-                if anitype in self.dialogs:
-                    logger.info(f"  loading dialog: {anitype}")
-                    self.dialogs[anitype].load_config(dialog_config)
+        if "dialogs" in config and self.loading:
+            # ダイアログ作成時に反映する
+            self._pending_config = config
+        elif "dialogs" in config:
+            for anitype, anime_config in config["dialogs"].items():
+                if anitype in self.animes:
+                    logger.info(f"  loading anime: {anitype}")
+                    self.animes[anitype].load_config(anime_config)
                 else:
-                    logger.warning(f"  unknown dialog: {anitype}")
+                    logger.warning(f"  unknown anime: {anitype}")
 
-        self.frame_timer.start(self.frame_timer_interval)
+        self.animating = not self.loading
+
+    #
+    # 画像読み込み
+    #
+    def _load_assets(self):
+        """画像を読み込み、表示するパーツをデコードしておく(読み込みスレッドで実行)"""
+        try:
+            zip_data = self._acquire_assets()
+        except Exception as e:
+            logger.error(f"画像読み込みエラー: {self.zip_path}, {e}")
+            zip_data = None
+
+        if zip_data is not None:
+            self._prepare_images(zip_data)
+
+        with self._load_lock:
+            if not self.disposed:
+                self.assets_loaded.emit(zip_data)
+                return
+        # 読み込み中に破棄された場合は、破棄済みのウィンドウに通知せず画像データを解放する
+        if zip_data is not None:
+            pvv_mcp_server.avatar.mod_asset_store.release(zip_data)
+
+    def _prepare_images(self, zip_data):
+        """GUIスレッドでデコードしないよう、各アニメーションタイプで選択されているパーツを画像キャッシュに載せる"""
+        config = self._pending_config
+        try:
+            for anime_type in self.anime_types:
+                conf = None
+                if config and "dialogs" in config and anime_type in config["dialogs"]:
+                    conf = config["dialogs"][anime_type]
+                prepare_images(zip_data, self.scale_percent, self.flip, self.frame_timer_interval, conf)
+        except Exception as e:
+            # キャッシュに載らなかった画像は、表示時にGUIスレッドでデコードする
+            logger.warning(f"画像の事前デコードに失敗しました: {self.zip_path}, {e}")
+
+    def _acquire_assets(self):
+        """同じ画像ソースを使う他のアバターと共有の画像データを取得する"""
+        return pvv_mcp_server.avatar.mod_asset_store.acquire(self.zip_path, self.speaker_name, load_image)
+
+    def dispose(self):
+        """アバターを破棄し、共有の画像データを解放する"""
+        with self._load_lock:
+            if self.disposed:
+                return
+            self.disposed = True
+        self.animating = False
+        self.follow_enabled = False
+        self.scheduler.unregister(self)
+        self.avatar_layout.remove(self)
+        for anime in self.animes.values():
+            if anime.editor is not None:
+                anime.editor.hide()
+        self.animes = {}
+        self.hide()
+
+        if self.zip_data is not None:
+            pvv_mcp_server.avatar.mod_asset_store.release(self.zip_data)
+            self.zip_data = None
+        self.deleteLater()
+
+    def _show_placeholder(self):
+        """読み込み中のプレースホルダーを表示"""
+        self.label.setText(f"{self.speaker_name}\n読み込み中...")
+        self.label.adjustSize()
+        self.adjustSize()
+
+    @Slot(object)
+    def _on_assets_loaded(self, zip_data):
+        """画像の読み込み完了後にダイアログを作成し、アニメーションを開始する"""
+        if self.disposed:
+            # 通知が届く前に破棄された場合は画像データを解放する
+            if zip_data is not None:
+                pvv_mcp_server.avatar.mod_asset_store.release(zip_data)
+            return
+        if zip_data is None:
+            zip_data = _create_empty_zip_data()
+        self.zip_data = zip_data
+
+        config = self._pending_config
+        for anime_type in self.anime_types:
+            conf = None
+            if config and "dialogs" in config and anime_type in config["dialogs"]:
+                conf = config["dialogs"][anime_type]
+            
+            self.animes[anime_type] = AvatarAnime(self.zip_data, self.scale_percent, self.flip, self.frame_timer_interval, conf)
+            self.animes[anime_type].on_edited = self.mark_config_changed
+
+        self.loading = False
+        self._pending_config = None
+
+        # 初期表示
+        self.label.setText("")
+        update_frame(self)
+        self.update_position()
+        self.animating = True
+
+        # 読み込み中に受け取ったアニメーションタイプを反映
+        if self._pending_anime_type is not None:
+            anime_type = self._pending_anime_type
+            self._pending_anime_type = None
+            self.set_anime_type(anime_type)
+
+        logger.info(f"アバター画像の読み込み完了: {self.speaker_name}")
 
     #
     # GUI
     #
+    def open_editor(self, anime_type):
+        """
+        アニメーションタイプの編集ダイアログを取得する(初回のみ作成)
+
+        Args:
+            anime_type: アニメーションタイプ
+
+        Returns:
+            AvatarDialog
+        """
+        anime = self.animes[anime_type]
+        if anime.editor is None:
+            logger.info(f"編集ダイアログを作成: {anime_type}")
+            dialog = AvatarDialog(self, anime)
+            dialog.setWindowTitle(f"pvv-mcp-server - {self.speaker_name} - {anime_type} ダイアログ")
+            anime.editor = dialog
+        return anime.editor
+
+    def is_idle(self, now):
+        """
+        アイドル状態かどうか
+
+        Args:
+            now: time.monotonic()の現在時刻
+
+        Returns:
+            最後の発話・感情表現からidle_timeout以上経っていればTrue
+        """
+        return now - self.last_active >= self.idle_timeout
+
+    def tick_frame(self, changed):
+        """
+        スケジューラから呼ばれるフレーム更新
+
+        Args:
+            changed: 表示画像が変わったパーツのリスト
+        """
+        update_frame(self, changed)
+        self.frame_count += 1
+
+    def resizeEvent(self, event):
+        """フレームのサイズが変わったら位置を合わせ直す"""
+        super().resizeEvent(event)
+        if self.follow_enabled:
+            self.update_position()
+
+    def showEvent(self, event):
+        """表示されたら、止まっていたクロックを再開し、同じ追随対象のアバターと合わせて配置し直す"""
+        super().showEvent(event)
+        if not self.disposed:
+            self.scheduler.resume()
+        if self.follow_enabled:
+            self.update_position()
+
+    def hideEvent(self, event):
+        """非表示になったら残ったアバターを配置し直す"""
+        super().hideEvent(event)
+        self.avatar_layout.update()
+
     def update_position(self):
         # Claude ウィンドウに追従
         pvv_mcp_server.avatar.mod_update_position.update_position(self)
@@ -218,7 +416,7 @@ class AvatarWindow(QWidget):
         """マウス押下イベント"""
         if event.button() == Qt.LeftButton:
             self._drag_pos = event.globalPosition().toPoint() - self.frameGeometry().topLeft()
-            self.follow_timer.stop()
+            self.follow_enabled = False
             event.accept()
     
     def mouseMoveEvent(self, event):
@@ -236,38 +434,93 @@ class AvatarWindow(QWidget):
     #
     # セッター
     #
+    def post_anime_type(self, anime_type):
+        """
+        スレッドセーフなset_anime_type(アバターも表示する)
+
+        操作は共有のスケジューラの次のtickでまとめて反映され、同じアバターへの
+        反映前の操作は最新のものだけが反映される。
+
+        Args:
+            anime_type: アニメーションキー（"立ち絵", "口パク"など）
+
+        Returns:
+            反映後にフレームが描画されると完了するFuture
+        """
+        return self.scheduler.commands.post(self, anime_type)
+
     @Slot(str)
     def set_anime_type(self, anime_type):
         """アニメーションタイプを設定"""
-        if anime_type in self.anime_types:
-            self.frame_timer.stop()
+        if anime_type in self.anime_types and self.loading:
+            # 読み込み完了後に反映する
+            self._pending_anime_type = anime_type
+        elif anime_type in self.anime_types:
             self.anime_type = anime_type
-            self.dialogs[anime_type].start_oneshot()
-            self.frame_timer.start()
+            self.animes[anime_type].start_oneshot()
+
+        # 発話・感情表現があったので、アイドル状態から即座に通常の更新間隔に戻す
+        if anime_type in self.anime_types:
+            self.last_active = time.monotonic()
+            self.scheduler.wake(self)
 
     
     def set_frame_timer_interval(self, val):
         """フレーム更新間隔を設定"""
         self.frame_timer_interval = val
-        self.frame_timer.setInterval(self.frame_timer_interval)
-        for animetype, dialog in self.dialogs.items():
-          dialog.set_frame_timer_interval(self.frame_timer_interval)
+        for anime in self.animes.values():
+          anime.set_frame_timer_interval(self.frame_timer_interval)
+        self.mark_config_changed()
     
+    def set_follow(self, enabled):
+        """位置追随のON/OFFを設定"""
+        if enabled and not self.tracker.supported:
+            logger.info("window following is not supported on this platform")
+            return
+        self.follow_enabled = enabled
+        # 追随をやめた場合も、残ったアバターを配置し直す
+        self.update_position()
+
+    def set_app_title(self, val):
+        """追随対象アプリケーションのウィンドウタイトルを設定"""
+        if val == self.app_title:
+            return
+        old_layout = self.avatar_layout
+        old_layout.remove(self)
+        self.app_title = val
+        self.avatar_layout = pvv_mcp_server.avatar.mod_avatar_layout.get_layout(self.app_title)
+        self.avatar_layout.add(self)
+        self.tracker = self.avatar_layout.tracker
+        old_layout.update()
+        if self.follow_enabled:
+            self.update_position()
+        self.mark_config_changed()
+
     def set_position(self, val):
         """表示位置を設定"""
         self.position = val
+        # 元の位置に残ったアバターも合わせて配置し直す
+        self.update_position()
+        self.mark_config_changed()
     
     def set_flip(self, val):
         """左右反転を設定"""
         self.flip = val
-        for animetype, dialog in self.dialogs.items():
-          dialog.set_flip(self.flip)
+        for anime in self.animes.values():
+          anime.set_flip(self.flip)
+        self.mark_config_changed()
 
     def set_scale(self, val):
         """スケール設定"""
         self.scale_percent = val
-        for animetype, dialog in self.dialogs.items():
-          dialog.set_scale(self.scale_percent)
+        for anime in self.animes.values():
+          anime.set_scale(self.scale_percent)
+        self.mark_config_changed()
+
+    def mark_config_changed(self):
+        """保存する設定が変わったことを通知する(自動保存の対象になる)"""
+        self.config_revision += 1
+        self.config_changed.emit()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,286 @@
+"""
+mod_avatar_anime.py
+アニメーションタイプ(立ち絵・口パクなど)毎のアニメーション状態
+
+パーツ毎のアニメーション状態(AvatarPartModel)を束ね、表示フレームの合成を行う。
+編集ダイアログ(AvatarDialog)は「編集」が選ばれた時に初めて作成し、このモデルを編集する。
+
+パーツ画像のデコード・縮尺・反転は、読み込みスレッドでprepare_images()を呼んで
+画像キャッシュに載せておき、GUIスレッドではQPixmapへの変換だけを行う。
+"""
+
+from collections import OrderedDict
+from PySide6.QtGui import QPixmap
+
+import pvv_mcp_server.avatar.mod_anime_engine
+from pvv_mcp_server.avatar.mod_avatar_part_model import AvatarPartModel
+import pvv_mcp_server.avatar.mod_image_cache
+import pvv_mcp_server.avatar.mod_compositor
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 合成済みフレームを保持する最大数
+_FRAME_CACHE_SIZE = 32
+
+# パーツカテゴリ(下から描画する順)
+PARTS = ['後', '体', '顔', '髪', '口', '目', '眉', '服下', '服上', '全', '他']
+
+
+def prepare_images(zip_dat, scale_percent, flip, interval, config=None):
+    """
+    設定で選択されているパーツ画像を、デコード・縮尺・反転して画像キャッシュに載せる
+
+    QImageはGUIスレッド以外でも扱えるため、読み込みスレッドから呼べる。
+    AvatarAnimeの作成前に呼んでおくと、GUIスレッドでデコードしない。
+
+    Args:
+        zip_dat: load_image()で読み込んだ画像データ辞書
+        scale_percent: 縮尺パーセント
+        flip: 左右反転フラグ
+        interval: フレーム更新間隔(ミリ秒)。旧形式(tick数)のパーツ設定の変換に使う
+        config: save_config()で保存した設定
+    """
+    for cat in PARTS:
+        conf = None
+        if config and "parts" in config and cat in config["parts"]:
+            conf = config["parts"][cat]
+        part = AvatarPartModel(cat, list(zip_dat[cat].keys()), conf, tick_ms=interval)
+        _prepare_part_images(zip_dat, cat, part, scale_percent, flip)
+
+
+class AvatarAnime:
+    """アニメーションタイプ毎のアニメーション状態"""
+
+    def __init__(self, zip_dat, scale_percent, flip, interval, config=None, engine=None):
+        """
+        Args:
+            zip_dat: load_image()で読み込んだ画像データ辞書
+            scale_percent: 縮尺パーセント
+            flip: 左右反転フラグ
+            interval: フレーム更新間隔(ミリ秒)。旧形式(tick数)のパーツ設定の変換にも使う
+            config: save_config()で保存した設定
+            engine: アニメーションエンジン。Noneなら共有のエンジン
+        """
+        self.engine = engine or pvv_mcp_server.avatar.mod_anime_engine.get_engine()
+        self.zip_dat = zip_dat
+        self.scale = scale_percent
+        self.flip = flip
+        self.frame_timer_interval = interval
+
+        self.current_pixmap = None
+        # current_pixmapが変わる毎にカウントアップするフレーム番号
+        self.frame_version = 0
+
+        # 合成済みフレームのキャッシュ (パーツファイル名のタプル, scale, flip) -> QPixmap
+        self._frame_key = None
+        self._frame_cache = OrderedDict()
+        self._compositor = pvv_mcp_server.avatar.mod_compositor.LayerCompositor()
+
+        # 編集ダイアログ(未作成ならNone)
+        self.editor = None
+        # 編集ダイアログで設定を変更した時に呼び出す関数
+        self.on_edited = None
+
+        self.parts = list(PARTS)
+        self.part_models = {}
+        for cat in self.parts:
+            file_names = list(zip_dat[cat].keys())
+            conf = None
+            if config and "parts" in config and cat in config["parts"]:
+                conf = config["parts"][cat]
+            part = self.engine.create_part(cat, file_names, conf, tick_ms=self.frame_timer_interval)
+            self.part_models[cat] = part
+        # self.partsの順に並んだパーツ(エンジンが走査する)
+        self.part_list = [self.part_models[cat] for cat in self.parts]
+
+        self._prepare_images()
+
+    #
+    # save/load config
+    #
+    def save_config(self):
+        """
+        アニメーション全体の設定を辞書形式で返す
+
+        Returns:
+            dict: 設定辞書
+        """
+        config = {
+            "parts": {}
+        }
+
+        # 各パーツの設定を収集
+        for cat in self.parts:
+            part_config = self.part_models[cat].save_config()
+            config["parts"][cat] = part_config
+
+        logger.info(f"save_config [AvatarAnime]: scale={self.scale}, flip={self.flip}")
+        logger.info(f"  parts count: {len(config['parts'])}")
+
+        return config
+
+    def load_config(self, config):
+        """
+        設定辞書からアニメーション全体の設定を読み込む
+
+        Args:
+            config: save_config()で保存した辞書
+        """
+        logger.info(f"load_config [AvatarAnime]")
+
+        # 各パーツの設定を読み込み
+        if "parts" in config:
+            for cat, part_config in config["parts"].items():
+                if cat in self.part_models:
+                    logger.info(f"  loading part: {cat}")
+                    self.part_models[cat].load_config(part_config, tick_ms=self.frame_timer_interval)
+                else:
+                    logger.warning(f"  unknown part: {cat}")
+
+        # 編集ダイアログが作成済みなら表示内容を更新
+        if self.editor is not None:
+            self.editor.refresh()
+
+        self.invalidate()
+        self._prepare_images()
+
+    #
+    # setter
+    #
+    def set_flip(self, val):
+        """左右反転を設定"""
+        if self.flip == val:
+            return
+        self.flip = val
+        self.invalidate()
+        self._compositor.reset()
+        self._prepare_images()
+
+    def set_scale(self, val):
+        """スケール設定"""
+        if self.scale == val:
+            return
+        self.scale = val
+        self.invalidate()
+        self._compositor.reset()
+        self._prepare_images()
+
+    def set_frame_timer_interval(self, val):
+        """フレーム更新間隔を設定"""
+        self.frame_timer_interval = val
+
+    #
+    # public function
+    #
+    def get_current_pixmap(self):
+        return self.current_pixmap
+
+    def start_oneshot(self):
+        for cat in self.parts:
+            self.part_models[cat].start_oneshot()
+
+    def invalidate(self):
+        """パーツの設定が変わったため、次のupdate_frame()で表示画像を確認し直す"""
+        self._frame_key = None
+
+    def notify_edited(self):
+        """編集ダイアログでパーツの設定が変わった"""
+        self.invalidate()
+        if self.on_edited is not None:
+            self.on_edited()
+
+    def update_frame(self, changed=None):
+        """
+        アニメーションを進め、表示フレームを更新する
+
+        Args:
+            changed: エンジンのadvance()で表示画像が変わったパーツのリスト。
+                     Noneの場合はこのアニメーションだけを進める
+        """
+        if changed is None:
+            changed = self.engine.advance([self])[self]
+
+        # 表示画像が変わったパーツが無ければ何もしない
+        if not changed and self._frame_key is not None:
+            return
+
+        # 各パーツの表示画像を決定
+        png_files = tuple(part.shown_image() for part in self.part_list)
+
+        # 前回と同じ組み合わせなら再合成不要
+        frame_key = (png_files, self.scale, self.flip)
+        if frame_key == self._frame_key:
+            return
+
+        pixmap = self._frame_cache.get(frame_key)
+        if pixmap is not None:
+            self._frame_cache.move_to_end(frame_key)
+        else:
+            pixmap = self._compose_frame(png_files)
+            if pixmap is None:
+                return
+            self._frame_cache[frame_key] = pixmap
+            if len(self._frame_cache) > _FRAME_CACHE_SIZE:
+                self._frame_cache.popitem(last=False)
+
+        self._frame_key = frame_key
+        if pixmap is self.current_pixmap:
+            return
+
+        self.current_pixmap = pixmap
+        self.frame_version += 1
+
+        # 編集ダイアログのプレビューを更新
+        if self.editor is not None:
+            self.editor.update_preview(self.current_pixmap)
+
+    #
+    # private function
+    #
+    def _compose_frame(self, png_files):
+        """
+        パーツ画像を合成して表示用のQPixmapを作成する
+
+        Args:
+            png_files: self.partsの順に並んだ表示ファイル名のタプル(非表示はNone)
+
+        Returns:
+            QPixmap。描画するパーツが無い場合はNone
+        """
+        # デコード済みのQImageをキャッシュから取得
+        layers = []
+        for cat, png_file in zip(self.parts, png_files):
+            part_image = None
+            if png_file:
+                part_image = pvv_mcp_server.avatar.mod_image_cache.get_image(
+                    self.zip_dat, cat, png_file, self.scale, self.flip)
+            layers.append(part_image)
+
+        # 前回から変化したパーツの範囲だけを再描画
+        # パーツは縮尺・反転済みなので、表示解像度のまま合成する
+        base_image = self._compositor.compose(layers)
+        if base_image is None:
+            return None
+
+        return QPixmap.fromImage(base_image)
+
+    def _prepare_images(self):
+        """
+        ベース画像・アニメ画像として選択されているパーツを
+        現在の縮尺・反転で変換しておく
+        """
+        for cat in self.parts:
+            _prepare_part_images(self.zip_dat, cat, self.part_models[cat], self.scale, self.flip)
+
+
+#
+# private function
+#
+def _prepare_part_images(zip_dat, cat, part, scale, flip):
+    """パーツのベース画像・アニメ画像を画像キャッシュに載せる"""
+    files = zip_dat[cat]
+    for png_file in [part.base_image, *part.selected_files]:
+        if png_file in files:
+            pvv_mcp_server.avatar.mod_image_cache.get_image(zip_dat, cat, png_file, scale, flip)
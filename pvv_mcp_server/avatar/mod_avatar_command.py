@@ -0,0 +1,129 @@
+"""
+mod_avatar_command.py
+MCPスレッドからGUIスレッドへのアバター操作のキュー
+
+MCPのツール(speak, emotion)はGUIスレッド以外から呼ばれるため、アバターの操作は
+キューに積み、GUIスレッドのスケジューラがtick毎に1回まとめて反映する。
+同じアバターへの操作は最新の状態だけを反映する(途中の状態は捨てる)。
+
+post()はFutureを返し、操作を反映した後にアバターがフレームを描画すると完了する。
+画像の読み込み中・描画の先送り中のアバターは、実際に描画されるまで完了しない。
+呼び出し側は、口パクが表示されてから音声を再生するといった同期に使える。
+"""
+
+import threading
+from concurrent.futures import Future
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class AvatarCommandQueue:
+    """アバター操作のキュー(スレッドセーフ)"""
+
+    def __init__(self, wakeup=None):
+        """
+        Args:
+            wakeup: キューが空の時に操作が積まれたら呼ぶ関数(任意のスレッドから呼ばれる)。
+                    GUIスレッドにキューの反映を依頼するために使う
+        """
+        self.wakeup = wakeup
+        self._lock = threading.Lock()
+        # アバター -> [アニメーションキー, Futureのリスト]
+        self._commands = {}
+        # 反映済みで描画待ちの操作 [(Future, アニメーションキー, アバター, 反映時のframe_count)]
+        # (GUIスレッドだけが扱う)
+        self._waiting = []
+
+    def post(self, avatar, anime_type) -> Future:
+        """
+        アバターを表示し、アニメーションキーを設定する操作を積む(任意のスレッドから呼べる)
+
+        Args:
+            avatar: AvatarWindow
+            anime_type: アニメーションキー（"立ち絵", "口パク"など）
+
+        Returns:
+            反映後にフレームが描画されると完了するFuture(結果は反映したアニメーションキー)
+        """
+        future = Future()
+        with self._lock:
+            was_empty = not self._commands
+            command = self._commands.get(avatar)
+            if command is None:
+                self._commands[avatar] = [anime_type, [future]]
+            else:
+                # 反映前の操作は最新の状態で上書きする
+                command[0] = anime_type
+                command[1].append(future)
+
+        if was_empty and self.wakeup is not None:
+            self.wakeup()
+        return future
+
+    def pending(self) -> bool:
+        """反映待ちの操作があるか"""
+        with self._lock:
+            return bool(self._commands)
+
+    def discard(self, avatar) -> None:
+        """
+        アバターへの反映待ちの操作を取り消す(アバターを破棄する時)
+
+        Args:
+            avatar: AvatarWindow
+        """
+        with self._lock:
+            command = self._commands.pop(avatar, None)
+        if command is not None:
+            for future in command[1]:
+                future.cancel()
+
+        waiting = [entry for entry in self._waiting if entry[2] is avatar]
+        self._waiting = [entry for entry in self._waiting if entry[2] is not avatar]
+        for future, _, _, _ in waiting:
+            future.cancel()
+
+    def drain(self):
+        """
+        積まれた操作をアバターに反映する(GUIスレッドで呼び出すこと)
+
+        Returns:
+            反映した操作のリスト。描画が終わったらcomplete()に渡す
+        """
+        with self._lock:
+            commands, self._commands = self._commands, {}
+
+        applied = []
+        for avatar, (anime_type, futures) in commands.items():
+            try:
+                avatar.showWindow()
+                avatar.set_anime_type(anime_type)
+            except Exception as e:
+                logger.warning(f"avatar command error: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            applied.extend((future, anime_type, avatar, avatar.frame_count) for future in futures)
+        return applied
+
+    def complete(self, applied) -> None:
+        """
+        反映後にフレームを描画したアバターの操作のFutureを完了する(tickの描画後に毎回呼び出すこと)
+
+        まだ描画していないアバターの操作は、以降のcomplete()で描画されるまで待つ。
+
+        Args:
+            applied: drain()の戻り値
+        """
+        waiting = []
+        for entry in self._waiting + list(applied):
+            future, anime_type, avatar, frame_count = entry
+            if future.done():
+                continue
+            if avatar.frame_count > frame_count:
+                future.set_result(anime_type)
+            else:
+                waiting.append(entry)
+        self._waiting = waiting
@@ -1,7 +1,6 @@
 from PySide6.QtWidgets import QApplication, QWidget, QLabel, QDialog, QComboBox, QVBoxLayout, QHBoxLayout, QGridLayout
 from PySide6.QtGui import QPixmap, QPainter, QImage, QShortcut, QKeySequence
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QTransform
 import sys
 import zipfile
 import io
@@ -15,33 +14,30 @@ logger = logging.getLogger(__name__)
 
 
 class AvatarDialog(QDialog):
+    """アニメーション設定の編集ダイアログ"""
 
-    def __init__(self, parent, zip_dat, scale_percent, flip, interval, config=None):
+    def __init__(self, parent, anime):
+        """
+        Args:
+            parent: 親ウィジェット(AvatarWindow)
+            anime: 編集対象のAvatarAnime
+        """
         super().__init__(parent)
         
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
 
-        self.zip_dat = zip_dat
-        self.scale = scale_percent
-        self.flip = flip
+        self.anime = anime
 
         #self.setWindowTitle(f"立ち絵画像選択ダイアログ-{anime_type}")
         #self.setObjectName(f"dialog_{anime_type}")
-        self.current_pixmap = None
 
-        self.parts = ['後', '体', '顔', '髪', '口', '目', '眉', '服下', '服上', '全', '他']
+        self.parts = anime.parts
         self.part_widgets = {}
         for cat in self.parts:
-            file_names = list(zip_dat[cat].keys())
-            conf = None
-            if config and "parts" in config and cat in config["parts"]:
-                conf = config["parts"][cat]
-            part_widget = pvv_mcp_server.avatar.mod_avatar_part.AvatarPartWidget(cat, file_names, conf)
+            part_widget = pvv_mcp_server.avatar.mod_avatar_part.AvatarPartWidget(
+                anime.part_models[cat], on_changed=anime.notify_edited)
             self.part_widgets[cat] = part_widget
 
-        # if config:
-        #     self.load_config(config)
-          
         self.setup_gui()
 
     #
@@ -102,6 +98,12 @@ class AvatarDialog(QDialog):
         
         self.setLayout(main_layout)
 
+    def showEvent(self, event):
+        """非表示中は更新していないプレビューを表示時に反映する"""
+        super().showEvent(event)
+        if self.anime.current_pixmap is not None:
+            self.center_label.setPixmap(self.anime.current_pixmap)
+
     def closeEvent(self, event):
         """×ボタンが押された時の処理をオーバーライド"""
         # closeイベントを無視して、hideだけ実行
@@ -109,114 +111,22 @@ class AvatarDialog(QDialog):
         self.hide()
 
     #
-    # save/load config
+    # public function
     #
-    def save_config(self):
-        """
-        ダイアログ全体の設定を辞書形式で返す
-        
-        Returns:
-            dict: 設定辞書
+    def update_preview(self, pixmap):
         """
+        プレビューを更新する(表示中のみ)
 
-        config = {
-            # "scale": self.scale,
-            # "flip": self.flip,
-            # "frame_timer_interval": self.frame_timer_interval,
-            "parts": {}
-        }
-        
-        # 各パーツの設定を収集
-        for cat in self.parts:
-            part_config = self.part_widgets[cat].save_config()
-            config["parts"][cat] = part_config
-        
-        logger.info(f"save_config [AvatarDialog]: scale={self.scale}, flip={self.flip}")
-        logger.info(f"  parts count: {len(config['parts'])}")
-        
-        return config
-
-    def load_config(self, config):
-        """
-        設定辞書からダイアログ全体の設定を読み込む
-        
         Args:
-            config: save_config()で保存した辞書
+            pixmap: 表示するフレーム
         """
-        logger.info(f"load_config [AvatarDialog]")
-        
-        # 各パーツの設定を読み込み
-        if "parts" in config:
-            for cat, part_config in config["parts"].items():
-                if cat in self.part_widgets:
-                    logger.info(f"  loading part: {cat}")
-                    self.part_widgets[cat].load_config(part_config)
-                else:
-                    logger.warning(f"  unknown part: {cat}")
-
-    #
-    # setter
-    #
-    def set_flip(self, val):
-        """左右反転を設定"""
-        self.flip = val
-
-    def set_scale(self, val):
-        """スケール設定"""
-        self.scale = val
+        if self.isVisible():
+            self.center_label.setPixmap(pixmap)
 
-    #
-    # public function
-    #
-    def get_current_pixmap(self):
-        return self.current_pixmap
-
-    def start_oneshot(self):
-        for cat in self.parts:
-            self.part_widgets[cat].start_oneshot()
-
-    def update_frame(self):
-        base_image = None
-        painter = None
-        
+    def refresh(self):
+        """モデルの設定が変わった場合に各パーツの表示を更新する"""
         for cat in self.parts:
-            png_file = self.part_widgets[cat].update()
-            if png_file:
-                png_dat = self.zip_dat[cat][png_file]
-                
-                # バイトデータからQImageを作成
-                part_image = QImage()
-                part_image.loadFromData(png_dat)
-                
-                # 最初のパーツでベース画像を作成
-                if base_image is None:
-                    base_width = part_image.width()
-                    base_height = part_image.height()
-                    base_image = QImage(base_width, base_height, QImage.Format_ARGB32)
-                    base_image.fill(Qt.transparent)
-                    painter = QPainter(base_image)
-                
-                # パーツを中央揃えで描画
-                x = (base_image.width() - part_image.width()) // 2
-                y = (base_image.height() - part_image.height()) // 2
-                painter.drawImage(x, y, part_image)
-        
-        # ベース画像が作成されていればラベルに設定
-        if base_image is not None and painter is not None:
-            painter.end()
-
-            pixmap_org = QPixmap.fromImage(base_image)
-
-            if self.flip:
-                transform = QTransform()
-                transform.scale(-1, 1)
-                pixmap_org = pixmap_org.transformed(transform)
-
-            new_width = int(pixmap_org.width() * self.scale / 100)
-            new_height = int(pixmap_org.height() * self.scale / 100)
-            self.current_pixmap = pixmap_org.scaled(new_width, new_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.center_label.setPixmap(self.current_pixmap)
-
+            self.part_widgets[cat].refresh()
 
 
 if __name__ == "__main__":
@@ -248,18 +158,22 @@ if __name__ == "__main__":
 
 
     app = QApplication(sys.argv)
-    dialog1 = AvatarDialog(png_dat, 100, False, 100)
+    from pvv_mcp_server.avatar.mod_avatar_anime import AvatarAnime
+    anime1 = AvatarAnime(png_dat, 100, False, 100)
+    dialog1 = AvatarDialog(None, anime1)
     dialog1.show()
 
-    conf = dialog1.save_config()
+    conf = anime1.save_config()
 
     conf["parts"]["顔"]["base_image"] = "05a.png"
-    dialog2 = AvatarDialog(png_dat, 100, False, 100, conf)
+    anime2 = AvatarAnime(png_dat, 100, False, 100, conf)
+    dialog2 = AvatarDialog(None, anime2)
     dialog2.show()
 
     conf["parts"]["顔"]["base_image"] = "06b.png"
-    dialog3 = AvatarDialog(png_dat, 100, False, 100)
-    dialog3.load_config(conf)
+    anime3 = AvatarAnime(png_dat, 100, False, 100)
+    dialog3 = AvatarDialog(None, anime3)
+    anime3.load_config(conf)
     dialog3.show()
 
-    sys.exit(app.exec())
+    sys.exit(app.exec())
\ No newline at end of file
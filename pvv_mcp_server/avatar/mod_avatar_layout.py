@@ -0,0 +1,274 @@
+"""
+mod_avatar_layout.py
+同じ追随対象ウィンドウに追随するアバターの配置
+
+同じ位置(left_out, right_in など)に設定された複数のアバターが重ならないよう、
+追随対象ウィンドウ毎に全アバターの配置を1回でまとめて計算する。
+配置は追随対象ウィンドウの位置・サイズ、アバターのサイズ・位置設定・表示状態が
+変わった時だけ計算し直す。
+
+配置方法:
+  - none  : 各アバターをそれぞれの位置設定どおりに置く(重なる。デフォルト)
+  - stack : アンカー位置から外側へ横に並べる
+  - tile  : アンカー位置から上へ積み、追随対象ウィンドウの高さを超えたら外側に次の列を作る
+  - offset: アバター毎に固定のオフセット(dx, dy)ずつずらす
+"""
+
+from pvv_mcp_server.avatar.mod_update_position import calc_position
+import pvv_mcp_server.avatar.mod_window_tracker
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 配置方法
+LAYOUT_NONE = "none"
+LAYOUT_STACK = "stack"
+LAYOUT_TILE = "tile"
+LAYOUT_OFFSET = "offset"
+LAYOUT_MODES = (LAYOUT_NONE, LAYOUT_STACK, LAYOUT_TILE, LAYOUT_OFFSET)
+# 既存の設定の表示位置が変わらないよう、デフォルトは重ねて置く
+DEFAULT_LAYOUT = LAYOUT_NONE
+# offsetで2体目以降をずらす量(x はアンカーから外側へ向かう方向を正とする)
+DEFAULT_OFFSET = (40, -40)
+
+# 位置 -> 2体目以降を並べる横方向(1: 右へ, -1: 左へ)
+_DIRECTIONS = {
+    "left_out": -1,
+    "left_center": 1,
+    "left_in": 1,
+    "right_in": -1,
+    "right_center": -1,
+    "right_out": 1,
+}
+
+
+# グローバル変数
+_layouts = {}  # ウィンドウタイトル -> AvatarLayout
+_default_mode = DEFAULT_LAYOUT
+_default_offset = DEFAULT_OFFSET
+
+
+def solve(target_geometry, avatars, mode=DEFAULT_LAYOUT, offset=DEFAULT_OFFSET):
+    """
+    追随対象ウィンドウに対する各アバターの表示位置を計算する
+
+    Args:
+        target_geometry: 追随対象ウィンドウの(x, y, width, height)
+        avatars: 配置するアバターのリスト(position, width(), height()を持つ)。先頭ほどアンカーの近くに置く
+        mode: 配置方法 (none, stack, tile, offset)
+        offset: offsetの場合のずらす量(dx, dy)
+
+    Returns:
+        [(アバター, (x, y)), ...]。位置が不明なアバターは含まない
+    """
+    groups = {}
+    for avatar in avatars:
+        groups.setdefault(avatar.position, []).append(avatar)
+
+    placements = []
+    for position, group in groups.items():
+        direction = _DIRECTIONS.get(position, 1)
+        if mode == LAYOUT_NONE:
+            placements.extend(_solve_none(target_geometry, position, group))
+        elif mode == LAYOUT_TILE:
+            placements.extend(_solve_tile(target_geometry, position, direction, group))
+        elif mode == LAYOUT_OFFSET:
+            placements.extend(_solve_offset(target_geometry, position, direction, group, offset))
+        else:
+            placements.extend(_solve_stack(target_geometry, position, direction, group))
+    return placements
+
+
+class AvatarLayout:
+    """追随対象ウィンドウ毎のアバター配置"""
+
+    def __init__(self, tracker, mode=DEFAULT_LAYOUT, offset=DEFAULT_OFFSET):
+        """
+        Args:
+            tracker: 追随対象ウィンドウのWindowTracker
+            mode: 配置方法 (none, stack, tile, offset)
+            offset: offsetの場合のずらす量(dx, dy)
+        """
+        self.tracker = tracker
+        self.mode = mode
+        self.offset = tuple(offset)
+        self.avatars = []
+        # 前回配置した時の入力(変わっていなければ計算し直さない)
+        self._key = None
+
+        # 追随対象ウィンドウの位置・サイズが変わったら配置し直す
+        self.tracker.subscribe(self)
+
+    def add(self, avatar):
+        """配置するアバターを追加する"""
+        if avatar not in self.avatars:
+            self.avatars.append(avatar)
+            self._key = None
+
+    def remove(self, avatar):
+        """配置するアバターから外す"""
+        if avatar in self.avatars:
+            self.avatars.remove(avatar)
+            self._key = None
+
+    def set_mode(self, mode, offset=None):
+        """配置方法を設定する"""
+        self.mode = mode
+        if offset is not None:
+            self.offset = tuple(offset)
+        self._key = None
+
+    def on_target_moved(self, geometry):
+        """追随対象ウィンドウの位置・サイズが変わった(WindowTrackerから通知)"""
+        self.apply(geometry)
+
+    def update(self):
+        """追随対象ウィンドウの現在の位置・サイズで配置し直す"""
+        geometry = self.tracker.geometry
+        if geometry is None:
+            geometry = self.tracker.poll()
+        if geometry is None:
+            return
+        self.apply(geometry)
+
+    def apply(self, geometry):
+        """
+        位置追随中の表示されているアバターを配置する
+
+        Args:
+            geometry: 追随対象ウィンドウの(x, y, width, height)
+        """
+        avatars = [avatar for avatar in self.avatars if avatar.follow_enabled and avatar.isVisible()]
+        sizes = tuple((id(avatar), avatar.position, avatar.width(), avatar.height()) for avatar in avatars)
+        key = (geometry, self.mode, self.offset, sizes)
+        if key == self._key:
+            return
+        self._key = key
+
+        for avatar, new_pos in solve(geometry, avatars, self.mode, self.offset):
+            # 位置が変わった時だけウィンドウを移動
+            if new_pos != (avatar.x(), avatar.y()):
+                avatar.move(*new_pos)
+
+
+def get_layout(title) -> AvatarLayout:
+    """
+    追随対象ウィンドウのタイトルに対応する共有の配置を取得する
+
+    Args:
+        title: 追随対象アプリケーションのウィンドウタイトル
+
+    Returns:
+        AvatarLayout
+    """
+    layout = _layouts.get(title)
+    if layout is None:
+        tracker = pvv_mcp_server.avatar.mod_window_tracker.get_tracker(title)
+        layout = AvatarLayout(tracker, _default_mode, _default_offset)
+        _layouts[title] = layout
+    return layout
+
+
+def configure(mode=DEFAULT_LAYOUT, offset=DEFAULT_OFFSET) -> None:
+    """
+    配置方法を設定する(作成済みの配置にも反映する)
+
+    Args:
+        mode: 配置方法 (none, stack, tile, offset)
+        offset: offsetの場合のずらす量(dx, dy)
+    """
+    global _default_mode, _default_offset
+    if mode not in LAYOUT_MODES:
+        logger.warning(f"Unknown layout: {mode}. use {DEFAULT_LAYOUT}")
+        mode = DEFAULT_LAYOUT
+    _default_mode = mode
+    _default_offset = tuple(offset)
+
+    for layout in _layouts.values():
+        layout.set_mode(_default_mode, _default_offset)
+        layout.update()
+
+
+def clear() -> None:
+    """全ての配置を破棄する(トラッカーを破棄した時など)"""
+    for layout in _layouts.values():
+        layout.tracker.unsubscribe(layout)
+    _layouts.clear()
+
+
+#
+# private function
+#
+def _anchor(target_geometry, position, avatar):
+    """アバター1体だけの場合の表示位置"""
+    return calc_position(position, target_geometry, avatar.width(), avatar.height())
+
+
+def _solve_none(target_geometry, position, group):
+    """各アバターをそれぞれの位置設定どおりに置く"""
+    placements = []
+    for avatar in group:
+        pos = _anchor(target_geometry, position, avatar)
+        if pos is not None:
+            placements.append((avatar, pos))
+    return placements
+
+
+def _solve_stack(target_geometry, position, direction, group):
+    """アンカー位置から外側へ横に並べる"""
+    placements = []
+    edge = None  # 並べたアバターの外側の端のx座標
+    for avatar in group:
+        pos = _anchor(target_geometry, position, avatar)
+        if pos is None:
+            continue
+        x, y = pos
+        width = avatar.width()
+        if edge is not None:
+            x = edge if direction > 0 else edge - width
+        edge = x + width if direction > 0 else x
+        placements.append((avatar, (x, y)))
+    return placements
+
+
+def _solve_tile(target_geometry, position, direction, group):
+    """アンカー位置から上へ積み、追随対象ウィンドウの高さを超えたら外側に次の列を作る"""
+    target_top = target_geometry[1]
+    placements = []
+    column = None  # [列の内側の端のx座標, 列の幅, 積んだアバターの上端のy座標]
+    for avatar in group:
+        pos = _anchor(target_geometry, position, avatar)
+        if pos is None:
+            continue
+        x, y = pos
+        width, height = avatar.width(), avatar.height()
+
+        if column is None:
+            column = [x if direction > 0 else x + width, width, y]
+        elif column[2] - height >= target_top:
+            # 同じ列の上に積む
+            y = column[2] - height
+            column[1] = max(column[1], width)
+            column[2] = y
+        else:
+            # 外側に次の列を作る
+            inner = column[0] + column[1] if direction > 0 else column[0] - column[1]
+            column = [inner, width, y]
+
+        x = column[0] if direction > 0 else column[0] - width
+        placements.append((avatar, (x, y)))
+    return placements
+
+
+def _solve_offset(target_geometry, position, direction, group, offset):
+    """アバター毎に固定のオフセットずつずらす"""
+    dx, dy = offset
+    placements = []
+    for index, avatar in enumerate(group):
+        pos = _anchor(target_geometry, position, avatar)
+        if pos is None:
+            continue
+        x, y = pos
+        placements.append((avatar, (x + index * dx * direction, y + index * dy)))
+    return placements
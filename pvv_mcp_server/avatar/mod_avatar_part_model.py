@@ -0,0 +1,355 @@
+"""
+mod_avatar_part_model.py
+パーツ毎のアニメーション状態
+
+表示するファイルの選択やアニメーションの進行を、GUIから切り離して保持する。
+編集用のウィジェット(AvatarPartWidget)は、必要になった時にこのモデルを編集するビューとして作成する。
+
+アニメーションタイプは整数のモードとして保持し、毎フレームの文字列比較を避ける。
+乱数生成器は外部から渡せるため、シードを固定した再現可能なテストができる。
+
+アニメーションの間隔はミリ秒で持ち、渡された単調増加の時刻で評価する。
+フレーム更新間隔を変えたり、フレームが落ちたりしてもアニメーションの速さは変わらない。
+"""
+
+import random
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+# アニメーションモード
+MODE_FIXED = 0      # 固定
+MODE_LOOP = 1       # ループ
+MODE_RANDOM_A = 2   # ランダムA
+MODE_RANDOM_B = 3   # ランダムB
+MODE_ONESHOT = 4    # ワンショット
+
+# モード -> アニメーションタイプ名(設定ファイル・GUIで使用する名前)
+ANIME_TYPE_NAMES = ("固定", "ループ", "ランダムA", "ランダムB", "ワンショット")
+# アニメーションタイプ名 -> モード
+ANIME_TYPE_MODES = {name: mode for mode, name in enumerate(ANIME_TYPE_NAMES)}
+
+# ランダムA/Bの待機ステップ数の候補(1ステップ = interval_ms)
+RANDOM_WAIT_STEPS = (10, 20, 30, 40, 50)
+
+# デフォルトのアニメーション間隔(ミリ秒)
+DEFAULT_INTERVAL_MS = 200
+# 旧形式(tick数)のintervalを変換する時の1tickの長さ(ミリ秒)
+DEFAULT_TICK_MS = 50
+# 処理が遅れた時にまとめて進める最大の時間(ミリ秒)
+# 省電力時の更新間隔より十分長くする。スリープ復帰などでこれ以上遅れた分は捨てる
+MAX_CATCHUP_MS = 10000
+
+
+class AvatarPartModel:
+    """パーツのアニメーション状態"""
+
+    __slots__ = (
+        "part_name", "image_files", "base_image", "current_image", "selected_files",
+        "interval_ms", "mode", "is_enabled", "next_update", "random_wait_tick",
+        "random_wait_idx", "random_anime_idx", "loop_anime_idx", "oneshot_idx", "rng",
+    )
+
+    def __init__(self, part_name, image_files, config=None, rng=None, tick_ms=DEFAULT_TICK_MS):
+        """
+        Args:
+            part_name: パーツ名
+            image_files: 画像ファイルのリスト
+            config: 初期設定辞書(Noneならデフォルト値)
+            rng: 乱数生成器(random.Random互換)。Noneならrandomモジュール
+            tick_ms: 旧形式の設定(interval)を変換する時の1tickの長さ(ミリ秒)
+        """
+        self.part_name = part_name
+        self.image_files = image_files
+        self.rng = rng if rng is not None else random
+
+        # デフォルト値で初期化
+        self._init_default_values()
+
+        # 設定が渡されていれば適用
+        if config:
+            self.load_config(config, tick_ms)
+
+    def _init_default_values(self):
+        """デフォルト値で初期化"""
+        if len(self.image_files) > 0:
+            self.base_image = self.image_files[0]
+        else:
+            self.base_image = None
+
+        self.current_image = self.base_image
+        self.selected_files = []
+        self.next_update = None  # 次にアニメーションを進める時刻(ミリ秒)
+        self.interval_ms = DEFAULT_INTERVAL_MS
+        self.mode = MODE_FIXED
+        self.is_enabled = True  # パーツの有効状態
+        self.random_wait_tick = self.rng.choice(RANDOM_WAIT_STEPS)
+        self.random_wait_idx = 0
+        self.random_anime_idx = 0
+        self.loop_anime_idx = 0
+        self.oneshot_idx = 0
+
+    @property
+    def anime_type(self):
+        """アニメーションタイプ名(固定/ループ/ランダムA/ランダムB/ワンショット)"""
+        return ANIME_TYPE_NAMES[self.mode]
+
+    @anime_type.setter
+    def anime_type(self, name):
+        if name not in ANIME_TYPE_MODES:
+            logger.warning(f"不明なアニメーションタイプ [{self.part_name}]: {name}")
+            return
+        self.mode = ANIME_TYPE_MODES[name]
+
+    #
+    # save/load confg
+    #
+    def save_config(self):
+        """
+        現在の設定を辞書形式で返す
+
+        Returns:
+            dict: 設定辞書
+        """
+        config = {
+            "part_name": self.part_name,
+            "base_image": self.base_image,
+            "selected_files": self.selected_files.copy(),
+            "interval_ms": self.interval_ms,
+            "anime_type": self.anime_type,
+            "is_enabled": self.is_enabled
+        }
+        logger.info(f"save_config [{self.part_name}]: {config}")
+        return config
+
+    def load_config(self, config, tick_ms=DEFAULT_TICK_MS):
+        """
+        設定辞書から値を読み込む
+
+        Args:
+            config: save_config()で保存した辞書
+            tick_ms: 旧形式の設定(interval)を変換する時の1tickの長さ(ミリ秒)
+        """
+        logger.info(f"load_config [{self.part_name}]: {config}")
+
+        if "base_image" in config:
+            self.base_image = config["base_image"]
+            self.current_image = self.base_image
+
+        if "selected_files" in config:
+            self.selected_files = list(config["selected_files"])
+
+        if "interval_ms" in config:
+            self.interval_ms = max(1, int(config["interval_ms"]))
+        elif "interval" in config:
+            # 旧形式: intervalの次のtickで画像が切り替わる
+            self.interval_ms = (config["interval"] + 1) * tick_ms
+
+        if "anime_type" in config:
+            self.anime_type = config["anime_type"]
+
+        if "is_enabled" in config:
+            self.is_enabled = config["is_enabled"]
+
+        # カウンタ類をリセット
+        self._reset_counters()
+
+    #
+    # setter
+    #
+    def set_anime_type(self, anime_type):
+        """
+        アニメーションタイプを変更し、カウンタをリセットする
+
+        Args:
+            anime_type: 固定/ループ/ランダムA/ランダムB/ワンショット
+        """
+        self.anime_type = anime_type
+        logger.info(f"選択されたアニメーションタイプ: {self.anime_type}")
+
+        # 共通のカウンタをリセット
+        self._reset_counters()
+        self.start_oneshot()
+        logger.info(f"random_wait_tick : {self.random_wait_tick}")
+
+    #
+    # animation
+    #
+    def start_oneshot(self):
+        """外部からoneshotアニメを開始するトリガー"""
+        if not self.is_enabled:
+            return
+
+        if len(self.selected_files) > 0:
+            logger.info(f"{self.part_name}: start_oneshot")
+            self.oneshot_idx = 1
+
+    def tick(self, now):
+        """
+        現在時刻までアニメーションを進める
+
+        Args:
+            now: 単調増加の現在時刻(ミリ秒)
+
+        Returns:
+            bool: 表示画像が変わった場合True
+        """
+        if not self.is_enabled or not self.image_files:
+            return False
+
+        if self.next_update is None:
+            # 開始時刻からinterval_ms後に最初のステップを進める
+            self.next_update = now + self.interval_ms
+            return False
+
+        if now < self.next_update:
+            return False
+
+        # 遅れた分のステップもまとめて進め、アニメーションの速さを保つ
+        # (省電力で更新間隔を落としても、interval_msが短いパーツが遅くならない)
+        steps = int((now - self.next_update) // self.interval_ms) + 1
+        self.next_update += steps * self.interval_ms
+        steps = min(steps, max(1, MAX_CATCHUP_MS // self.interval_ms))
+
+        previous = self.current_image
+        _MODE_ADVANCERS[self.mode](self, steps)
+        return self.current_image != previous
+
+    def update(self, now):
+        """
+        現在時刻までアニメーションを進め、表示する画像を返す
+
+        Args:
+            now: 単調増加の現在時刻(ミリ秒)
+
+        Returns:
+            表示する画像ファイル名。非表示の場合はNone
+        """
+        if not self.is_enabled or not self.image_files:
+            return None
+
+        self.tick(now)
+        return self.current_image
+
+    def shown_image(self):
+        """
+        現在表示する画像を返す(アニメーションは進めない)
+
+        Returns:
+            表示する画像ファイル名。非表示の場合はNone
+        """
+        if not self.is_enabled or not self.image_files:
+            return None
+        return self.current_image
+
+    #
+    # private function
+    #
+    def _reset_counters(self):
+        """アニメーションのカウンタをリセットする"""
+        self.next_update = None
+        self.loop_anime_idx = 0
+        self.random_anime_idx = 0
+        self.random_wait_idx = 0
+        self.random_wait_tick = self.rng.choice(RANDOM_WAIT_STEPS)
+
+    # 各モードの_advance_xxx(steps)は、1ステップずつ進めた場合と同じ状態になるよう、
+    # 待機・アニメーションの残りステップ数を計算してまとめて進める
+
+    def _advance_fixed(self, steps):
+        self.current_image = self.base_image
+
+    def _advance_loop(self, steps):
+        if not self.selected_files:
+            self.current_image = self.base_image
+            return
+        count = len(self.selected_files)
+        self.current_image = self.selected_files[(self.loop_anime_idx + steps - 1) % count]
+        self.loop_anime_idx = (self.loop_anime_idx + steps) % count
+
+    def _advance_random_a(self, steps):
+        """ランダムA: base画像をランダム時間表示 → アニメ画像をワンショット再生"""
+        while steps > 0:
+            if self.random_anime_idx == 0:
+                # 待機モード: base画像を表示し、ランダム待機時間に達したらアニメ開始
+                self.current_image = self.base_image
+                remaining = max(1, self.random_wait_tick - self.random_wait_idx)
+                if steps < remaining:
+                    self.random_wait_idx += steps
+                    return
+                steps -= remaining
+                self.random_wait_idx = 0
+                # 次のランダム待機時間を設定
+                self.random_wait_tick = self.rng.choice(RANDOM_WAIT_STEPS)
+
+                # アニメ画像が選択されていればアニメ開始
+                if len(self.selected_files) > 0:
+                    self.random_anime_idx = 1  # アニメ開始フラグ
+            else:
+                # アニメ再生モード: 選択画像を順に表示し、次のステップで待機モードに戻る
+                self.random_anime_idx, steps = self._advance_anime(self.random_anime_idx, steps)
+
+    def _advance_random_b(self, steps):
+        """ランダムB: selected_filesからランダムに1つ選んで、ランダムな時間表示"""
+        while steps > 0:
+            remaining = max(1, self.random_wait_tick - self.random_wait_idx)
+            # まだ待機時間に達していない場合は、現在の画像をそのまま
+            if steps < remaining:
+                self.random_wait_idx += steps
+                return
+            steps -= remaining
+
+            # 待機時間に達したら、次の画像に切り替え
+            self.random_wait_idx = 0
+
+            # 次のランダムな待機時間を設定
+            self.random_wait_tick = self.rng.choice(RANDOM_WAIT_STEPS)
+
+            # ランダムに画像を選択
+            if len(self.selected_files) > 0:
+                self.current_image = self.rng.choice(self.selected_files)
+            else:
+                # フォールバック
+                self.current_image = self.base_image
+
+    def _advance_oneshot(self, steps):
+        """ワンショット: selected_filesを順番に表示→base_imageに戻る"""
+        if self.oneshot_idx > 0:
+            self.oneshot_idx, steps = self._advance_anime(self.oneshot_idx, steps)
+        if steps > 0:
+            # 待機モード: base画像を表示
+            self.current_image = self.base_image
+
+    def _advance_anime(self, anime_idx, steps):
+        """
+        選択画像を順に表示するアニメーションを進める(ランダムA・ワンショット)
+
+        Args:
+            anime_idx: 次に表示する選択画像の番号+1(1以上)
+            steps: 進めるステップ数
+
+        Returns:
+            (進めた後のanime_idx(終了したら0), 残りのステップ数)
+        """
+        # 残りの選択画像の表示と、base画像に戻る1ステップ
+        remaining = max(1, len(self.selected_files) - anime_idx + 2)
+        if steps < remaining:
+            anime_idx += steps
+            self.current_image = self.selected_files[anime_idx - 2]
+            return anime_idx, 0
+
+        # アニメ終了: 待機モードに戻る
+        self.current_image = self.base_image
+        return 0, steps - remaining
+
+
+# モード -> 更新処理
+_MODE_ADVANCERS = (
+    AvatarPartModel._advance_fixed,
+    AvatarPartModel._advance_loop,
+    AvatarPartModel._advance_random_a,
+    AvatarPartModel._advance_random_b,
+    AvatarPartModel._advance_oneshot,
+)
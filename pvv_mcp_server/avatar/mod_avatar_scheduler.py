@@ -0,0 +1,255 @@
+"""
+mod_avatar_scheduler.py
+全アバター共通のアニメーションクロック
+
+アバター毎にフレーム更新・位置追随のタイマーを持つ代わりに、1つのQTimerで全アバターを進める。
+各アバターの更新間隔は共通のtick間隔の倍数に丸めるため、同じ間隔のアバターは同じtickでまとめて更新される。
+1tickで描画に使える時間(フレームバジェット)を超えた場合は、
+アイドル・待機中のアバターから順に描画を次のtickへ先送りする。
+
+省電力のため、非表示のアバターは更新を止め、発話・感情表現がしばらく無いアバターは
+アイドル間隔まで更新を落とす。全アバターがアイドル・非表示ならクロック自体を遅くし、
+set_anime_type()で起こされると即座に通常の間隔に戻る。
+表示中のアバターが無くなったらクロックを止め、アバターが表示されたら(resume())再開する。
+
+MCPスレッドからのアバター操作は操作キュー(commands)に積まれ、各tickの最初にまとめて反映する。
+キューが空の時に操作が積まれると、次のtickを待たずにすぐtickする。
+"""
+
+import time
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+import pvv_mcp_server.avatar.mod_anime_engine
+from pvv_mcp_server.avatar.mod_avatar_command import AvatarCommandQueue
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 共通のtick間隔(ミリ秒)
+BASE_INTERVAL = 50
+# 1tickで描画に使える時間(秒)
+FRAME_BUDGET = 0.02
+# 描画を先送りできる最大tick数(これを超えたアバターは優先度に関係なく描画する)
+MAX_DEFERRED_TICKS = 10
+# アイドル状態のフレーム更新・位置追随の間隔(ミリ秒)
+IDLE_INTERVAL = 500
+
+
+class _CommandNotifier(QObject):
+    """操作キューに操作が積まれたことを、GUIスレッドに通知する"""
+
+    posted = Signal()
+
+
+class AvatarScheduler:
+    """全アバター共通のアニメーションクロック"""
+
+    def __init__(self, interval=BASE_INTERVAL, frame_budget=FRAME_BUDGET, engine=None, clock=time.perf_counter,
+                 idle_interval=IDLE_INTERVAL):
+        """
+        Args:
+            interval: 共通のtick間隔(ミリ秒)
+            frame_budget: 1tickで描画に使える時間(秒)
+            engine: アニメーションエンジン。Noneなら共有のエンジン
+            clock: フレームバジェットの計測に使う時計
+            idle_interval: アイドル状態の更新間隔(ミリ秒)
+        """
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.frame_budget = frame_budget
+        self.engine = engine or pvv_mcp_server.avatar.mod_anime_engine.get_engine()
+        self.clock = clock
+
+        self.avatars = []
+        # 経過した共通tick数(省電力中は1回のtickで複数tick進む)
+        self.tick_count = 0
+        self.power_save = False
+        # アバター -> 次にフレーム更新・位置追随するtick数
+        self._next_frame = {}
+        self._next_follow = {}
+        # 描画待ちのアバター -> [表示画像が変わったパーツ, 先送りしたtick数]
+        self._pending = {}
+
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(self.interval)
+        self.timer.timeout.connect(self.tick)
+
+        # MCPスレッドからの操作キュー(GUIスレッドで生成したnotifier経由でtickを依頼する)
+        self._notifier = _CommandNotifier()
+        self._notifier.posted.connect(self._on_command_posted, Qt.QueuedConnection)
+        self.commands = AvatarCommandQueue(wakeup=self._notifier.posted.emit)
+
+    #
+    # public function
+    #
+    def register(self, avatar):
+        """アバターを登録し、クロックを開始する"""
+        if avatar not in self.avatars:
+            self.avatars.append(avatar)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def unregister(self, avatar):
+        """アバターの登録を解除し、登録が無くなればクロックを止める"""
+        if avatar in self.avatars:
+            self.avatars.remove(avatar)
+        self._pending.pop(avatar, None)
+        self._next_frame.pop(avatar, None)
+        self._next_follow.pop(avatar, None)
+        self.commands.discard(avatar)
+        if not self.avatars:
+            self.timer.stop()
+
+    def resume(self):
+        """アバターが表示された: 止めていたクロックを再開する"""
+        if self.avatars and not self.timer.isActive():
+            self.timer.start()
+
+    def wake(self, avatar):
+        """
+        アバターを次のtickですぐに更新し、省電力中なら通常の間隔に戻す
+
+        Args:
+            avatar: 発話・感情表現が始まったアバター
+        """
+        self._next_frame.pop(avatar, None)
+        self._next_follow.pop(avatar, None)
+        self._set_power_save(False)
+
+    def divider(self, interval):
+        """
+        更新間隔(ミリ秒)を共通のtick数に丸める
+
+        Returns:
+            何tick毎に更新するか(1以上)
+        """
+        return max(1, round(interval / self.interval))
+
+    def tick(self):
+        """全アバターの位置追随・アニメーションを1tick進める"""
+        # MCPスレッドから積まれた操作を反映し、描画が終わったら完了を通知する
+        applied = self.commands.drain()
+        try:
+            self._tick()
+        finally:
+            self.commands.complete(applied)
+
+    #
+    # private function
+    #
+    def _tick(self):
+        """位置追随・アニメーションを1tick進める"""
+        self.tick_count += self.divider(self.timer.interval())
+        now = time.monotonic()
+
+        # 非表示のアバターは更新しない(表示中のアバターが無ければ、表示されるまでクロックを止める)
+        visible = [avatar for avatar in self.avatars if avatar.isVisible()]
+        if not visible:
+            self.timer.stop()
+            return
+        idle = {avatar: avatar.is_idle(now) for avatar in visible}
+
+        # 位置追随: 追随対象ウィンドウのトラッカーを1回ずつ確認する
+        # (位置・サイズが変わっていればトラッカーが購読中のアバターを移動する)
+        trackers = {}
+        for avatar in visible:
+            interval = self.idle_interval if idle[avatar] else avatar.follow_timer_interval
+            if avatar.follow_enabled and self._due(self._next_follow, avatar, interval):
+                trackers[id(avatar.tracker)] = avatar.tracker
+        for tracker in trackers.values():
+            tracker.poll()
+
+        # 更新時刻になったアバターのアニメーションをまとめて進める
+        animes = {}
+        for avatar in visible:
+            interval = self.idle_interval if idle[avatar] else avatar.frame_timer_interval
+            if not avatar.animating or not self._due(self._next_frame, avatar, interval):
+                continue
+            anime = avatar.animes.get(avatar.anime_type)
+            if anime is not None:
+                animes[avatar] = anime
+
+        if animes:
+            changed = self.engine.advance(list(animes.values()))
+            for avatar, anime in animes.items():
+                entry = self._pending.setdefault(avatar, [[], 0])
+                entry[0].extend(changed[anime])
+
+        self._render()
+
+        # 全アバターがアイドル・非表示ならクロックを遅くする
+        self._set_power_save(all(idle.values()))
+
+    def _on_command_posted(self):
+        """操作が積まれた: 次のtickを待たずにすぐ反映する(tickの周期はここから数え直す)"""
+        if not self.commands.pending():
+            return
+        self.timer.stop()
+        self.tick()
+        if any(avatar.isVisible() for avatar in self.avatars):
+            self.timer.start()
+
+    def _due(self, table, avatar, interval):
+        """
+        更新時刻になったかを判定し、次の更新時刻を間隔の倍数のtickに揃えて設定する
+
+        Returns:
+            更新時刻になっていればTrue
+        """
+        if self.tick_count < table.get(avatar, 0):
+            return False
+        divider = self.divider(interval)
+        table[avatar] = (self.tick_count // divider + 1) * divider
+        return True
+
+    def _set_power_save(self, power_save):
+        """省電力(クロックをアイドル間隔に落とす)の切り替え"""
+        if power_save == self.power_save:
+            return
+        self.power_save = power_save
+        logger.info(f"avatar power save: {power_save}")
+        self.timer.setInterval(self.idle_interval if power_save else self.interval)
+
+    def _priority(self, avatar):
+        """描画順のキー(先送りが続いたもの→発話中→アクティブの順に優先)"""
+        deferred_ticks = self._pending[avatar][1]
+        speaking = avatar.anime_type != avatar.anime_types[0]
+        return (deferred_ticks < MAX_DEFERRED_TICKS, not speaking, avatar.is_idle(time.monotonic()))
+
+    def _render(self):
+        """描画待ちのアバターを優先度順に描画する"""
+        if not self._pending:
+            return
+
+        start = self.clock()
+        # 非表示になったアバターの描画は、再表示されるまで保留する
+        visible = [avatar for avatar in self._pending if avatar.isVisible()]
+        for index, avatar in enumerate(sorted(visible, key=self._priority)):
+            entry = self._pending[avatar]
+            if index > 0 and entry[1] < MAX_DEFERRED_TICKS and self.clock() - start > self.frame_budget:
+                # バジェット超過: 次のtickへ先送り
+                entry[1] += 1
+                logger.debug(f"frame deferred: {avatar.speaker_name} ({entry[1]})")
+                continue
+
+            del self._pending[avatar]
+            avatar.tick_frame(entry[0])
+
+
+# グローバル変数
+_scheduler = None
+
+
+def get_scheduler():
+    """
+    共有のスケジューラを取得する(GUIスレッドで呼び出すこと)
+
+    Returns:
+        AvatarScheduler
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AvatarScheduler()
+    return _scheduler
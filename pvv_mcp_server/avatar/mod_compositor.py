@@ -0,0 +1,229 @@
+"""
+mod_compositor.py
+パーツ画像のレイヤー合成モジュール
+
+前回の合成結果から変化したレイヤーの範囲だけを再描画する。
+変化したレイヤーより下のレイヤー群・上のレイヤー群は、それぞれ1枚の中間画像に
+平坦化してキャッシュしておき、変化したパーツの不透明領域だけを
+「下側の中間画像 → 変化したレイヤー → 上側の中間画像」の順に描き直す。
+"""
+
+import sys
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtCore import Qt, QRect
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 中間画像を保持する最大数(下側・上側それぞれ)
+_STACK_CACHE_SIZE = 8
+
+# ARGB32 の1ピクセル(4バイト)中のアルファ値の位置
+_ALPHA_OFFSET = 3 if sys.byteorder == "little" else 0
+
+
+class LayerCompositor:
+    """差分レイヤー合成クラス"""
+
+    def __init__(self):
+        self.canvas: Optional[QImage] = None
+        # 直近の再描画範囲(ベンチマーク・テスト用)
+        self.last_dirty_rect = QRect()
+
+        self._layers: List[Optional[QImage]] = []
+        # id(QImage)のタプル -> (QImageの弱参照のタプル, 中間画像)
+        # パーツ画像が破棄されたら、そのパーツを含む中間画像も破棄する
+        self._lower_cache: "OrderedDict[Tuple[int, ...], Tuple[tuple, QImage]]" = OrderedDict()
+        self._upper_cache: "OrderedDict[Tuple[int, ...], Tuple[tuple, QImage]]" = OrderedDict()
+        # id(QImage) -> (QImageの弱参照, 不透明領域)
+        # 画像キャッシュから破棄されたパーツ画像は、ここでも保持しない
+        self._opaque_rects: Dict[int, Tuple[weakref.ref, QRect]] = {}
+
+    def reset(self) -> None:
+        """合成結果とキャッシュを破棄する"""
+        self.canvas = None
+        self.last_dirty_rect = QRect()
+        self._layers = []
+        self._lower_cache.clear()
+        self._upper_cache.clear()
+        self._opaque_rects.clear()
+
+    def compose(self, layers: Sequence[Optional[QImage]]) -> Optional[QImage]:
+        """
+        レイヤーを合成する
+
+        Args:
+            layers: 下から順に並んだパーツ画像(非表示はNone)。
+                    同じパーツには同じQImageオブジェクトを渡すこと。
+
+        Returns:
+            合成結果のQImage。次回のcompose()で上書きされるため、
+            保持する場合は呼び出し側でコピーすること。
+            描画するレイヤーが無い場合はNone
+        """
+        layers = list(layers)
+        first = next((image for image in layers if image is not None), None)
+        if first is None:
+            self.reset()
+            return None
+
+        size = first.size()
+        if (self.canvas is None or self.canvas.size() != size
+                or len(layers) != len(self._layers)):
+            self._full_redraw(layers, size)
+            return self.canvas
+
+        changed = [i for i, image in enumerate(layers) if image is not self._layers[i]]
+        if not changed:
+            self.last_dirty_rect = QRect()
+            return self.canvas
+
+        lo = changed[0]
+        hi = changed[-1]
+
+        # 変化したレイヤーの新旧の不透明領域が再描画範囲
+        dirty = QRect()
+        for i in changed:
+            dirty = dirty.united(self._placed_rect(self._layers[i]))
+            dirty = dirty.united(self._placed_rect(layers[i]))
+        dirty = dirty.intersected(self.canvas.rect())
+
+        self._layers = layers
+        self.last_dirty_rect = dirty
+        if dirty.isEmpty():
+            return self.canvas
+
+        lower = self._stack(self._lower_cache, layers[:lo])
+        upper = self._stack(self._upper_cache, layers[hi + 1:])
+
+        painter = QPainter(self.canvas)
+        painter.setClipRect(dirty)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(0, 0, lower)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        for image in layers[lo:hi + 1]:
+            self._draw_layer(painter, image)
+        painter.drawImage(0, 0, upper)
+        painter.end()
+
+        return self.canvas
+
+    #
+    # private function
+    #
+    def _full_redraw(self, layers, size) -> None:
+        """全レイヤーを描き直す"""
+        self._lower_cache.clear()
+        self._upper_cache.clear()
+
+        self.canvas = self._flatten(layers, size)
+        self._layers = layers
+        self.last_dirty_rect = self.canvas.rect()
+
+    def _stack(self, cache, layers) -> QImage:
+        """連続するレイヤーを平坦化した中間画像を取得する"""
+        key = tuple(id(image) for image in layers)
+        entry = cache.get(key)
+        # idが再利用された別の画像の中間画像は使わない
+        if entry is not None and all(_referent(ref) is layer for ref, layer in zip(entry[0], layers)):
+            cache.move_to_end(key)
+            return entry[1]
+
+        image = self._flatten(layers, self.canvas.size())
+        callback = lambda ref, cache=cache, key=key: _discard(cache, key, ref)
+        refs = tuple(None if layer is None else weakref.ref(layer, callback) for layer in layers)
+        cache[key] = (refs, image)
+        if len(cache) > _STACK_CACHE_SIZE:
+            cache.popitem(last=False)
+        return image
+
+    def _flatten(self, layers, size) -> QImage:
+        """レイヤーを1枚の画像に合成する"""
+        image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        for layer in layers:
+            self._draw_layer(painter, layer)
+        painter.end()
+        return image
+
+    def _draw_layer(self, painter, image) -> None:
+        """パーツをキャンバス中央揃えで描画する"""
+        if image is None:
+            return
+        device = painter.device()
+        x = (device.width() - image.width()) // 2
+        y = (device.height() - image.height()) // 2
+        painter.drawImage(x, y, image)
+
+    def _placed_rect(self, image) -> QRect:
+        """キャンバス上に配置したパーツの不透明領域"""
+        if image is None:
+            return QRect()
+        rect = self._opaque_rect(image)
+        x = (self.canvas.width() - image.width()) // 2
+        y = (self.canvas.height() - image.height()) // 2
+        return rect.translated(x, y)
+
+    def _opaque_rect(self, image) -> QRect:
+        """パーツ画像の不透明領域(アルファ値が0でない範囲)を求める"""
+        key = id(image)
+        entry = self._opaque_rects.get(key)
+        if entry is not None and entry[0]() is image:
+            return entry[1]
+
+        rect = opaque_rect(image)
+        # 画像が破棄されたらエントリを削除する(idが再利用されても古い領域を使わない)
+        ref = weakref.ref(image, lambda ref, rects=self._opaque_rects, key=key: _discard(rects, key, ref))
+        self._opaque_rects[key] = (ref, rect)
+        return rect
+
+
+def _discard(cache, key, ref) -> None:
+    """破棄されたパーツ画像の不透明領域・中間画像を削除する"""
+    entry = cache.get(key)
+    if entry is None:
+        return
+    refs = entry[0] if isinstance(entry[0], tuple) else (entry[0],)
+    if any(r is ref for r in refs):
+        del cache[key]
+
+
+def _referent(ref):
+    """弱参照の参照先(非表示レイヤーはNone)"""
+    return None if ref is None else ref()
+
+
+def opaque_rect(image: QImage) -> QRect:
+    """
+    画像の不透明領域を返す
+
+    Args:
+        image: Format_ARGB32_Premultiplied の QImage
+
+    Returns:
+        アルファ値が0でないピクセルを囲む矩形。全て透明なら空の矩形
+    """
+    if image.isNull():
+        return QRect()
+
+    if image.format() != QImage.Format_ARGB32_Premultiplied:
+        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+    width = image.width()
+    height = image.height()
+    buf = np.frombuffer(image.constBits(), dtype=np.uint8, count=image.bytesPerLine() * height)
+    alpha = buf.reshape(height, image.bytesPerLine())[:, _ALPHA_OFFSET:width * 4:4]
+
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return QRect()
+    cols = np.flatnonzero(alpha.any(axis=0))
+
+    return QRect(int(cols[0]), int(rows[0]),
+                 int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
@@ -0,0 +1,164 @@
+"""
+mod_image_cache.py
+パーツ画像のデコード結果をキャッシュするモジュール
+
+(zip_data, カテゴリ, ファイル名) 毎にPNGを一度だけデコードし、
+premultiplied ARGB の QImage として全フレーム・全ダイアログで再利用する。
+縮尺・左右反転を指定した場合は、変換済みの画像も同様にキャッシュする。
+
+キャッシュは画素データの合計サイズで上限を設け、最近使われていない画像から破棄する
+(縮尺・反転を変えた後の古い変換済み画像など)。デコードに失敗した画像も記録し、毎フレーム再デコードしない。
+
+読み込みスレッド(事前のデコード)とGUIスレッドから呼ばれる。デコードは並行して行えるようロックの外で行い、
+デコード中にclear()された場合は、その結果をキャッシュに登録しない(解放済みの画像データを保持しない)。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from PySide6.QtGui import QImage
+from PySide6.QtCore import Qt
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+# キャッシュする画素データの合計サイズの上限(バイト)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+# グローバル変数
+# (id(zip_data), カテゴリ, ファイル名, 縮尺, 反転) -> デコード済みQImage(デコードできなかった場合はNone)
+# 最近使ったものほど後ろに並べる
+_image_cache: "OrderedDict[Tuple[int, str, str, int, bool], Optional[QImage]]" = OrderedDict()
+_cache_bytes = 0
+# id(zip_data) -> [zip_data, キャッシュ中の画像数]
+# キャッシュ登録中に zip_data が解放されて id が再利用されないよう参照を保持する
+_zip_refs: Dict[int, list] = {}
+# キャッシュ・_zip_refs・_cleared を保護する
+_lock = threading.Lock()
+# clear()の呼び出し回数。デコード中にclear()されたかの判定に使う
+_cleared = 0
+
+
+def get_image(zip_dat, cat: str, fname: str, scale: int = 100, flip: bool = False) -> Optional[QImage]:
+    """
+    デコード済みのパーツ画像を取得する
+
+    初回のみPNGをデコード(および縮尺・反転)し、以降はキャッシュ済みのQImageを返す。
+
+    Args:
+        zip_dat: load_image()で読み込んだ画像データ辞書
+        cat: パーツカテゴリ(「目」「口」など)
+        fname: ファイル名
+        scale: 縮尺パーセント
+        flip: 左右反転フラグ
+
+    Returns:
+        QImage(Format_ARGB32_Premultiplied)。デコードできない場合はNone
+    """
+    key = (id(zip_dat), cat, fname, scale, flip)
+    with _lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            return _image_cache[key]
+        cleared = _cleared
+
+    if scale == 100 and not flip:
+        image = _decode(zip_dat, cat, fname)
+    else:
+        image = get_image(zip_dat, cat, fname)
+        if image is not None:
+            image = _transform(image, scale, flip)
+
+    _store(key, zip_dat, image, cleared)
+    return image
+
+
+def clear(zip_dat=None) -> None:
+    """
+    キャッシュを破棄する
+
+    Args:
+        zip_dat: 指定した場合はそのzip_dataのキャッシュのみ破棄する。
+                 Noneの場合は全て破棄する。
+    """
+    global _cache_bytes, _cleared
+    with _lock:
+        _cleared += 1
+        if zip_dat is None:
+            _image_cache.clear()
+            _zip_refs.clear()
+            _cache_bytes = 0
+            return
+
+        zip_id = id(zip_dat)
+        for key in [k for k in _image_cache if k[0] == zip_id]:
+            _cache_bytes -= _size(_image_cache.pop(key))
+        _zip_refs.pop(zip_id, None)
+
+
+#
+# private function
+#
+def _store(key, zip_dat, image: Optional[QImage], cleared: int) -> None:
+    """
+    キャッシュに登録し、上限を超えたら最近使われていない画像から破棄する
+
+    デコードを始めた時(_clearedがclearedの時)からclear()された場合は登録しない。
+    """
+    global _cache_bytes
+    with _lock:
+        if key in _image_cache or cleared != _cleared:
+            return
+        ref = _zip_refs.setdefault(key[0], [zip_dat, 0])
+        ref[1] += 1
+        _image_cache[key] = image
+        _cache_bytes += _size(image)
+
+        while _cache_bytes > MAX_CACHE_BYTES and len(_image_cache) > 1:
+            old_key, old_image = _image_cache.popitem(last=False)
+            _cache_bytes -= _size(old_image)
+            ref = _zip_refs.get(old_key[0])
+            if ref is not None:
+                ref[1] -= 1
+                if ref[1] <= 0:
+                    del _zip_refs[old_key[0]]
+
+
+def _size(image: Optional[QImage]) -> int:
+    """画素データのサイズ(バイト)"""
+    return image.sizeInBytes() if image is not None else 0
+
+
+def _decode(zip_dat, cat: str, fname: str) -> Optional[QImage]:
+    """PNGをデコードする"""
+    members = zip_dat[cat]
+
+    # コンパイル済みバンドルはデコード済みの画素データを持っている
+    if hasattr(members, "decode"):
+        return members.decode(fname)
+
+    png_dat = members[fname]
+
+    image = QImage()
+    if not image.loadFromData(png_dat):
+        logger.warning(f"画像のデコードに失敗しました: {cat}/{fname}")
+        return None
+
+    # 描画時の変換を避けるため premultiplied 形式に揃えておく
+    return image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+
+def _transform(image: QImage, scale: int, flip: bool) -> QImage:
+    """縮尺・左右反転した画像を作成する"""
+    if flip:
+        image = image.flipped(Qt.Horizontal)
+
+    if scale != 100:
+        new_width = max(1, int(image.width() * scale / 100))
+        new_height = max(1, int(image.height() * scale / 100))
+        image = image.scaled(new_width, new_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    return image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
@@ -2,7 +2,10 @@ import logging
 import io
 import os
 import sys
+import mmap
+import threading
 from collections import defaultdict
+from collections.abc import Mapping
 import zipfile
 import urllib.request
 import base64
@@ -11,6 +14,9 @@ from pathlib import Path
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# パーツカテゴリ
+PARTS_FOLDER = ['後', '体', '顔', '髪', '口', '目', '眉', '服下', '服上', '全', '他']
+
 
 def load_image(source, speaker_id=None):
     """
@@ -28,7 +34,7 @@ def load_image(source, speaker_id=None):
         dict: パーツカテゴリ別の画像データ辞書
     """
     
-    parts_folder = ['後', '体', '顔', '髪', '口', '目', '眉', '服下', '服上', '全', '他']
+    parts_folder = PARTS_FOLDER
 
     # 1. 空文字列 → VOICEVOXのポートレート
     if source == "portrait":
@@ -43,8 +49,12 @@ def load_image(source, speaker_id=None):
     if os.path.isdir(source):
         return _load_folder(source, parts_folder)
     
-    # 4. ローカルZIPファイル → 既存の処理
+    # 4. ローカルZIPファイル → コンパイル済みバンドル(自動書き出しが有効なら作成)、無ければ既存の処理
     if source.lower().endswith(".zip"):
+        from pvv_mcp_server.avatar.mod_asset_bundle import load_or_compile
+        zip_data = load_or_compile(source)
+        if zip_data is not None:
+            return zip_data
         return _load_local_zip(source, parts_folder)
     
     # 不明な形式
@@ -52,6 +62,22 @@ def load_image(source, speaker_id=None):
     return _create_empty_zip_data()
 
 
+def close_image(zip_data):
+    """
+    画像データが開いているファイル(メモリマップしたZIP・バンドル)を閉じる
+
+    閉じた後の画像データは読み出せない。
+    Windowsではファイルを開いている間は上書き・削除できないため、不要になったら呼び出すこと。
+
+    Args:
+        zip_data: load_image()で読み込んだ画像データ辞書
+    """
+    for members in zip_data.values():
+        close = getattr(members, "close", None)
+        if close is not None:
+            close()
+
+
 def _load_folder(source, parts_folder):
     """指定フォルダ配下のPNGファイルを再帰的に読み込む"""
     
@@ -104,31 +130,35 @@ def _load_folder(source, parts_folder):
 
 
 def _load_local_zip(zip_path, parts_folder):
-    """ローカルZIPファイルを読み込む"""
+    """
+    ローカルZIPファイルを読み込む
+
+    ZIPファイルはメモリマップし、中央ディレクトリだけを読んでカテゴリ別に索引する。
+    PNGの中身は画像が実際に使われた時点で読み出す。
+    """
     try:
-        with open(zip_path, "rb") as f:
-            zip_bytes = f.read()
+        archive = _MappedZip(zip_path)
 
-        # メモリ上で展開
-        zip_buffer = io.BytesIO(zip_bytes)
         zip_data = defaultdict(dict)
-        with zipfile.ZipFile(zip_buffer, 'r', metadata_encoding='cp932') as zf:
-            for info in zf.infolist():
-                with zf.open(info) as file:
-                    if not info.filename.endswith(".png"):
-                        continue
-                    parts = info.filename.split("/")
-                    if len(parts) >= 3:
-                        file_content_bytes = file.read()
-                        cat = parts[-2]  # 「口」「他」などのカテゴリ
-                        if cat not in parts_folder:
-                            logger.info(f"ZIPファイル: {info.filename}")
-                            if cat == "服下":
-                                cat = "後"
-                            else:
-                                cat = "他"
-                        fname = parts[-1]  # ファイル名
-                        zip_data[cat][fname] = file_content_bytes
+        if not any(info.filename.endswith(".png") for info in archive.infolist()):
+            # 読み出す画像が無いZIPは開いたままにしない
+            archive.close()
+        for info in archive.infolist():
+            if not info.filename.endswith(".png"):
+                continue
+            parts = info.filename.split("/")
+            if len(parts) >= 3:
+                cat = parts[-2]  # 「口」「他」などのカテゴリ
+                if cat not in parts_folder:
+                    logger.info(f"ZIPファイル: {info.filename}")
+                    if cat == "服下":
+                        cat = "後"
+                    else:
+                        cat = "他"
+                fname = parts[-1]  # ファイル名
+                if not isinstance(zip_data[cat], _LazyZipMembers):
+                    zip_data[cat] = _LazyZipMembers(archive)
+                zip_data[cat].add(fname, info)
 
         logger.info(f"ローカルZIPファイルを読み込みました: {zip_path}")
         return zip_data
@@ -138,6 +168,86 @@ def _load_local_zip(zip_path, parts_folder):
         return _create_empty_zip_data()
 
 
+class _MappedFile(io.RawIOBase):
+    """mmapをZipFileから読めるファイルオブジェクトとして扱うラッパー"""
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buf):
+        data = self._mapped.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        self._mapped.seek(pos, whence)
+        return self._mapped.tell()
+
+    def tell(self):
+        return self._mapped.tell()
+
+
+class _MappedZip:
+    """メモリマップしたZIPファイル"""
+
+    def __init__(self, zip_path):
+        with open(zip_path, "rb") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # 中央ディレクトリはここで一度だけ読まれる
+        try:
+            self._zf = zipfile.ZipFile(_MappedFile(self._mapped), 'r', metadata_encoding='cp932')
+        except Exception:
+            self._mapped.close()
+            raise
+        # ZipFileは読み出し位置を共有するため、複数スレッドからの読み出しを直列化する
+        self._lock = threading.Lock()
+
+    def close(self):
+        """ZIPファイルを閉じる(複数回呼び出してもよい)"""
+        with self._lock:
+            self._zf.close()
+            self._mapped.close()
+
+    def infolist(self):
+        return self._zf.infolist()
+
+    def read(self, info):
+        with self._lock:
+            return self._zf.read(info)
+
+
+class _LazyZipMembers(Mapping):
+    """カテゴリ内のファイル名 -> PNGバイナリ。PNGはアクセスされる度にZIPから読み出す"""
+
+    def __init__(self, archive):
+        self._archive = archive
+        self._infos = {}
+
+    def add(self, fname, info):
+        self._infos[fname] = info
+
+    def close(self):
+        self._archive.close()
+
+    def __getitem__(self, fname):
+        return self._archive.read(self._infos[fname])
+
+    def __iter__(self):
+        return iter(self._infos)
+
+    def __len__(self):
+        return len(self._infos)
+
+    def __contains__(self, fname):
+        return fname in self._infos
+
+
 def _load_zip_from_url(url, parts_folder):
     """URLからZIPファイルをダウンロードして読み込む"""
     try:
@@ -262,7 +372,7 @@ def _load_voicevox_portrait(speaker_id: str):
 
 def _create_empty_zip_data():
     """空のzip_dataを作成"""
-    parts_folder = ['後', '体', '顔', '髪', '口', '目', '眉', '服下', '服上', '全', '他']
+    parts_folder = PARTS_FOLDER
 
     zip_data = defaultdict(dict)
     
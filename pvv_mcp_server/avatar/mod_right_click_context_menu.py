@@ -16,11 +16,12 @@ logger = logging.getLogger(__name__)
 def _show_dialog_debug(self, anime_type):
     """デバッグ用: ダイアログ表示"""
     logger.info(f"========== 編集クリック: anime_type={anime_type} ==========")
-    logger.info(f"self.dialogs.keys() = {list(self.dialogs.keys())}")
+    logger.info(f"self.animes.keys() = {list(self.animes.keys())}")
     self.set_anime_type(anime_type)
-    if anime_type in self.dialogs:
+    if anime_type in self.animes:
         try:
-            dialog = self.dialogs[anime_type]
+            # 編集ダイアログは初回の「編集」で作成する
+            dialog = self.open_editor(anime_type)
             # logger.info(f"ダイアログ取得成功: {dialog}")
             # logger.info(f"show()前 isVisible() = {dialog.isVisible()}")
             # logger.info(f"show()前 geometry = {dialog.geometry()}")
@@ -197,14 +198,14 @@ def right_click_context_menu(self, mouse_position: QPoint) -> None:
     
     follow_on_action = QAction("ON", self)
     follow_on_action.setCheckable(True)
-    follow_on_action.setChecked(self.follow_timer.isActive())
-    follow_on_action.triggered.connect(lambda: self.follow_timer.start())
+    follow_on_action.setChecked(self.follow_enabled)
+    follow_on_action.triggered.connect(lambda: self.set_follow(True))
     follow_menu.addAction(follow_on_action)
     
     follow_off_action = QAction("OFF", self)
     follow_off_action.setCheckable(True)
-    follow_off_action.setChecked(not self.follow_timer.isActive())
-    follow_off_action.triggered.connect(lambda: self.follow_timer.stop())
+    follow_off_action.setChecked(not self.follow_enabled)
+    follow_off_action.triggered.connect(lambda: self.set_follow(False))
     follow_menu.addAction(follow_off_action)
     
     menu.addSeparator()
@@ -1,32 +1,34 @@
-from PySide6.QtGui import QPixmap, QImage
-from PySide6.QtCore import Qt
-from io import BytesIO
-from PIL import Image
-import zipfile
-import sys
 import logging
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
-def update_frame(self):
+def update_frame(self, changed=None):
     """
     フレームを更新(画像合成)
     
     Args:
         self: AvatarWindowのインスタンス
+        changed: 表示画像が変わったパーツのリスト(スケジューラから呼ばれた場合)。
+                 Noneの場合は現在のアニメーションを進める
     """
     if not self.zip_data:
         return
     
-    # 現在のアニメタイプのダイアログを取得
-    dialog = self.dialogs.get(self.anime_type)
-    if not dialog:
+    # 現在のアニメタイプのアニメーション状態を取得
+    anime = self.animes.get(self.anime_type)
+    if not anime:
         return
     
     try:
-        dialog.update_frame()
-        pixmap = dialog.get_current_pixmap()
+        anime.update_frame(changed)
+
+        # 表示中のフレームから変化が無ければ再描画・リサイズしない
+        frame_version = (anime, anime.frame_version)
+        if frame_version == self.shown_frame_version:
+            return
+
+        pixmap = anime.get_current_pixmap()
 
         if not pixmap:
             logger.warning("daialog preview pixmap none.")
@@ -36,6 +38,7 @@ def update_frame(self):
         self.label.setPixmap(pixmap)
         self.label.adjustSize()
         self.adjustSize()
+        self.shown_frame_version = frame_version
         
     except Exception as e:
         logger.warning(f"フレーム更新エラー: {e}")
@@ -0,0 +1,379 @@
+"""
+mod_window_backend.py
+追随対象ウィンドウを探し、位置・サイズを取得するバックエンド
+
+プラットフォーム毎の実装を同じインターフェース(WindowBackend)で扱う。
+  - WindowsWindowBackend: pygetwindow + モニタ毎のDPIスケール(ポーリング)
+  - X11WindowBackend: python-xlib。EWMH対応のウィンドウマネージャなら
+                      ConfigureNotify/PropertyNotifyイベントで変化を受け取る(ポーリング不要)
+  - FakeWindowBackend: メモリ上の仮想ウィンドウ(テスト・ベンチマーク用)
+対応していない環境ではget_backend()がNoneを返し、位置追随は1回の警告で無効になる。
+"""
+
+import abc
+import ctypes
+import itertools
+import os
+import sys
+import logging
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+# グローバル変数
+_backend = None
+_backend_selected = False
+_dpi_cache = {}  # モニタハンドル -> DPIスケール
+_dpi_aware = False
+
+
+class WindowBackend(abc.ABC):
+    """ウィンドウ追跡バックエンドのインターフェース"""
+
+    # watch()でウィンドウの変化を通知できるか
+    supports_events = False
+
+    @abc.abstractmethod
+    def find_window(self, title):
+        """
+        タイトルにtitleを含むウィンドウを探す
+
+        Returns:
+            ウィンドウ(バックエンド毎のハンドル)。見つからなければNone
+        """
+
+    @abc.abstractmethod
+    def get_title(self, window) -> str:
+        """ウィンドウの現在のタイトルを返す(ウィンドウが無くなっていれば例外)"""
+
+    @abc.abstractmethod
+    def get_geometry(self, window):
+        """
+        ウィンドウの位置・サイズを返す(ウィンドウが無くなっていれば例外)
+
+        Returns:
+            (x, y, width, height) Qtの座標系
+        """
+
+    def watch(self, window, callback) -> bool:
+        """
+        ウィンドウの移動・リサイズ・タイトル変更・破棄をcallback(window)で通知する
+
+        Returns:
+            通知できる場合True。Falseなら呼び出し側でポーリングする
+        """
+        return False
+
+    def unwatch(self, window) -> None:
+        """watch()した通知を解除する"""
+
+    def display_changed(self) -> None:
+        """ディスプレイ構成・DPIが変わった時に呼ばれる"""
+
+
+#
+# Windows
+#
+def get_monitor_scaling(hwnd) -> float:
+    """
+    ウィンドウがあるモニタのDPIスケール(例: 1.25, 1.5)を返す(Per-Monitor v2対応)
+
+    Args:
+        hwnd: ウィンドウハンドル
+
+    Returns:
+        DPIスケール。取得できない場合は1.0
+    """
+    global _dpi_aware
+    try:
+        user32 = ctypes.windll.user32
+        shcore = ctypes.windll.shcore
+
+        # Windows 10 以降: Per-Monitor v2 DPI対応(プロセスで1回だけ設定)
+        if not _dpi_aware:
+            user32.SetProcessDpiAwarenessContext(-4)  # DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2
+            _dpi_aware = True
+
+        monitor = user32.MonitorFromWindow(hwnd, 1)  # MONITOR_DEFAULTTONEAREST
+        scale = _dpi_cache.get(monitor)
+        if scale is None:
+            # モニタのDPIを取得
+            dpiX = ctypes.c_uint()
+            dpiY = ctypes.c_uint()
+            shcore.GetDpiForMonitor(monitor, 0, ctypes.byref(dpiX), ctypes.byref(dpiY))
+            scale = dpiX.value / 96.0  # 96 DPI = 100%
+            _dpi_cache[monitor] = scale
+        return scale
+
+    except Exception as e:
+        logger.warning(f"Failed to get DPI scaling: {e}")
+        return 1.0
+
+
+def clear_dpi_cache() -> None:
+    """ディスプレイ構成・DPIが変わった時にDPIスケールのキャッシュを破棄する"""
+    logger.info("display changed. clear dpi cache.")
+    _dpi_cache.clear()
+
+
+class WindowsWindowBackend(WindowBackend):
+    """pygetwindowによるWindows用バックエンド(ポーリング)"""
+
+    def __init__(self):
+        # pygetwindowはWindows以外ではimportできないため、ここで読み込む
+        import pygetwindow
+        self.gw = pygetwindow
+
+    def find_window(self, title):
+        windows = self.gw.getWindowsWithTitle(title)
+        # 最初に見つかったウィンドウを使用
+        return windows[0] if windows else None
+
+    def get_title(self, window) -> str:
+        return window.title
+
+    def get_geometry(self, window):
+        # Qtは実ピクセル座標なので、pygetwindowの論理座標を / scale で補正
+        scale = get_monitor_scaling(getattr(window, "_hWnd", 0))
+        return (int(window.left / scale), int(window.top / scale),
+                int(window.width / scale), int(window.height / scale))
+
+    def display_changed(self) -> None:
+        clear_dpi_cache()
+
+
+#
+# X11
+#
+class X11WindowBackend(WindowBackend):
+    """python-xlibによるX11用バックエンド"""
+
+    def __init__(self, display=None):
+        """
+        Args:
+            display: Xlib.display.Display。Noneなら$DISPLAYに接続する
+        """
+        # python-xlibはLinuxでのみ必要なため、ここで読み込む
+        from Xlib import X, Xatom
+        from Xlib import display as xdisplay
+        self.X = X
+        self.display = display or xdisplay.Display()
+        self.root = self.display.screen().root
+
+        self._atom_client_list = self.display.intern_atom("_NET_CLIENT_LIST")
+        self._atom_wm_name = self.display.intern_atom("_NET_WM_NAME")
+        self._atom_utf8 = self.display.intern_atom("UTF8_STRING")
+        self._atom_string = Xatom.STRING
+        self._atom_legacy_name = Xatom.WM_NAME
+        self._callbacks = {}  # ウィンドウID -> (ウィンドウ, callback)
+
+        # EWMH対応のウィンドウマネージャなら、トップレベルウィンドウの一覧とイベントが使える
+        supported = self.root.get_full_property(self.display.intern_atom("_NET_SUPPORTED"), X.AnyPropertyType)
+        self.supports_events = bool(supported) and self._atom_client_list in supported.value
+        logger.info(f"X11 window backend: events={self.supports_events}")
+
+        self._notifier = None
+        if self.supports_events:
+            # Xサーバからのイベントは、Qtのイベントループで受け取る
+            from PySide6.QtCore import QSocketNotifier
+            self._notifier = QSocketNotifier(self.display.fileno(), QSocketNotifier.Read)
+            self._notifier.activated.connect(self._process_events)
+
+    def find_window(self, title):
+        for window in self._top_level_windows():
+            try:
+                if title in self.get_title(window):
+                    return window
+            except Exception:
+                # 列挙中に閉じられたウィンドウ
+                continue
+        return None
+
+    def get_title(self, window) -> str:
+        prop = window.get_full_property(self._atom_wm_name, self._atom_utf8)
+        if prop is None:
+            prop = window.get_full_property(self._atom_legacy_name, self._atom_string)
+        if prop is None:
+            return ""
+        value = prop.value
+        return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+
+    def get_geometry(self, window):
+        geometry = window.get_geometry()
+        # ウィンドウの原点をルートウィンドウ(画面)の座標に変換
+        origin = self.root.translate_coords(window, 0, 0)
+
+        # Xは実ピクセル座標なので、Qtの論理座標に補正
+        scale = self._device_pixel_ratio()
+        return (int(origin.x / scale), int(origin.y / scale),
+                int(geometry.width / scale), int(geometry.height / scale))
+
+    def watch(self, window, callback) -> bool:
+        if not self.supports_events:
+            return False
+        # 移動・リサイズ・破棄(StructureNotify)とタイトル変更(PropertyChange)を受け取る
+        window.change_attributes(event_mask=self.X.StructureNotifyMask | self.X.PropertyChangeMask)
+        self.display.flush()
+        self._callbacks[window.id] = (window, callback)
+        return True
+
+    def unwatch(self, window) -> None:
+        if self._callbacks.pop(window.id, None) is None:
+            return
+        try:
+            window.change_attributes(event_mask=self.X.NoEventMask)
+            self.display.flush()
+        except Exception:
+            # 既に破棄されたウィンドウ
+            pass
+
+    #
+    # private function
+    #
+    def _top_level_windows(self):
+        """トップレベルウィンドウを列挙する"""
+        if self.supports_events:
+            prop = self.root.get_full_property(self._atom_client_list, self.X.AnyPropertyType)
+            if prop is not None:
+                return [self.display.create_resource_object("window", wid) for wid in prop.value]
+        return self.root.query_tree().children
+
+    def _process_events(self, *args):
+        """受信済みのXイベントを処理し、監視中のウィンドウの変化を通知する"""
+        X = self.X
+        notified = set()
+        while self.display.pending_events():
+            event = self.display.next_event()
+            window = getattr(event, "window", None)
+            if window is None or window.id not in self._callbacks or window.id in notified:
+                continue
+            if event.type == X.PropertyNotify and event.atom not in (self._atom_wm_name, self._atom_legacy_name):
+                continue
+            if event.type in (X.ConfigureNotify, X.PropertyNotify, X.DestroyNotify, X.UnmapNotify):
+                notified.add(window.id)
+
+        for wid in notified:
+            entry = self._callbacks.get(wid)
+            if entry is not None:
+                entry[1](entry[0])
+
+    def _device_pixel_ratio(self) -> float:
+        from PySide6.QtGui import QGuiApplication
+        screen = QGuiApplication.primaryScreen()
+        return screen.devicePixelRatio() if screen is not None else 1.0
+
+
+#
+# Fake
+#
+class FakeWindowBackend(WindowBackend):
+    """メモリ上の仮想ウィンドウを扱うバックエンド(テスト・ベンチマーク用)"""
+
+    def __init__(self, supports_events=True):
+        """
+        Args:
+            supports_events: Falseならwatch()せず、ポーリングで追跡させる
+        """
+        self.supports_events = supports_events
+        self.windows = {}  # ハンドル -> [タイトル, (x, y, width, height)]
+        self.find_count = 0  # find_window()(ウィンドウ列挙)の呼び出し回数
+        self.read_count = 0  # get_geometry()の呼び出し回数
+        self._callbacks = {}
+        self._handles = itertools.count(1)
+
+    def add_window(self, title, geometry):
+        """仮想ウィンドウを作成し、ハンドルを返す"""
+        handle = next(self._handles)
+        self.windows[handle] = [title, tuple(geometry)]
+        return handle
+
+    def move_window(self, handle, geometry):
+        """仮想ウィンドウを移動・リサイズする"""
+        self.windows[handle][1] = tuple(geometry)
+        self._notify(handle)
+
+    def set_title(self, handle, title):
+        """仮想ウィンドウのタイトルを変更する"""
+        self.windows[handle][0] = title
+        self._notify(handle)
+
+    def close_window(self, handle):
+        """仮想ウィンドウを閉じる"""
+        del self.windows[handle]
+        self._notify(handle)
+
+    def find_window(self, title):
+        self.find_count += 1
+        for handle, (window_title, _) in self.windows.items():
+            if title in window_title:
+                return handle
+        return None
+
+    def get_title(self, window) -> str:
+        return self.windows[window][0]
+
+    def get_geometry(self, window):
+        self.read_count += 1
+        return self.windows[window][1]
+
+    def watch(self, window, callback) -> bool:
+        if not self.supports_events:
+            return False
+        self._callbacks[window] = callback
+        return True
+
+    def unwatch(self, window) -> None:
+        self._callbacks.pop(window, None)
+
+    def _notify(self, handle):
+        callback = self._callbacks.get(handle)
+        if callback is not None:
+            callback(handle)
+
+
+#
+# backend selection
+#
+def get_backend():
+    """
+    この環境で使うバックエンドを取得する(初回に1回だけ選択する)
+
+    Returns:
+        WindowBackend。位置追随に対応していない環境ではNone
+    """
+    global _backend, _backend_selected
+    if not _backend_selected:
+        _backend = _create_backend()
+        _backend_selected = True
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """
+    使用するバックエンドを設定する(テスト・ベンチマーク用)
+
+    Args:
+        backend: WindowBackend。Noneなら位置追随を無効にする
+    """
+    global _backend, _backend_selected
+    _backend = backend
+    _backend_selected = True
+
+
+#
+# private function
+#
+def _create_backend():
+    """プラットフォームに応じたバックエンドを作成する"""
+    try:
+        if sys.platform == "win32":
+            return WindowsWindowBackend()
+        if os.environ.get("DISPLAY"):
+            return X11WindowBackend()
+    except Exception as e:
+        logger.warning(f"window following is disabled: {e}")
+        return None
+
+    logger.warning(f"window following is not supported on this platform: {sys.platform}")
+    return None
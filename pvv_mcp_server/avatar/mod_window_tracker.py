@@ -0,0 +1,203 @@
+"""
+mod_window_tracker.py
+追随対象ウィンドウの追跡
+
+追随対象のウィンドウタイトル毎に1つのトラッカーを全アバターで共有する。
+見つけたウィンドウはキャッシュし、見失った時だけウィンドウを列挙し直す。
+見つからない間の列挙は FIND_INTERVAL 秒に1回までに抑える。
+ウィンドウの位置・サイズが変わった時だけ、購読しているアバターに通知する。
+ウィンドウの検索・位置の取得はプラットフォーム毎のバックエンド(mod_window_backend)が行い、
+変化をイベントで通知できるバックエンドでは、イベントが来るまでウィンドウを読み直さない。
+"""
+
+from PySide6.QtGui import QGuiApplication
+
+import pvv_mcp_server.avatar.mod_window_backend
+import logging
+import time
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+# 追随対象ウィンドウが見つからない間、ウィンドウを列挙し直す間隔(秒)
+FIND_INTERVAL = 1.0
+
+# グローバル変数
+_trackers = {}  # ウィンドウタイトル -> WindowTracker
+_display_signals_connected = False
+
+
+class WindowTracker:
+    """追随対象ウィンドウのトラッカー"""
+
+    def __init__(self, title, backend, clock=time.monotonic):
+        """
+        Args:
+            title: 追随対象アプリケーションのウィンドウタイトル
+            backend: WindowBackend。Noneなら位置追随に対応していない
+            clock: 現在時刻(秒)を返す関数(テスト用)
+        """
+        self.title = title
+        self.backend = backend
+        self.clock = clock
+        self.window = None  # 見つけたウィンドウ(見失ったらNone)
+        self.geometry = None  # (x, y, width, height) Qtの座標系。見つからなければNone
+        self.subscribers = []
+        # バックエンドがウィンドウの変化を通知する場合、通知が来るまで読み直さない
+        self.watching = False
+        self._dirty = True
+        # ウィンドウが見つからなかった時、次に列挙し直す時刻
+        self._next_find = None
+
+    @property
+    def supported(self):
+        """この環境で位置追随ができるか"""
+        return self.backend is not None
+
+    def subscribe(self, avatar):
+        """ウィンドウの位置・サイズの変化を通知するアバターを登録する"""
+        if avatar not in self.subscribers:
+            self.subscribers.append(avatar)
+
+    def unsubscribe(self, avatar):
+        """通知先のアバターを解除する"""
+        if avatar in self.subscribers:
+            self.subscribers.remove(avatar)
+
+    def poll(self):
+        """
+        ウィンドウの位置・サイズを確認し、変わっていれば購読中のアバターに通知する
+
+        Returns:
+            (x, y, width, height)。ウィンドウが見つからなければNone
+        """
+        if self.backend is None:
+            return None
+
+        # 通知待ちのウィンドウは変わっていない
+        if self.watching and not self._dirty:
+            return self.geometry
+        self._dirty = False
+
+        geometry = self._read_geometry()
+        if geometry == self.geometry:
+            return geometry
+
+        self.geometry = geometry
+        if geometry is None:
+            logger.warning(f"Window with title '{self.title}' not found")
+            return None
+
+        for avatar in list(self.subscribers):
+            avatar.on_target_moved(geometry)
+        return geometry
+
+    def release(self):
+        """ウィンドウの変化の通知を解除する"""
+        if self.watching:
+            self.backend.unwatch(self.window)
+            self.watching = False
+
+    #
+    # private function
+    #
+    def _read_geometry(self):
+        """キャッシュしたウィンドウの位置・サイズを読む。見失った場合は1回だけ探し直す"""
+        for _ in range(2):
+            if self.window is None:
+                now = self.clock()
+                if self._next_find is not None and now < self._next_find:
+                    return None
+                self.window = self._find_window()
+                if self.window is None:
+                    self._next_find = now + FIND_INTERVAL
+                    return None
+                self._next_find = None
+                self.watching = self.backend.watch(self.window, self._on_window_changed)
+
+            try:
+                window = self.window
+                title = self.backend.get_title(window)
+                if self.title not in title:
+                    raise LookupError(f"title changed: {title}")
+                return self.backend.get_geometry(window)
+
+            except Exception as e:
+                # ウィンドウを見失った: 列挙し直す
+                logger.info(f"lost window '{self.title}': {e}")
+                self.release()
+                self.window = None
+
+        return None
+
+    def _find_window(self):
+        """タイトルでウィンドウを検索する(全ウィンドウを列挙する)"""
+        try:
+            return self.backend.find_window(self.title)
+        except Exception as e:
+            logger.warning(f"Failed to find window: {e}")
+            return None
+
+    def _on_window_changed(self, window):
+        """バックエンドからの通知: ウィンドウが移動・リサイズ・タイトル変更・破棄された"""
+        if window != self.window:
+            return
+        self._dirty = True
+        self.poll()
+
+
+def get_tracker(title) -> WindowTracker:
+    """
+    ウィンドウタイトルに対応する共有のトラッカーを取得する
+
+    Args:
+        title: 追随対象アプリケーションのウィンドウタイトル
+
+    Returns:
+        WindowTracker
+    """
+    _connect_display_signals()
+
+    tracker = _trackers.get(title)
+    if tracker is None:
+        backend = pvv_mcp_server.avatar.mod_window_backend.get_backend()
+        tracker = WindowTracker(title, backend)
+        _trackers[title] = tracker
+    return tracker
+
+
+def clear() -> None:
+    """全てのトラッカーを破棄する(バックエンドを切り替えた時など)"""
+    for tracker in _trackers.values():
+        tracker.release()
+    _trackers.clear()
+
+
+#
+# private function
+#
+def _display_changed():
+    """ディスプレイ構成・DPIが変わった: バックエンドのキャッシュを破棄し、位置を読み直す"""
+    backend = pvv_mcp_server.avatar.mod_window_backend.get_backend()
+    if backend is not None:
+        backend.display_changed()
+    for tracker in _trackers.values():
+        tracker._dirty = True
+
+
+def _connect_display_signals():
+    """ディスプレイ構成・DPIの変更をバックエンドに通知する"""
+    global _display_signals_connected
+    app = QGuiApplication.instance()
+    if _display_signals_connected or app is None:
+        return
+
+    def connect_screen(screen):
+        screen.logicalDotsPerInchChanged.connect(lambda dpi: _display_changed())
+
+    for screen in app.screens():
+        connect_screen(screen)
+    app.screenAdded.connect(lambda screen: (connect_screen(screen), _display_changed()))
+    app.screenRemoved.connect(lambda screen: _display_changed())
+    _display_signals_connected = True
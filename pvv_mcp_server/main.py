@@ -7,11 +7,11 @@ MCPサーバを起動し、コマンドライン引数を処理する
 import argparse
 import sys
 import logging
-import yaml
 import os
 from importlib.metadata import version, PackageNotFoundError
 
 from pvv_mcp_server import mod_service
+from pvv_mcp_server import mod_config
 
 #
 # global setting.
@@ -43,6 +43,29 @@ def get_version():
         return "development"
 
 
+def compile_avatar(zip_paths):
+    """
+    アバター画像ZIPをコンパイル済みバンドルに変換する
+
+    Args:
+        zip_paths: ZIPファイルパスのリスト
+
+    Returns:
+        int: 終了コード。全て成功した場合0
+    """
+    from pvv_mcp_server.avatar.mod_asset_bundle import compile_bundle
+
+    ret = 0
+    for zip_path in zip_paths:
+        if not os.path.exists(zip_path):
+            logging.error(f"ZIPファイルが存在しません。{zip_path}")
+            ret = 1
+            continue
+        if not compile_bundle(zip_path):
+            ret = 1
+    return ret
+
+
 #
 # main
 #
@@ -63,33 +86,38 @@ def main():
     parser.add_argument(
         "-y", "--yaml",
         type=str,
-        required=True,
         help="設定用の YAML ファイルパスを指定"
     )
+    parser.add_argument(
+        "-w", "--watch",
+        action="store_true",
+        help="YAML ファイルの変更を監視し、再起動せずに設定を反映する"
+    )
+    parser.add_argument(
+        "--compile-avatar",
+        type=str,
+        nargs="+",
+        metavar="ZIP",
+        help="アバター画像ZIPをコンパイル済みバンドルに変換して終了"
+    )
 
     args = parser.parse_args()
 
+    if args.compile_avatar:
+        sys.exit(compile_avatar(args.compile_avatar))
+
+    if not args.yaml:
+        parser.error("the following arguments are required: -y/--yaml")
+
     if not os.path.exists(args.yaml):
         logging.error(f"YAMLファイルが存在しません。{args.yaml} {e}")
         sys.exit(1)
 
 
     try:
-        config = {}
-        with open(args.yaml, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f) or {}
-
-        logging.info(f"YAML設定を読み込みました: {args.yaml}")
-
-        avatar_dict = config.get("avatar", {})
-        save_file = avatar_dict.get("save_file")
-        if save_file == "default":
-            basedir = os.path.dirname(os.path.abspath(args.yaml))
-            dat_file = os.path.join(basedir, "pvv-mcp-server.avatar.json")
-            config["avatar"]["save_file"] = dat_file
-            logging.info(f"Avatar DATファイル: {dat_file}")
+        config = mod_config.load_config(args.yaml)
 
-        mod_service.start(config)
+        mod_service.start(config, watch_file=args.yaml if args.watch else None)
 
     except Exception as e:
         logging.error(f"不明な例外が発生しました。{e}")
@@ -9,14 +9,19 @@ import os
 import logging
 import atexit
 import signal
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 from PySide6.QtCore import QMetaObject, Qt, QTimer
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Q_ARG, Q_RETURN_ARG
 
 from pvv_mcp_server.mod_speaker_info import speaker_info
+from pvv_mcp_server import mod_avatar_state
 from pvv_mcp_server.avatar.mod_avatar import AvatarWindow
+from pvv_mcp_server.avatar import mod_avatar_layout
+from pvv_mcp_server.avatar import mod_asset_bundle
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -25,8 +30,25 @@ logger = logging.getLogger(__name__)
 # グローバル変数
 _avatar_global_config: Optional[Dict[str, Any]] = None
 _avatars_config: Optional[Dict[int, Any]] = None
-_avatar_cache: Dict[int, Any] = {}
+_avatar_cache: Dict[str, Any] = {}
+_avatar_index: Dict[int, Any] = {}  # style_id -> アバター(set_anime_typeで毎回引くための索引)
 _auto_save_timer: Optional[QTimer] = None
+# 状態ファイルのアバター毎の設定 (アバターID -> デフォルトからの差分)。起動時に1回だけ読み込む
+_avatar_state: Optional[Dict[str, Any]] = None
+# アバター毎の状態ファイルのエントリ (キー -> (アバターID, 設定のデフォルト))
+_state_entries: Dict[str, Any] = {}
+# 保存済みのアバター設定のconfig_revision (キー -> config_revision)。変更が無いアバターは再収集しない
+# 書き込みに成功してから更新するため、保存できなかった設定は次の保存で集め直す
+_saved_revisions: Dict[str, int] = {}
+# ファイルへの書き込みは1本の保存スレッドで順番に行う
+_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="avatar-save")
+
+# 自動保存のデフォルトの待ち時間(ミリ秒)
+DEFAULT_AUTO_SAVE_INTERVAL = 5000
+# set_anime_type()の反映を待つ最大の時間(秒)
+APPLY_TIMEOUT = 1.0
+# アバターのアニメーションキー
+ANIME_TYPES = ["立ち絵", "口パク", "えがお", "びっくり", "がーん", "いかり"]
 
 
 # ==================== Public API ====================
@@ -40,7 +62,11 @@ def setup(avs: Dict[int, Any]) -> None:
             - enabled: アバター機能の有効/無効
             - target: アプリケーション名
             - avatars: style_id毎のアバター設定
-            - auto_save_interval: 自動保存間隔(ミリ秒)。デフォルト5000(5秒)
+            - auto_save_interval: 設定が変わってから自動保存するまでの時間(ミリ秒)。デフォルト5000(5秒)
+            - idle_timeout: 発話・感情表現が無い時にアイドル状態(省電力)にするまでの時間(秒)。デフォルト300
+            - layout: 同じ位置のアバターの並べ方(none, stack, tile, offset)。デフォルトnone(重ねて置く)
+            - layout_offset: layoutがoffsetの場合のずらす量[dx, dy]。デフォルト[40, -40]
+            - compile_bundle: ローカルZIPの初回読み込み時にコンパイル済みバンドルを書き出す。デフォルトFalse
     """
     global _avatar_global_config, _avatars_config
     
@@ -49,6 +75,10 @@ def setup(avs: Dict[int, Any]) -> None:
     
     if _avatar_global_config.get("enabled"):
         logger.info("Avatar enabled. Creating all avatar instances...")
+        mod_avatar_layout.configure(
+            _avatar_global_config.get("layout", mod_avatar_layout.DEFAULT_LAYOUT),
+            _avatar_global_config.get("layout_offset", mod_avatar_layout.DEFAULT_OFFSET))
+        mod_asset_bundle.configure(_avatar_global_config.get("compile_bundle", False))
         _create_all_avatars()
         logger.info(f"Created {len(_avatar_cache)} avatar instance(s).")
         
@@ -58,24 +88,112 @@ def setup(avs: Dict[int, Any]) -> None:
         logger.info("Avatar disabled.")
 
 
-def set_anime_type(style_id: int, anime_type: str) -> None:
+def reload(avs: Dict[int, Any]) -> None:
     """
-    指定されたアバターのアニメーションキーを設定
+    アバター設定を再読み込みする(YAMLの変更を反映する。GUIスレッドで呼び出すこと)
+
+    実行中の設定との差分だけを反映し、画像データは共有のキャッシュから再利用する。
+      - 話者・画像が同じアバターは作り直さず、YAMLで変わった位置・反転・縮尺・表示だけを設定し直す
+        (右クリックメニューなどで変更済みの設定はそのまま)
+      - 追加されたアバターは作成し、削除されたアバターは設定を保存してから破棄する
+      - target, idle_timeout, layout, auto_save_interval は作成済みのアバターにも反映する
+
+    Args:
+        avs: setup()と同じアバター設定の辞書
+    """
+    global _avatar_global_config, _avatars_config
+
+    if _avatar_global_config is None:
+        setup(avs)
+        return
+
+    # 破棄するアバターの設定も残るよう、変更があれば先に保存する
+    if _avatar_global_config.get("enabled"):
+        _on_auto_save()
+
+    old_global = _avatar_global_config
+    old_confs = {key: _avatars_config[style_id] for style_id, key in _config_keys().items()}
+    old_keys = {entry[0]: key for key, entry in _state_entries.items() if key in _avatar_cache}
+
+    _avatar_global_config = avs
+    _avatars_config = (avs.get("avatars") or {}) if avs.get("enabled") else {}
+    _apply_global_config(old_global, avs)
+
+    # アバターIDが同じアバターは設定し直し、新しいアバターは作成する
+    created = 0
+    avatar_ids = _avatar_ids()
+    for style_id, key in _config_keys().items():
+        avatar_id = avatar_ids[key]
+        old_key = old_keys.pop(avatar_id, None)
+        if old_key is None and key in _avatar_cache:
+            # 設定を共有するstyle_id(YAMLのアンカー)は処理済み
+            continue
+
+        try:
+            if old_key is None:
+                _create_avatar(style_id, _avatars_config[style_id], key, avatar_id)
+                created += 1
+            else:
+                _reconfigure_avatar(old_key, key, old_confs[old_key], _avatars_config[style_id])
+        except Exception as e:
+            logger.error(f"Failed to reload avatar for style_id={style_id}: {e}")
+
+    # 設定から無くなったアバターを破棄する(画像データは新しいアバターの作成後に解放する)
+    for old_key in old_keys.values():
+        avatar = _avatar_cache.pop(old_key)
+        _state_entries.pop(old_key, None)
+        _saved_revisions.pop(old_key, None)
+        avatar.dispose()
+
+    _build_avatar_index()
+    logger.info(f"Avatar config reloaded. created={created}, disposed={len(old_keys)}, total={len(_avatar_cache)}")
+
+
+def set_anime_type(style_id: int, anime_type: str) -> Optional[Future]:
+    """
+    指定されたアバターのアニメーションキーを設定(任意のスレッドから呼べる)
+
+    操作はGUIスレッドの次のフレーム更新でまとめて反映される。
     
     Args:
         style_id: スタイルID
         anime_type: アニメーションキー（"立ち絵", "口パク"など）
+
+    Returns:
+        反映・描画が終わると完了するFuture。アバターが無効・見つからない場合はNone
     """
     if not _avatar_global_config or not _avatar_global_config.get("enabled"):
         logger.info("Avatar disabled. Skipping set_anime_type.")
-        return
+        return None
     
     avatar = _get_avatar(style_id)
     if avatar:
-        QMetaObject.invokeMethod(avatar, "showWindow", Qt.ConnectionType.QueuedConnection)
-        QMetaObject.invokeMethod(avatar, "set_anime_type", Qt.ConnectionType.QueuedConnection, Q_ARG(str, anime_type))
-    else:
-        logger.warning(f"Avatar not found for style_id={style_id}")
+        return avatar.post_anime_type(anime_type)
+
+    logger.warning(f"Avatar not found for style_id={style_id}")
+    return None
+
+
+def wait_applied(future: Optional[Future], timeout: float = APPLY_TIMEOUT) -> bool:
+    """
+    set_anime_type()の操作がアバターに反映されるまで待つ
+
+    Args:
+        future: set_anime_type()の戻り値
+        timeout: 最大の待ち時間(秒)
+
+    Returns:
+        反映された場合True。アバターが無効・タイムアウトの場合False
+    """
+    if future is None:
+        return False
+
+    try:
+        future.result(timeout=timeout)
+        return True
+    except Exception as e:
+        logger.warning(f"set_anime_type not applied: {e!r}")
+        return False
 
 
 def save_all_configs() -> Dict[str, Any]:
@@ -121,6 +239,20 @@ def load_all_configs(all_configs: Dict[str, Any]) -> None:
             logger.warning(f"Avatar not found or not YMM type: {key}")
 
 
+def flush() -> None:
+    """
+    未保存の設定があればすぐに保存し、ファイルへの書き込み完了を待つ(終了時に呼び出す)
+    """
+    if _auto_save_timer:
+        _auto_save_timer.stop()
+
+    if _avatar_global_config:
+        _on_auto_save()
+
+    # 保存スレッドに積まれた書き込みが全て終わるまで待つ
+    _save_executor.submit(lambda: None).result()
+
+
 # ==================== Private Functions ====================
 
 #
@@ -128,7 +260,10 @@ def load_all_configs(all_configs: Dict[str, Any]) -> None:
 #
 def _start_auto_save_timer() -> None:
     """
-    自動保存タイマーを開始
+    自動保存タイマーを準備する
+
+    アバターの設定が変わる毎にタイマーを再始動し、変更が落ち着いてから
+    auto_save_interval後に1回だけ保存する。終了時には未保存の設定を保存する。
     """
     global _auto_save_timer
     
@@ -136,96 +271,279 @@ def _start_auto_save_timer() -> None:
     if _auto_save_timer:
         _auto_save_timer.stop()
     
-    # 保存間隔を取得(デフォルト5秒=5000ミリ秒)
-#    interval = _avatar_global_config.get("auto_save_interval", 5000)
-    interval = 50000
+    # 保存までの待ち時間を取得(デフォルト5秒=5000ミリ秒)
+    interval = _avatar_global_config.get("auto_save_interval", DEFAULT_AUTO_SAVE_INTERVAL)
     
     _auto_save_timer = QTimer()
+    _auto_save_timer.setSingleShot(True)
+    _auto_save_timer.setInterval(interval)
     _auto_save_timer.timeout.connect(_on_auto_save)
-    _auto_save_timer.start(interval)
+
+    for avatar in _avatar_cache.values():
+        avatar.config_changed.connect(_on_config_changed)
+
+    # 終了時に未保存の設定を書き出す
+    app = QApplication.instance()
+    if app is not None:
+        app.aboutToQuit.connect(flush)
     
-    logger.info(f"Auto-save timer started. Interval: {interval}ms")
+    logger.info(f"Auto-save timer ready. Interval: {interval}ms")
 
 
-def _on_auto_save() -> None:
+def _on_config_changed() -> None:
+    """
+    アバターの設定が変わった: 自動保存タイマーを(再)始動する
+    """
+    if _auto_save_timer:
+        _auto_save_timer.start()
+
+
+def _on_auto_save() -> Optional[Future]:
     """
     自動保存タイマーのコールバック
+
+    変更があったアバターの設定だけを集め直し、JSONへの変換と書き込みは保存スレッドで行う。
+
+    Returns:
+        書き込みのFuture。保存しなかった場合はNone
     """
-    logger.info("Auto-saving all avatar configs...")
-    configs = save_all_configs()
-    logger.info(f"Auto-saved {len(configs)} avatar config(s).")
-    
-    # ファイルに保存
+    # 保存先が無ければ集めない(保存済みの扱いにしない)
     dat_file = _avatar_global_config.get("save_file", None)
     if not dat_file:
         logger.warning(f"dat_file not configured. Skipping file save.")
-        return
+        return None
 
     if not os.path.exists(dat_file):
         logger.warning(f"dat_file not exists. {dat_file}")
-        return
+        return None
+
+    collected = _collect_changed_configs()
+    if collected is None:
+        logger.debug("No avatar config changed. Skipping auto-save.")
+        return None
+    configs, revisions = collected
+    logger.info(f"Auto-saving {len(configs)} avatar config(s)...")
+
+    # ファイルに保存
+    future = _save_executor.submit(_write_configs, dat_file, configs)
+    future.add_done_callback(lambda f: _mark_saved(f, revisions))
+    return future
+
+
+def _collect_changed_configs() -> Optional[Tuple[Dict[str, Any], Dict[str, int]]]:
+    """
+    前回の保存から設定が変わったアバターの設定を集め直す(GUIスレッドで実行)
+
+    設定はデフォルトからの差分にして、状態ファイルのアバター毎の設定を更新する。
+    今は設定に無いアバターの状態も、状態ファイルに残す。
+
+    Returns:
+        (状態ファイルの全アバターの設定(アバターID -> 差分), 集め直したアバターのconfig_revision(キー -> config_revision))。
+        どのアバターも変わっていなければNone
+    """
+    state = _get_avatar_state()
+    revisions = {}
+    for key, avatar in _avatar_cache.items():
+        entry = _state_entries.get(key)
+        if entry is None:
+            continue
+
+        revision = avatar.config_revision
+        if _saved_revisions.get(key) == revision:
+            continue
+
+        try:
+            avatar_id, defaults = entry
+            state[avatar_id] = mod_avatar_state.encode(avatar.save_config(), defaults)
+            revisions[key] = revision
+        except Exception as e:
+            logger.error(f"Failed to save config for avatar {key}: {e}")
 
+    if not revisions:
+        return None
+    return dict(state), revisions
+
+
+def _mark_saved(future: Future, revisions: Dict[str, int]) -> None:
+    """
+    書き込みに成功したら、集め直したアバターを保存済みにする(書き込みのFutureの完了時)
+
+    Args:
+        future: _write_configs()のFuture
+        revisions: 集め直したアバターのconfig_revision(キー -> config_revision)
+    """
+    if not future.cancelled() and future.exception() is None and future.result():
+        _saved_revisions.update(revisions)
+
+
+def _write_configs(dat_file: str, configs: Dict[str, Any]) -> bool:
+    """
+    設定をJSONに変換してファイルに書き込む(保存スレッドで実行)
+
+    同じディレクトリの一時ファイルに書いてから置き換えるため、
+    書き込み途中で終了しても元のファイルは壊れない。
+
+    Args:
+        dat_file: 保存先のファイル
+        configs: 全アバターの設定(アバターID -> 差分)
+
+    Returns:
+        書き込みに成功した場合True
+    """
+    tmp_path = None
     try:
-        with open(dat_file, 'w', encoding='utf-8') as f:
-            json.dump(configs, f, ensure_ascii=False, indent=2)
-        
+        data = mod_avatar_state.dumps(configs)
+
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".avatar-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(dat_file)))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, dat_file)
+        tmp_path = None
+
         logger.info(f"Configs saved to: {dat_file}")
+        return True
     except Exception as e:
         logger.error(f"Failed to save configs to file: {e}")
+        return False
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 #
 # avatar
 #
+def _apply_global_config(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    """
+    再読み込みした全体設定を、作成済みのアバター・配置・自動保存に反映する
+
+    Args:
+        old: 実行中の全体設定
+        new: 新しい全体設定
+    """
+    layout = new.get("layout", mod_avatar_layout.DEFAULT_LAYOUT)
+    layout_offset = new.get("layout_offset", mod_avatar_layout.DEFAULT_OFFSET)
+    if (not old.get("enabled")
+            or layout != old.get("layout", mod_avatar_layout.DEFAULT_LAYOUT)
+            or layout_offset != old.get("layout_offset", mod_avatar_layout.DEFAULT_OFFSET)):
+        mod_avatar_layout.configure(layout, layout_offset)
+    mod_asset_bundle.configure(new.get("compile_bundle", False))
+
+    idle_timeout = new.get("idle_timeout", 300)
+    for avatar in _avatar_cache.values():
+        avatar.idle_timeout = idle_timeout
+
+    if new.get("enabled") and _auto_save_timer is None:
+        _start_auto_save_timer()
+    elif _auto_save_timer:
+        _auto_save_timer.setInterval(new.get("auto_save_interval", DEFAULT_AUTO_SAVE_INTERVAL))
+
+
+def _reconfigure_avatar(old_key: str, key: str, old_conf: Dict[str, Any], avatar_conf: Dict[str, Any]) -> None:
+    """
+    作成済みのアバターに、変更されたアバター設定を反映する
+
+    YAMLの値から変更していない設定だけを新しい値にする。
+
+    Args:
+        old_key: 実行中のアバター設定のキー
+        key: 新しいアバター設定のキー
+        old_conf: 実行中のアバター設定
+        avatar_conf: 新しいアバター設定
+    """
+    avatar = _avatar_cache.pop(old_key)
+    avatar_id, old_defaults = _state_entries.pop(old_key)
+    # 新しいデフォルトからの差分として保存し直す
+    _saved_revisions.pop(old_key, None)
+    defaults = _avatar_defaults(avatar_conf)
+
+    setters = (
+        ("app_title", "app_title", avatar.set_app_title),
+        ("position", "position", avatar.set_position),
+        ("flip", "flip", avatar.set_flip),
+        ("scale", "scale_percent", avatar.set_scale),
+    )
+    for name, attr, setter in setters:
+        if defaults[name] != old_defaults[name] and getattr(avatar, attr) == old_defaults[name]:
+            logger.info(f"  {avatar_conf['話者']}: {name} {old_defaults[name]} -> {defaults[name]}")
+            setter(defaults[name])
+
+    if bool(avatar_conf.get("表示", False)) != bool(old_conf.get("表示", False)):
+        if avatar_conf.get("表示", False):
+            avatar.show()
+        else:
+            avatar.hide()
+
+    _avatar_cache[key] = avatar
+    _state_entries[key] = (avatar_id, defaults)
+
+
 def _create_all_avatars() -> None:
     """
     設定に登録されているすべてのアバターインスタンスを作成
+
+    ウィンドウはすぐに作成・表示し、画像は各アバターがスレッドプールで並列に読み込む。
     """
     if not _avatars_config:
         logger.warning("No avatars configured.")
         return
     
-    for style_id, avatar_conf in _avatars_config.items():
+    avatar_ids = _avatar_ids()
+    for style_id, key in _config_keys().items():
         try:
-            avatar = _get_avatar(style_id)
-            if not avatar:
-                _create_avatar(style_id, avatar_conf)
+            if key not in _avatar_cache:
+                _create_avatar(style_id, _avatars_config[style_id], key, avatar_ids.get(key))
                 logger.info(f"Created avatar for style_id={style_id}")
 
         except Exception as e:
             logger.error(f"Failed to create avatar for style_id={style_id}: {e}")
 
+    _build_avatar_index()
 
-def _create_avatar(style_id: int, avatar_conf: Dict[str, Any]) -> AvatarWindow:
+
+def _create_avatar(style_id: int, avatar_conf: Dict[str, Any], key: Optional[str] = None,
+                   avatar_id: Optional[str] = None) -> AvatarWindow:
     """
     個別のアバターインスタンスを作成
     
     Args:
         style_id: スタイルID
         avatar_conf: アバター設定
+        key: アバター設定のキー(_config_keys()で計算済みの場合)
+        avatar_id: 状態ファイルのアバターID(_avatar_ids()で計算済みの場合)
     
     Returns:
         作成されたYMMAvatarWindowインスタンス
     """
     # キャッシュに登録
     # style_idが違っても、avatar_confは参照で同一の場合は、同一avatarとして扱う必要がある。
-    key = json.dumps(avatar_conf, sort_keys=True)
-
-    saved_config = _load_config()
-    if saved_config:
-        saved_config = saved_config.get(key)
+    if key is None:
+        key = _config_key(avatar_conf)
+    if avatar_id is None:
+        avatar_id = _avatar_ids().get(key) or mod_avatar_state.avatar_id(avatar_conf, style_id)
+
+    # 状態ファイルに保存した設定(デフォルトからの差分)を戻す
+    defaults = _avatar_defaults(avatar_conf)
+    saved_config = _get_avatar_state().get(avatar_id)
+    if saved_config is not None:
+        saved_config = mod_avatar_state.decode(saved_config, defaults)
     
     # アバターインスタンスの作成
     instance = AvatarWindow(
         style_id=style_id,
         speaker_name=avatar_conf["話者"],
-        zip_path=avatar_conf["画像"],
-        app_title=_avatar_global_config.get("target", "Claude"),
-        anime_types=["立ち絵", "口パク", "えがお", "びっくり", "がーん", "いかり"],
-        flip=avatar_conf.get("反転", False),
-        scale_percent=avatar_conf.get("縮尺", 50),
-        position=avatar_conf.get("位置", "right_out"),
-        config=saved_config
+        zip_path=defaults["zip_path"],
+        app_title=defaults["app_title"],
+        anime_types=list(defaults["anime_types"]),
+        flip=defaults["flip"],
+        scale_percent=defaults["scale"],
+        position=defaults["position"],
+        config=saved_config,
+        async_load=True,
+        idle_timeout=_avatar_global_config.get("idle_timeout", 300)
     )
     
     # 位置更新と表示設定
@@ -238,12 +556,16 @@ def _create_avatar(style_id: int, avatar_conf: Dict[str, Any]) -> AvatarWindow:
     # キャッシュに登録
     # style_idが違っても、avatar_confは参照で同一の場合は、同一avatarとして扱う必要がある。
     _avatar_cache[key] = instance
+    _avatar_index[style_id] = instance
+    _state_entries[key] = (avatar_id, defaults)
+    if _auto_save_timer:
+        instance.config_changed.connect(_on_config_changed)
     
     return instance
 
 def _get_avatar(style_id: int) -> Optional[AvatarWindow]:
     """
-    キャッシュからアバターインスタンスを取得
+    索引からアバターインスタンスを取得
     
     Args:
         style_id: スタイルID
@@ -251,15 +573,111 @@ def _get_avatar(style_id: int) -> Optional[AvatarWindow]:
     Returns:
         AvatarWindowインスタンス、存在しない場合はNone
     """
+    return _avatar_index.get(style_id)
+
+
+def _config_key(avatar_conf: Dict[str, Any]) -> str:
+    """アバター設定の内容から、同一アバターを判定するキーを作成する"""
+    return json.dumps(avatar_conf, sort_keys=True)
+
+
+def _config_keys() -> Dict[int, str]:
+    """
+    style_id毎のアバター設定のキーを作成する
+
+    YAMLのアンカー(&style_id_10 など)で共有された設定は同じオブジェクトなので、キーは1回だけ計算する。
+
+    Returns:
+        style_id -> キー
+    """
+    keys = {}
+    keys_by_conf = {}  # id(avatar_conf) -> キー
+    for style_id, avatar_conf in (_avatars_config or {}).items():
+        key = keys_by_conf.get(id(avatar_conf))
+        if key is None:
+            key = _config_key(avatar_conf)
+            keys_by_conf[id(avatar_conf)] = key
+        keys[style_id] = key
+    return keys
+
+
+def _avatar_ids(saved: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """
+    アバター設定のキー毎に、状態ファイルのアバターIDを決める
+
+    設定を共有するstyle_id(YAMLのアンカー)が複数ある場合は、状態ファイルに保存済みのstyle_idのID、
+    無ければ最小のstyle_idでIDを作る。
+
+    Args:
+        saved: 状態ファイルのアバター毎の設定。Noneなら_get_avatar_state()
+
+    Returns:
+        キー -> アバターID
+    """
+    if saved is None:
+        saved = _get_avatar_state()
+
+    style_ids = {}  # キー -> style_idのリスト
+    for style_id, key in _config_keys().items():
+        style_ids.setdefault(key, []).append(style_id)
+
+    return {key: mod_avatar_state.resolve_avatar_id(_avatars_config[ids[0]], sorted(ids), saved)
+            for key, ids in style_ids.items()}
+
+
+def _avatar_defaults(avatar_conf: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    YAMLのアバター設定から、AvatarWindowの設定のデフォルトを作成する
+
+    状態ファイルには、このデフォルトと異なる設定だけを保存する。
+    """
+    defaults = {
+        "zip_path": avatar_conf.get("画像"),
+        "app_title": (_avatar_global_config or {}).get("target", "Claude"),
+        "position": avatar_conf.get("位置", "right_out"),
+        "flip": avatar_conf.get("反転", False),
+        "scale": avatar_conf.get("縮尺", 50),
+        "anime_types": list(ANIME_TYPES),
+    }
+    defaults.update(mod_avatar_state.WINDOW_DEFAULTS)
+    return defaults
+
 
-    avatar_conf = _avatars_config.get(style_id)
-    key = json.dumps(avatar_conf, sort_keys=True)
-    return _avatar_cache.get(key)
+def _build_avatar_index() -> None:
+    """
+    style_id -> アバターの索引を作成する
+
+    設定が同じstyle_id(YAMLのアンカーで共有されたものなど)は、同じアバターを指す。
+    MCPのスレッドから参照中でも引けなくならないよう、新しい索引を作成してから差し替える。
+    """
+    global _avatar_index
+    avatar_index = {}
+    for style_id, key in _config_keys().items():
+        avatar = _avatar_cache.get(key)
+        if avatar is not None:
+            avatar_index[style_id] = avatar
+    _avatar_index = avatar_index
+
+
+def _get_avatar_state() -> Dict[str, Any]:
+    """
+    状態ファイルのアバター毎の設定を取得する(起動後の最初の1回だけファイルを読み込む)
+
+    Returns:
+        アバターID -> デフォルトからの差分
+    """
+    global _avatar_state
+    if _avatar_state is None:
+        _avatar_state = _load_config() or {}
+    return _avatar_state
 
 
 def _load_config():
     """
-    ファイルから設定を読み込む。
+    ファイルから設定を読み込む。旧形式のファイルは新しい形式に変換する。
+
+    Returns:
+        アバターID -> デフォルトからの差分。ファイルが無い場合はNone
     """
     dat_file = _avatar_global_config.get("save_file")
     if not dat_file:
@@ -273,7 +691,10 @@ def _load_config():
     
     try:
         with open(dat_path, 'r', encoding='utf-8') as f:
-            configs = json.load(f)
+            # 旧形式のキー(アバター設定のjson.dumps)は、現在の同じ設定のアバターのIDに変換する
+            avatar_ids = _avatar_ids(saved={})
+            configs = mod_avatar_state.parse(
+                json.load(f), _avatar_defaults, lambda avatar_conf: avatar_ids.get(_config_key(avatar_conf)))
         
         logger.info(f"Configs loaded from: {dat_file}")
         return configs
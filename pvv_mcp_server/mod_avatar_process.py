@@ -0,0 +1,663 @@
+"""
+mod_avatar_process.py
+アバターを別プロセスで描画する
+
+avatar.processがTrueの場合、アバターの描画(mod_avatar_manager + AvatarWindow)を子プロセスで行い、
+MCPサーバのプロセスとはパイプ(multiprocessing.Pipe)でやり取りする。
+描画とMCPの処理(音声合成・再生など)が別のプロセス(GIL)になるため、互いに待たされない。
+
+avatar.daemonがTrueの場合は、複数のMCPサーバで1つの共有デーモンを使う。
+最初に起動したMCPサーバが共有デーモン(描画と音声の再生)を起動し、
+以降のMCPサーバはローカルのソケット(127.0.0.1:daemon_port)で接続する。
+アバター画像は1回だけ読み込み、全てのMCPサーバの発話は1つの再生キューで順番に再生する。
+
+MCPサーバのプロセスからは、mod_avatar_managerと同じ set_anime_type / wait_applied で操作する。
+
+メッセージ(タプル):
+    親 -> 子: ("set_anime_type", 要求ID, style_id, アニメーションキー), ("reload", アバター設定), ("close",)
+              共有デーモンのみ: ("hello", 要求ID, アバター設定, 監視するYAML), ("play", 要求ID, style_id, WAVデータ)
+    子 -> 親: ("applied", 要求ID, 結果, エラーメッセージ or None)
+              結果は、set_anime_typeでは反映したアニメーションキー(アバターが無い場合None)、playではTrue、
+              helloでは使われなかった設定の説明(全て使われた場合None)
+"""
+
+import atexit
+import functools
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# グローバル変数
+_process = None  # 描画の子プロセス
+_conn = None  # 子プロセスとのパイプ(子プロセスが終了したらNone)
+_shared = False  # 共有デーモンに接続中
+_send_lock = threading.Lock()
+_pending: Dict[int, Future] = {}  # 要求ID -> 応答待ちのFuture
+_pending_lock = threading.Lock()
+_request_ids = itertools.count(1)
+
+# set_anime_type()の反映を待つ最大の時間(秒)。プロセス間の往復の分、mod_avatar_managerより長い
+APPLY_TIMEOUT = 1.5
+# play()の再生終了を待つ最大の時間(秒)。再生キューで他のMCPサーバの発話を待つ分を含む
+PLAY_TIMEOUT = 120.0
+# close()で子プロセスの終了(設定の保存)を待つ最大の時間(秒)
+CLOSE_TIMEOUT = 5.0
+
+# 共有デーモンのアドレス・ポート(avatar.daemon_portで変更できる)
+DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 50023
+# 共有デーモンの起動を待つ最大の時間(秒)
+DAEMON_START_TIMEOUT = 30.0
+# 共有デーモンは、接続が無くなってからこの時間(秒)が経つと終了する
+DAEMON_IDLE_EXIT = 10.0
+# 共有デーモンの認証キー・ログのファイル名(ホームディレクトリの.pvv-mcp-server配下)
+DAEMON_KEY_FILE = "daemon.key"
+DAEMON_LOG_FILE = "daemon.log"
+
+
+def start(avs: Dict[str, Any]) -> None:
+    """
+    描画の子プロセスを起動する
+    (YAMLの監視は親プロセスで行い、変更は再読み込みしたアバター設定として子プロセスに送る)
+
+    Args:
+        avs: アバター設定の辞書。全体設定の"avatar"配下(mod_avatar_manager.setup()と同じ)
+    """
+    global _process, _conn
+
+    # Qtはfork後の子プロセスでは使えないため、spawnで起動する
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    _process = ctx.Process(target=run_renderer, args=(child_conn, avs), name="pvv-avatar-renderer")
+    _process.start()
+    child_conn.close()
+
+    _conn = parent_conn
+    threading.Thread(target=_receive_loop, args=(parent_conn,), name="avatar-process-reader", daemon=True).start()
+    atexit.register(close)
+    logger.info(f"Avatar renderer process started. pid={_process.pid}")
+
+
+def is_running() -> bool:
+    """描画の子プロセスと接続中か"""
+    return _conn is not None
+
+
+def is_shared() -> bool:
+    """共有デーモンに接続中か"""
+    return _conn is not None and _shared
+
+
+def controller():
+    """
+    アバターを操作するモジュールを返す(speak・emotionから使う)
+
+    mod_avatar_managerはアバター有効時にmod_service.start_mcp_avatar()で読み込まれる。
+    アバター無効時にPySide6などを読み込まないよう、ここでは読み込まない。
+
+    Returns:
+        子プロセスで描画中はこのモジュール、同じプロセスで描画中はmod_avatar_manager。
+        アバター無効の場合はNone
+    """
+    if is_running():
+        return sys.modules[__name__]
+    return sys.modules.get("pvv_mcp_server.mod_avatar_manager")
+
+
+def set_anime_type(style_id: int, anime_type: str) -> Optional[Future]:
+    """
+    指定されたアバターのアニメーションキーを設定(任意のスレッドから呼べる)
+
+    Args:
+        style_id: スタイルID
+        anime_type: アニメーションキー（"立ち絵", "口パク"など）
+
+    Returns:
+        子プロセスで反映・描画が終わると完了するFuture。子プロセスと接続していない場合はNone
+    """
+    return _request("set_anime_type", style_id, anime_type)
+
+
+def wait_applied(future: Optional[Future], timeout: float = APPLY_TIMEOUT) -> bool:
+    """
+    set_anime_type()の操作がアバターに反映されるまで待つ
+
+    Args:
+        future: set_anime_type()の戻り値
+        timeout: 最大の待ち時間(秒)
+
+    Returns:
+        反映された場合True。アバターが無い・タイムアウトの場合False
+    """
+    if future is None:
+        return False
+
+    try:
+        return future.result(timeout=timeout) is not None
+    except Exception as e:
+        logger.warning(f"set_anime_type not applied: {e!r}")
+        return False
+
+
+def play(style_id: int, wav: bytes) -> Optional[Future]:
+    """
+    共有デーモンの再生キューに音声を積む(他のMCPサーバの発話と順番に再生する)
+
+    Args:
+        style_id: スタイルID(再生中はこのアバターを口パクにする)
+        wav: WAVデータ
+
+    Returns:
+        再生が終わると完了するFuture。共有デーモンに接続していない場合はNone(自分で再生する)
+    """
+    if not _shared:
+        return None
+    return _request("play", style_id, wav)
+
+
+def reload(avs: Dict[str, Any]) -> None:
+    """
+    子プロセスのアバター設定を再読み込みする
+
+    Args:
+        avs: start()と同じアバター設定の辞書
+    """
+    _send(("reload", avs))
+
+
+def close(timeout: float = CLOSE_TIMEOUT) -> None:
+    """
+    描画の子プロセスを終了する(子プロセスは未保存の設定を保存してから終了する)。共有デーモンからは切断する
+
+    Args:
+        timeout: 終了を待つ最大の時間(秒)。過ぎたら強制終了する
+    """
+    global _process, _conn, _shared
+
+    process, conn = _process, _conn
+    if process is None and conn is None:
+        return
+
+    # 共有デーモンは他のMCPサーバも使うため、closeでは接続を切るだけ(接続が無くなれば自分で終了する)
+    if conn is not None:
+        _send(("close",))
+    _process = None
+    if process is not None:
+        process.join(timeout)
+        if process.is_alive():
+            logger.warning("Avatar renderer process did not exit. terminating.")
+            process.terminate()
+            process.join()
+
+    _conn = None
+    _shared = False
+    if conn is not None:
+        conn.close()
+    logger.info("Avatar renderer process closed.")
+
+
+def attach(avs: Dict[str, Any], watch_file: Optional[str] = None) -> bool:
+    """
+    共有デーモンに接続する(起動していなければ起動する)
+
+    共有デーモンは最初に接続したMCPサーバのアバター設定で描画する。
+    このMCPサーバの設定が使われなかった場合は、共有デーモンの応答を警告としてログに出す。
+
+    Args:
+        avs: アバター設定の辞書。全体設定の"avatar"配下
+            - daemon_port: 共有デーモンのポート番号。デフォルト50023
+        watch_file: 変更を監視して再読み込みするYAMLファイル(共有デーモンを起動した場合のみ)
+
+    Returns:
+        接続できた場合True
+    """
+    global _conn, _shared
+
+    port = avs.get("daemon_port", DEFAULT_DAEMON_PORT)
+    try:
+        authkey = _daemon_authkey()
+        conn = _connect_daemon(port, authkey)
+        if conn is None:
+            _spawn_daemon(port)
+            deadline = time.monotonic() + DAEMON_START_TIMEOUT
+            while conn is None and time.monotonic() < deadline:
+                time.sleep(0.2)
+                conn = _connect_daemon(port, authkey)
+    except Exception as e:
+        logger.error(f"Failed to attach avatar daemon: {e}")
+        return False
+
+    if conn is None:
+        logger.error(f"Avatar daemon not started. port={port}")
+        return False
+
+    _conn = conn
+    _shared = True
+    threading.Thread(target=_receive_loop, args=(conn,), name="avatar-process-reader", daemon=True).start()
+    atexit.register(close)
+    future = _request("hello", avs, watch_file)
+    if future is not None:
+        future.add_done_callback(_log_hello)
+    logger.info(f"Attached avatar daemon. port={port}")
+    return True
+
+
+def run_renderer(conn, avs: Dict[str, Any]) -> None:
+    """
+    子プロセスのエントリポイント: アバターを描画し、親プロセスからの操作を反映する
+
+    Args:
+        conn: 親プロセスとのパイプ
+        avs: アバター設定の辞書
+    """
+    # 標準出力は親プロセスのMCP(stdio)と共有しているため、子プロセスからは書き込まない
+    sys.stdout = sys.stderr
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.INFO,
+            format='[%(asctime)s] [%(levelname)s] %(name)s: %(message)s',
+            datefmt='%H:%M:%S',
+        )
+
+    from PySide6.QtWidgets import QApplication
+    from pvv_mcp_server import mod_avatar_manager
+
+    app = QApplication(sys.argv)
+    mod_avatar_manager.setup(avs)
+
+    call_in_gui = _gui_caller()
+
+    def serve():
+        _serve(conn, call_in_gui)
+        # 親プロセスが終了した・closeを受け取った
+        call_in_gui(app.quit)
+
+    threading.Thread(target=serve, name="avatar-process-server", daemon=True).start()
+    ret = app.exec()
+    conn.close()
+    sys.exit(ret)
+
+
+def run_daemon(port: int, idle_exit: float = DAEMON_IDLE_EXIT) -> None:
+    """
+    共有デーモンのエントリポイント: アバターの描画と音声の再生を、接続した全てのMCPサーバで共有する
+
+    最初に接続したMCPサーバのアバター設定で描画する。
+    以降のMCPサーバのアバター設定・監視するYAMLが異なる場合は使わず、helloの応答でそのMCPサーバに知らせる。
+    接続が無くなってからidle_exit秒経つと終了する。
+
+    Args:
+        port: 待ち受けるポート番号
+        idle_exit: 接続が無くなってから終了するまでの時間(秒)
+    """
+    from multiprocessing.connection import Listener, AuthenticationError
+
+    os.makedirs(_daemon_dir(), exist_ok=True)
+    logging.basicConfig(
+        filename=os.path.join(_daemon_dir(), DAEMON_LOG_FILE),
+        encoding="utf-8",
+        level=logging.INFO,
+        format='[%(asctime)s] [%(levelname)s] %(name)s: %(message)s',
+        datefmt='%H:%M:%S',
+    )
+
+    try:
+        listener = Listener((DAEMON_HOST, port), authkey=_daemon_authkey())
+    except OSError as e:
+        # 同時に起動した他の共有デーモンが待ち受けている
+        logger.info(f"Avatar daemon already running. port={port}, {e}")
+        return
+
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from pvv_mcp_server import mod_avatar_manager
+
+    app = QApplication(sys.argv)
+    # アバターを全て非表示にしても、接続が有る間は終了しない
+    app.setQuitOnLastWindowClosed(False)
+    call_in_gui = _gui_caller()
+
+    playback = queue.Queue()
+    threading.Thread(target=_playback_loop, args=(playback,), name="avatar-daemon-playback", daemon=True).start()
+
+    state = {"clients": 0, "avs": None, "watch_file": None}
+    state_lock = threading.Lock()
+
+    idle_timer = QTimer()
+    idle_timer.setSingleShot(True)
+    idle_timer.setInterval(int(idle_exit * 1000))
+
+    def on_idle():
+        with state_lock:
+            if state["clients"] == 0:
+                logger.info("No client. Avatar daemon exits.")
+                app.quit()
+
+    def setup(avs, watch_file):
+        # GUIスレッドで呼ばれる
+        mod_avatar_manager.setup(avs)
+        if watch_file:
+            from pvv_mcp_server import mod_service
+            mod_service.watch_config(watch_file)
+
+    def on_hello(avs, watch_file):
+        # クライアントの受信スレッドで呼ばれる。使わなかった設定の説明を返す
+        with state_lock:
+            configured = state["avs"] is not None
+            if not configured:
+                state["avs"] = avs
+                state["watch_file"] = watch_file
+            first_avs, first_watch_file = state["avs"], state["watch_file"]
+
+        if not configured:
+            call_in_gui(functools.partial(setup, avs, watch_file))
+            return None
+
+        ignored = sorted(key for key in set(avs) | set(first_avs) if avs.get(key) != first_avs.get(key))
+        if watch_file != first_watch_file:
+            ignored.append(f"watch_file({watch_file})")
+        if not ignored:
+            return None
+        message = f"Avatar daemon is already configured by another MCP server. ignored: {', '.join(ignored)}"
+        logger.info(message)
+        return message
+
+    def serve(conn):
+        with state_lock:
+            state["clients"] += 1
+        logger.info(f"Client attached. clients={state['clients']}")
+        _serve(conn, call_in_gui, on_hello=on_hello, playback=playback)
+        conn.close()
+        with state_lock:
+            state["clients"] -= 1
+            idle = state["clients"] == 0
+        logger.info(f"Client detached. clients={state['clients']}")
+        if idle:
+            call_in_gui(idle_timer.start)
+
+    def accept_loop():
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError as e:
+                logger.warning(f"Client authentication failed: {e}")
+                continue
+            except OSError:
+                # 終了時にlistenerを閉じた
+                break
+            threading.Thread(target=serve, args=(conn,), name="avatar-daemon-client", daemon=True).start()
+
+    idle_timer.timeout.connect(on_idle)
+    threading.Thread(target=accept_loop, name="avatar-daemon-accept", daemon=True).start()
+    # 起動したMCPサーバが接続しないまま終わった場合も終了する
+    idle_timer.start()
+    logger.info(f"Avatar daemon started. port={port}, pid={os.getpid()}")
+
+    ret = app.exec()
+    listener.close()
+    sys.exit(ret)
+
+
+#
+# private function
+#
+def _request(command: str, *args) -> Optional[Future]:
+    """子プロセスに要求を送り、応答で完了するFutureを返す。送れなかった場合None"""
+    if _conn is None:
+        return None
+
+    future = Future()
+    request_id = next(_request_ids)
+    with _pending_lock:
+        _pending[request_id] = future
+
+    if not _send((command, request_id) + args):
+        with _pending_lock:
+            _pending.pop(request_id, None)
+        return None
+    return future
+
+
+def _send(message) -> bool:
+    """子プロセスにメッセージを送る。送れなかった場合False"""
+    conn = _conn
+    if conn is None:
+        return False
+
+    with _send_lock:
+        try:
+            conn.send(message)
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to send to avatar renderer process: {e}")
+            return False
+
+
+def _receive_loop(conn) -> None:
+    """子プロセスからの応答を受け取り、応答待ちのFutureを完了する(受信スレッド)"""
+    global _conn, _shared
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        if message[0] != "applied":
+            logger.warning(f"Unknown message from avatar renderer process: {message[0]}")
+            continue
+
+        _, request_id, result, error = message
+        with _pending_lock:
+            future = _pending.pop(request_id, None)
+        if future is None:
+            continue
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(RuntimeError(error))
+
+    # 子プロセスが終了した: 応答待ちの操作は全て失敗にする
+    if _conn is conn:
+        _conn = None
+        _shared = False
+        logger.warning("Avatar renderer process disconnected.")
+    with _pending_lock:
+        futures = list(_pending.values())
+        _pending.clear()
+    for future in futures:
+        future.set_exception(ConnectionError("avatar renderer process disconnected"))
+
+
+def _serve(conn, call_in_gui: Callable[[Callable[[], Any]], None],
+           on_hello: Optional[Callable[[Dict[str, Any], Optional[str]], Optional[str]]] = None,
+           playback: Optional[queue.Queue] = None) -> None:
+    """
+    親プロセスからのメッセージを処理する(子プロセスの受信スレッド)
+
+    Args:
+        conn: 親プロセスとのパイプ(共有デーモンの場合はMCPサーバとのソケット)
+        call_in_gui: 関数をGUIスレッドで呼び出す関数
+        on_hello: helloを受け取った時に呼ぶ関数(共有デーモンのみ)。戻り値をhelloの応答にする
+        playback: playの音声を積む再生キュー(共有デーモンのみ)
+    """
+    from pvv_mcp_server import mod_avatar_manager
+
+    send_lock = threading.Lock()
+
+    def reply(request_id, result, error):
+        with send_lock:
+            try:
+                conn.send(("applied", request_id, result, error))
+            except (OSError, ValueError):
+                # 親プロセスが終了した
+                pass
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        command = message[0]
+        if command == "set_anime_type":
+            _, request_id, style_id, anime_type = message
+            try:
+                # 操作キューに積むだけなので、受信スレッドから呼べる
+                future = mod_avatar_manager.set_anime_type(style_id, anime_type)
+            except Exception as e:
+                reply(request_id, None, str(e))
+                continue
+            if future is None:
+                reply(request_id, None, None)
+            else:
+                future.add_done_callback(functools.partial(_reply_applied, reply, request_id))
+        elif command == "play" and playback is not None:
+            _, request_id, style_id, wav = message
+            playback.put((style_id, wav, functools.partial(reply, request_id)))
+        elif command == "hello" and on_hello is not None:
+            _, request_id, avs, watch_file = message
+            try:
+                reply(request_id, on_hello(avs, watch_file), None)
+            except Exception as e:
+                reply(request_id, None, str(e))
+        elif command == "reload":
+            call_in_gui(functools.partial(mod_avatar_manager.reload, message[1]))
+        elif command == "close":
+            break
+        else:
+            logger.warning(f"Unknown message from MCP server process: {command}")
+
+
+def _reply_applied(reply, request_id: int, future: Future) -> None:
+    """mod_avatar_manager.set_anime_type()のFutureの結果を親プロセスに返す"""
+    if future.cancelled():
+        reply(request_id, None, "cancelled")
+    elif future.exception() is not None:
+        reply(request_id, None, str(future.exception()))
+    else:
+        reply(request_id, future.result(), None)
+
+
+def _log_hello(future: Future) -> None:
+    """共有デーモンのhelloの応答(使われなかった設定の説明)をログに出す"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    if future.result():
+        logger.warning(future.result())
+
+
+def _playback_loop(playback: queue.Queue) -> None:
+    """
+    再生キューの音声を1つずつ再生する(共有デーモンの再生スレッド)
+
+    Args:
+        playback: (style_id, WAVデータ, 再生が終わったら(結果, エラーメッセージ)で呼ぶ関数)のキュー
+    """
+    from pvv_mcp_server import mod_speak
+
+    while True:
+        style_id, wav, done = playback.get()
+        try:
+            mod_speak.play_wav(style_id, wav)
+        except Exception as e:
+            logger.warning(f"playback error: {e}")
+            done(None, str(e))
+            continue
+        done(True, None)
+
+
+def _daemon_dir() -> str:
+    """共有デーモンの認証キー・ログを置くディレクトリ"""
+    return os.path.join(os.path.expanduser("~"), ".pvv-mcp-server")
+
+
+def _daemon_authkey() -> bytes:
+    """
+    共有デーモンの認証キーを返す(無ければ作成する)
+
+    同じユーザのMCPサーバだけが共有デーモンに接続できるよう、ユーザ毎のファイルに保存する。
+    """
+    path = os.path.join(_daemon_dir(), DAEMON_KEY_FILE)
+    os.makedirs(_daemon_dir(), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # 作成済み(同時に起動したMCPサーバが書き込み中の場合は少し待つ)
+        for _ in range(50):
+            with open(path, "rb") as f:
+                authkey = f.read()
+            if authkey:
+                return authkey
+            time.sleep(0.1)
+        raise RuntimeError(f"empty avatar daemon key: {path}")
+
+    authkey = secrets.token_bytes(32)
+    with os.fdopen(fd, "wb") as f:
+        f.write(authkey)
+    return authkey
+
+
+def _connect_daemon(port: int, authkey: bytes):
+    """共有デーモンに接続する。待ち受けていない場合はNone"""
+    from multiprocessing.connection import Client
+
+    try:
+        return Client((DAEMON_HOST, port), authkey=authkey)
+    except ConnectionRefusedError:
+        return None
+
+
+def _spawn_daemon(port: int) -> None:
+    """共有デーモンを起動する(このMCPサーバが終了しても動き続けるよう、切り離して起動する)"""
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+
+    code = f"from pvv_mcp_server import mod_avatar_process; mod_avatar_process.run_daemon({int(port)})"
+    subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, close_fds=True, **kwargs)
+    logger.info(f"Avatar daemon spawned. port={port}")
+
+
+def _gui_caller() -> Callable[[Callable[[], Any]], None]:
+    """
+    任意のスレッドから、関数をGUIスレッドで呼び出す関数を作る(GUIスレッドで呼び出すこと)
+
+    Returns:
+        関数を受け取り、GUIスレッドのイベントループで呼び出すよう依頼する関数
+    """
+    from PySide6.QtCore import QObject, Qt, Signal
+
+    class _GuiCaller(QObject):
+        """受け取った関数をGUIスレッドで呼び出す"""
+
+        called = Signal(object)
+
+    caller = _GuiCaller()
+    caller.called.connect(_call, Qt.QueuedConnection)
+    # GUIスレッドで生成したcallerを破棄しないよう、関数に持たせる
+    return lambda func: caller.called.emit(func)
+
+
+def _call(func: Callable[[], Any]) -> None:
+    """GUIスレッドで関数を呼び出す"""
+    try:
+        func()
+    except Exception as e:
+        logger.error(f"avatar renderer error: {e}")
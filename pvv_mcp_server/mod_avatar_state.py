@@ -0,0 +1,250 @@
+"""
+mod_avatar_state.py
+アバターの状態ファイル(pvv-mcp-server.avatar.json)の形式
+
+状態ファイル(version 2):
+    {
+      "version": 2,
+      "avatars": {
+        "<アバターID>": { デフォルトと異なる設定だけ }
+      }
+    }
+
+アバターIDは、YAMLのアバター設定の話者・画像から作る短いIDとstyle_idを組み合わせたもの。
+位置・縮尺などを変えてもIDは変わらないため、保存した状態を引き継げる。
+話者・画像が同じ別々のアバターも、style_idで区別する。
+設定を共有するstyle_idを追加・削除した場合も、状態ファイルにあるいずれかのstyle_idのIDを使い続ける
+(resolve_avatar_id)。
+
+各アバターの設定は、デフォルト(YAMLの設定・AvatarWindow/AvatarPartModelの初期値)と
+異なる値だけを保存する。パーツ名の繰り返しや空のファイルリストは保存しない。
+
+旧形式(YAMLのアバター設定のjson.dumpsをキーとし、全パーツの設定をそのまま保存)は
+読み込み時に、現在のYAMLで同じ設定のアバターのIDに変換する。
+"""
+
+import copy
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Collection, Dict, Optional, Sequence
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 状態ファイルの形式のバージョン
+STATE_VERSION = 2
+# アバターIDの長さ(16進数の桁数)
+AVATAR_ID_LENGTH = 8
+
+# AvatarWindowの設定の初期値(YAMLで指定しないもの)
+WINDOW_DEFAULTS = {
+    "frame_timer_interval": 50,
+    "follow_timer_interval": 150,
+}
+
+# AvatarPartModelの設定の初期値
+# base_imageの初期値は画像ファイルにより異なるため含めない(Noneの場合だけ省略する)
+PART_DEFAULTS = {
+    "selected_files": [],
+    "interval_ms": 200,
+    "anime_type": "固定",
+    "is_enabled": True,
+}
+# 旧形式のintervalを変換する時の1tickの長さ(frame_timer_intervalが無い場合)
+LEGACY_TICK_MS = 50
+
+
+def avatar_id(avatar_conf: Dict[str, Any], style_id: int) -> str:
+    """
+    YAMLのアバター設定から、状態ファイルのアバターIDを作成する
+
+    話者・画像とstyle_idだけから作るため、位置・縮尺・反転などを変えても変わらない。
+
+    Args:
+        avatar_conf: YAMLのアバター設定
+        style_id: アバターのstyle_id(設定を共有するstyle_idが複数ある場合はresolve_avatar_id()で選ぶ)
+
+    Returns:
+        アバターID(16進数8桁-style_id)
+    """
+    source = json.dumps([avatar_conf.get("話者"), avatar_conf.get("画像")], ensure_ascii=False, sort_keys=True)
+    return f"{hashlib.sha1(source.encode('utf-8')).hexdigest()[:AVATAR_ID_LENGTH]}-{style_id}"
+
+
+def resolve_avatar_id(avatar_conf: Dict[str, Any], style_ids: Sequence[int], saved: Collection[str]) -> str:
+    """
+    設定を共有するstyle_idのうち、状態ファイルに保存済みのIDを選ぶ
+
+    最小のstyle_idより小さいstyle_idを追加しても、保存済みの状態を引き継ぐ。
+
+    Args:
+        avatar_conf: YAMLのアバター設定
+        style_ids: この設定を共有するstyle_id(小さい順)
+        saved: 状態ファイルに保存済みのアバターID
+
+    Returns:
+        保存済みのIDがあればそのID。無ければ最小のstyle_idのID
+    """
+    ids = [avatar_id(avatar_conf, style_id) for style_id in style_ids]
+    return next((aid for aid in ids if aid in saved), ids[0])
+
+
+def encode(config: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    AvatarWindow.save_config()の設定を、デフォルトからの差分にする
+
+    Args:
+        config: AvatarWindow.save_config()の設定辞書
+        defaults: このアバターの設定のデフォルト(dialogsを除く)
+
+    Returns:
+        差分の辞書
+    """
+    delta = {}
+    for name, value in config.items():
+        if name != "dialogs" and (name not in defaults or defaults[name] != value):
+            delta[name] = value
+
+    dialogs = {}
+    for anime_type, dialog_config in config.get("dialogs", {}).items():
+        parts = {}
+        for part_name, part_config in dialog_config.get("parts", {}).items():
+            part_delta = _encode_part(part_config)
+            if part_delta:
+                parts[part_name] = part_delta
+        if parts:
+            dialogs[anime_type] = {"parts": parts}
+    if dialogs:
+        delta["dialogs"] = dialogs
+
+    return delta
+
+
+def decode(delta: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    デフォルトからの差分を、AvatarWindow.load_config()の設定に戻す
+
+    Args:
+        delta: encode()の差分
+        defaults: このアバターの設定のデフォルト(dialogsを除く)
+
+    Returns:
+        設定辞書
+    """
+    config = copy.deepcopy(defaults)
+    config.update({name: value for name, value in delta.items() if name != "dialogs"})
+
+    config["dialogs"] = {}
+    for anime_type, dialog_delta in delta.get("dialogs", {}).items():
+        parts = {}
+        for part_name, part_delta in dialog_delta.get("parts", {}).items():
+            part_config = copy.deepcopy(PART_DEFAULTS)
+            part_config.update(part_delta)
+            parts[part_name] = part_config
+        config["dialogs"][anime_type] = {"parts": parts}
+
+    return config
+
+
+def parse(data: Any, defaults_for: Callable[[Dict[str, Any]], Dict[str, Any]],
+          avatar_id_for: Callable[[Dict[str, Any]], Optional[str]]) -> Dict[str, Any]:
+    """
+    状態ファイルの内容を読み込む(旧形式は変換する)
+
+    Args:
+        data: 状態ファイルのJSON
+        defaults_for: YAMLのアバター設定から設定のデフォルトを作る関数(旧形式の変換に使用)
+        avatar_id_for: YAMLのアバター設定から、現在の同じ設定のアバターのIDを返す関数
+            (旧形式の変換に使用。該当するアバターが無ければNone)
+
+    Returns:
+        アバターID -> 差分
+    """
+    if not isinstance(data, dict):
+        logger.warning("Invalid avatar state file. ignored.")
+        return {}
+
+    if "version" not in data:
+        return _migrate_v1(data, defaults_for, avatar_id_for)
+
+    if data["version"] > STATE_VERSION:
+        logger.warning(f"Avatar state file version {data['version']} is newer than {STATE_VERSION}.")
+    return dict(data.get("avatars", {}))
+
+
+def dumps(avatars: Dict[str, Any]) -> str:
+    """
+    状態ファイルの内容を作成する
+
+    Args:
+        avatars: アバターID -> 差分
+
+    Returns:
+        状態ファイルのJSON文字列
+    """
+    return json.dumps({"version": STATE_VERSION, "avatars": avatars}, ensure_ascii=False, indent=2)
+
+
+#
+# private function
+#
+def _encode_part(part_config: Dict[str, Any]) -> Dict[str, Any]:
+    """パーツの設定のうち、初期値と異なる値だけを返す"""
+    part_delta = {}
+    for name, value in part_config.items():
+        if name == "part_name":
+            # パーツ名は親のキーと同じ
+            continue
+        if name == "base_image" and value is None:
+            continue
+        if name in PART_DEFAULTS and PART_DEFAULTS[name] == value:
+            continue
+        part_delta[name] = value
+    return part_delta
+
+
+def _migrate_v1(data: Dict[str, Any], defaults_for: Callable[[Dict[str, Any]], Dict[str, Any]],
+                avatar_id_for: Callable[[Dict[str, Any]], Optional[str]]) -> Dict[str, Any]:
+    """
+    旧形式(YAMLのアバター設定のjson.dumps -> 設定)を変換する
+
+    旧形式のキーはアバター設定そのものなので、現在のYAMLで同じ設定のアバターのIDに変換する。
+    話者・画像が同じ別々のアバターも、それぞれのIDに変換される。
+    現在のYAMLに無いアバターの設定は、style_idが分からないため変換しない。
+
+    Returns:
+        アバターID -> 差分
+    """
+    avatars = {}
+    for key, config in data.items():
+        try:
+            avatar_conf = json.loads(key)
+        except ValueError:
+            logger.warning(f"Unknown avatar state key. ignored: {key[:40]}")
+            continue
+        if not isinstance(avatar_conf, dict) or not isinstance(config, dict):
+            logger.warning(f"Unknown avatar state key. ignored: {key[:40]}")
+            continue
+
+        aid = avatar_id_for(avatar_conf)
+        if aid is None:
+            logger.warning(f"Avatar state for unconfigured avatar. ignored: {avatar_conf.get('話者')}")
+            continue
+
+        avatars[aid] = encode(_upgrade_intervals(config), defaults_for(avatar_conf))
+
+    logger.info(f"Migrated {len(avatars)} avatar state(s) to version {STATE_VERSION}.")
+    return avatars
+
+
+def _upgrade_intervals(config: Dict[str, Any]) -> Dict[str, Any]:
+    """旧形式のパーツのinterval(tick数)をinterval_ms(ミリ秒)に変換する"""
+    tick_ms = config.get("frame_timer_interval", LEGACY_TICK_MS)
+    config = copy.deepcopy(config)
+    for dialog_config in config.get("dialogs", {}).values():
+        for part_config in dialog_config.get("parts", {}).values():
+            if "interval" in part_config and "interval_ms" not in part_config:
+                # AvatarPartModel.load_config()と同じ変換(intervalの次のtickで切り替わる)
+                part_config["interval_ms"] = (part_config.pop("interval") + 1) * tick_ms
+    return config
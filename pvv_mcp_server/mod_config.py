@@ -0,0 +1,39 @@
+"""
+mod_config.py
+設定用YAMLファイルの読み込み
+"""
+
+import os
+import logging
+import yaml
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# save_fileに"default"を指定した場合の状態ファイル名(YAMLと同じディレクトリに作成)
+DEFAULT_SAVE_FILE = "pvv-mcp-server.avatar.json"
+
+
+def load_config(yaml_path: str) -> dict:
+    """
+    設定用YAMLファイルを読み込む
+
+    Args:
+        yaml_path: YAMLファイルパス
+
+    Returns:
+        全体設定の辞書。avatar.save_fileが"default"の場合は、YAMLと同じディレクトリのファイルパスにする
+    """
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    logger.info(f"YAML設定を読み込みました: {yaml_path}")
+
+    avatar_dict = config.get("avatar") or {}
+    if avatar_dict.get("save_file") == "default":
+        basedir = os.path.dirname(os.path.abspath(yaml_path))
+        dat_file = os.path.join(basedir, DEFAULT_SAVE_FILE)
+        avatar_dict["save_file"] = dat_file
+        logger.info(f"Avatar DATファイル: {dat_file}")
+
+    return config
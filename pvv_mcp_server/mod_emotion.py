@@ -1,16 +1,8 @@
 # mod_emotion.py
 
-import requests
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
-import io
-import re
-import time
-
-import pvv_mcp_server.mod_avatar_manager
 import logging
-import sys
+
+from pvv_mcp_server import mod_avatar_process
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -33,8 +25,13 @@ def emotion(style_id: int, emotion: str) -> None:
 
     try:
         logger.info(f"emotion called. {style_id}, {emotion}")
-        pvv_mcp_server.mod_avatar_manager.set_anime_type(style_id, emotion)
-        time.sleep(0.1)
+        avatar_manager = mod_avatar_process.controller()
+        if avatar_manager is None:
+            logger.info("Avatar disabled. Skipping emotion.")
+            return
+        future = avatar_manager.set_anime_type(style_id, emotion)
+        # 感情表現がアバターに表示されるまで待つ
+        avatar_manager.wait_applied(future)
 
     except Exception as e:
         logger.warning(f"emotion error {e}")
@@ -3,13 +3,12 @@ MCP Server service module
 MCPサーバクラスとToolsを定義する
 """
 import json
+import os
 import sys
 from typing import Any
 from threading import Thread
 import logging
 import time
-from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QTimer
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.prompts import base
 
@@ -17,7 +16,8 @@ from pvv_mcp_server import mod_speak
 from pvv_mcp_server import mod_speakers
 from pvv_mcp_server import mod_speaker_info
 from pvv_mcp_server import mod_emotion
-import pvv_mcp_server.mod_avatar_manager
+from pvv_mcp_server import mod_config
+from pvv_mcp_server import mod_avatar_process
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -106,6 +106,12 @@ PROMPT_TOUHOU_TEXT = """\
 mcp = FastMCP("pvv-mcp-server")
 _config = None
 _avatar_enbled = False
+_config_watcher = None
+
+# YAMLの変更を検知してから再読み込みするまでの待ち時間(ミリ秒)。保存中の連続した変更をまとめる
+CONFIG_RELOAD_DELAY = 500
+# Qtを使わないプロセスでYAMLの変更を確認する間隔(秒)
+CONFIG_POLL_INTERVAL = 1.0
 
 
 #
@@ -391,8 +397,14 @@ def prompt_ai_touhou() -> str:
 #
 # public function
 #
-def start(conf: dict[str, Any]):
-    """stdio モードで FastMCP を起動"""
+def start(conf: dict[str, Any], watch_file: str = None):
+    """
+    stdio モードで FastMCP を起動
+
+    Args:
+        conf: 全体設定
+        watch_file: 変更を監視して再読み込みするYAMLファイル(アバター有効時のみ)
+    """
     global _config 
     global _avatar_enbled
 
@@ -401,21 +413,167 @@ def start(conf: dict[str, Any]):
 
     if conf.get("avatar", {}).get("enabled"):
         _avatar_enbled = True
-        start_mcp_avatar(conf.get("avatar"))
+        start_mcp_avatar(conf.get("avatar"), watch_file)
     else:
         _avatar_enbled = False
+        if watch_file:
+            logger.warning("config watch requires avatar enabled. ignored.")
         start_mcp(conf)
 
-def start_mcp_avatar(conf: dict[str, Any]):
+def start_mcp_avatar(conf: dict[str, Any], watch_file: str = None):
     logger.info("start_mcp_avatar called.")
     logger.debug(conf)
 
+    if conf.get("process") or conf.get("daemon"):
+        # アバターは子プロセス(daemonの場合は共有デーモン)で描画し、このプロセスではMCPサーバだけを動かす
+        # YAMLはこのプロセスで監視し、アバター設定は描画の子プロセスに送る
+        # (共有デーモンは、最初に接続したMCPサーバのYAMLをデーモン自身が監視する)
+        if not conf.get("daemon") or not mod_avatar_process.attach(conf, watch_file):
+            mod_avatar_process.start(conf)
+        if watch_file:
+            poll_config(watch_file)
+        try:
+            start_mcp(conf)
+        finally:
+            mod_avatar_process.close()
+        return
+
+    # PySide6・アバター関連のモジュールは、アバター有効時だけ読み込む(起動時間短縮のため)
+    from PySide6.QtWidgets import QApplication
+    import pvv_mcp_server.mod_avatar_manager
+
     Thread(target=start_mcp, args=(conf,), daemon=True).start()
 
     app = QApplication(sys.argv) 
     pvv_mcp_server.mod_avatar_manager.setup(conf) 
+    if watch_file:
+        watch_config(watch_file)
     sys.exit(app.exec())
 
+def reload(conf: dict[str, Any]):
+    """
+    再読み込みした全体設定を反映する
+
+    全体設定はこのプロセスの設定として置き換える。アバター設定は、このプロセスで描画している場合は
+    アバターに反映し(GUIスレッドで呼び出すこと)、描画の子プロセスの場合は子プロセスに送る。
+    共有デーモンのアバター設定は、デーモンが監視しているYAMLから反映されるため送らない。
+
+    Args:
+        conf: 新しい全体設定
+    """
+    global _config
+    global _avatar_enbled
+
+    old_conf = _config or {}
+    _config = conf
+
+    changed = sorted(str(name) for name in set(old_conf) | set(conf)
+                     if name != "avatar" and old_conf.get(name) != conf.get(name))
+    if changed:
+        logger.info(f"config changed: {changed}")
+
+    avatar_conf = conf.get("avatar") or {}
+    if avatar_conf == (old_conf.get("avatar") or {}):
+        logger.info("avatar config not changed.")
+        return
+
+    _avatar_enbled = bool(avatar_conf.get("enabled"))
+    if mod_avatar_process.is_running():
+        if not mod_avatar_process.is_shared():
+            mod_avatar_process.reload(avatar_conf)
+        return
+
+    import pvv_mcp_server.mod_avatar_manager
+    pvv_mcp_server.mod_avatar_manager.reload(avatar_conf)
+
+def watch_config(yaml_path: str):
+    """
+    YAMLファイルの変更を監視し、変更されたら設定を再読み込みする(GUIスレッドで呼び出すこと)
+
+    Args:
+        yaml_path: 設定用のYAMLファイルパス
+
+    Returns:
+        QFileSystemWatcher
+    """
+    global _config_watcher
+
+    from PySide6.QtCore import QFileSystemWatcher, QTimer
+
+    watcher = QFileSystemWatcher([yaml_path])
+    timer = QTimer(watcher)
+    timer.setSingleShot(True)
+    timer.setInterval(CONFIG_RELOAD_DELAY)
+
+    def on_file_changed(path):
+        # エディタによっては保存時にファイルを置き換えるため、監視が外れたら監視し直す
+        if path not in watcher.files() and os.path.exists(path):
+            watcher.addPath(path)
+        timer.start()
+
+    def on_timeout():
+        if yaml_path not in watcher.files() and os.path.exists(yaml_path):
+            watcher.addPath(yaml_path)
+        try:
+            conf = mod_config.load_config(yaml_path)
+        except Exception as e:
+            # 編集途中などで読み込めない場合は、実行中の設定のまま
+            logger.error(f"YAML設定の再読み込みに失敗しました。{e}")
+            return
+        reload(conf)
+
+    watcher.fileChanged.connect(on_file_changed)
+    timer.timeout.connect(on_timeout)
+    _config_watcher = watcher
+    logger.info(f"watching config: {yaml_path}")
+    return watcher
+
+def poll_config(yaml_path: str, interval: float = CONFIG_POLL_INTERVAL):
+    """
+    YAMLファイルの変更をポーリングで監視し、変更されたら設定を再読み込みする
+
+    Qtのイベントループが無いプロセス(アバターを別プロセスで描画する場合のMCPサーバ)で使う。
+
+    Args:
+        yaml_path: 設定用のYAMLファイルパス
+        interval: 変更を確認する間隔(秒)
+
+    Returns:
+        監視スレッド
+    """
+    def stamp():
+        try:
+            st = os.stat(yaml_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def loop(last):
+        while True:
+            time.sleep(interval)
+            current = stamp()
+            if current is None or current == last:
+                continue
+            # 保存中の連続した変更をまとめる
+            time.sleep(CONFIG_RELOAD_DELAY / 1000)
+            last = stamp()
+            try:
+                conf = mod_config.load_config(yaml_path)
+            except Exception as e:
+                # 編集途中などで読み込めない場合は、実行中の設定のまま
+                logger.error(f"YAML設定の再読み込みに失敗しました。{e}")
+                continue
+            try:
+                reload(conf)
+            except Exception as e:
+                # 反映に失敗しても監視は続ける
+                logger.error(f"YAML設定の反映に失敗しました。{e}")
+
+    thread = Thread(target=loop, args=(stamp(),), name="config-watcher", daemon=True)
+    logger.info(f"polling config: {yaml_path}")
+    thread.start()
+    return thread
+
 def start_mcp(conf: dict[str, Any]):
     logger.info("start_mcp called.")
     logger.debug(conf)
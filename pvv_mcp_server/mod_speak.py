@@ -4,20 +4,21 @@ VOICEVOX Web APIを使用して音声合成と再生を行うモジュール
 """
 
 import requests
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
 from typing import Optional
 import io
-import pvv_mcp_server.mod_avatar_manager
 import logging
 import sys
 import re
 import time
+from pvv_mcp_server import mod_avatar_process
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# 音声再生のモジュール(sounddevice, soundfile)。起動時間短縮のため、初回の再生時に読み込む
+sd = None
+sf = None
+
 
 def remove_bracket_text(text: str) -> str:
     # 丸括弧の中身を削除（全角・半角の両方対応）
@@ -87,9 +88,42 @@ def speak(
     except Exception as e:
         raise Exception(f"VOICEVOX API通信エラー: {e}")
 
+    # 共有デーモンに接続中は、他のMCPサーバの発話と1つの再生キューで順番に再生する
+    played = mod_avatar_process.play(style_id, synthesis_response.content)
+    if played is not None:
+        try:
+            played.result(timeout=mod_avatar_process.PLAY_TIMEOUT)
+        except TimeoutError:
+            # 共有デーモンが応答しない場合も、MCPの呼び出しを止めたままにしない
+            logger.warning(f"playback not finished in {mod_avatar_process.PLAY_TIMEOUT} sec. style_id={style_id}")
+        except Exception as e:
+            raise Exception(f"音声再生エラー: {e}")
+        return
+
+    play_wav(style_id, synthesis_response.content)
+
+
+def play_wav(style_id: int, wav: bytes) -> None:
+    """
+    WAVデータを再生する(再生中はアバターを口パクにする)
+
+    Args:
+        style_id: voicevox 発話音声を指定するID
+        wav: WAVデータ
+
+    Raises:
+        Exception: 音声再生エラー
+    """
+    avatar_manager = _avatar_manager()
     try:
-        pvv_mcp_server.mod_avatar_manager.set_anime_type(style_id, "口パク")
-        audio_data, samplerate = sf.read(io.BytesIO(synthesis_response.content), dtype='float32', always_2d=True)
+        _load_audio()
+        future = None
+        if avatar_manager is not None:
+            future = avatar_manager.set_anime_type(style_id, "口パク")
+        audio_data, samplerate = sf.read(io.BytesIO(wav), dtype='float32', always_2d=True)
+        # 口パクが表示されてから再生を始める(デコードと並行して待つ)
+        if future is not None:
+            avatar_manager.wait_applied(future)
         with sd.OutputStream(samplerate=samplerate, channels=audio_data.shape[1], dtype='float32') as stream:
             stream.write(audio_data)
 
@@ -97,4 +131,29 @@ def speak(
         raise Exception(f"音声再生エラー: {e}")
 
     finally:
-        pvv_mcp_server.mod_avatar_manager.set_anime_type(style_id, "立ち絵")
+        if avatar_manager is not None:
+            avatar_manager.set_anime_type(style_id, "立ち絵")
+
+
+#
+# private function
+#
+def _load_audio() -> None:
+    """音声再生のモジュールを読み込む(初回だけ)"""
+    global sd, sf
+    if sd is None:
+        import sounddevice
+        sd = sounddevice
+    if sf is None:
+        import soundfile
+        sf = soundfile
+
+
+def _avatar_manager():
+    """
+    アバターを操作するモジュールを返す(mod_avatar_process.controller())
+
+    Returns:
+        mod_avatar_processまたはmod_avatar_manager。アバター無効の場合はNone
+    """
+    return mod_avatar_process.controller()
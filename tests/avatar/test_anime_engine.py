@@ -0,0 +1,87 @@
+"""
+test_anime_engine.py
+avatar.mod_anime_engineモジュールのユニットテスト
+"""
+
+import sys
+import pytest
+
+from pvv_mcp_server.avatar import mod_anime_engine
+from pvv_mcp_server.avatar.mod_anime_engine import AnimeEngine
+
+
+class FakeAnime:
+    """part_listだけを持つアニメーション"""
+
+    def __init__(self, engine, config):
+        files = ["01.png", "02.png", "03.png"]
+        self.part_list = [engine.create_part(name, files, config) for name in ("目", "口")]
+
+
+@pytest.fixture
+def loop_config():
+    """ループのパーツ設定"""
+    return {"selected_files": ["02.png", "03.png"], "interval_ms": 50, "anime_type": "ループ"}
+
+
+class TestAnimeEngine:
+    """AnimeEngineのテスト"""
+
+    def test_no_qt(self):
+        """エンジンはQtに依存しない"""
+        module = sys.modules["pvv_mcp_server.avatar.mod_anime_engine"]
+        assert not any(name.startswith("PySide6") for name in vars(module))
+
+    def test_create_part_uses_engine_rng(self):
+        """作成したパーツはエンジンの乱数を使う"""
+        engine = AnimeEngine(seed=0)
+
+        part = engine.create_part("目", ["01.png"])
+
+        assert part.rng is engine.rng
+
+    def test_advance_reports_changed_parts(self, loop_config):
+        """表示画像が変わったパーツだけを報告する"""
+        times = iter([0.0, 0.0, 0.05])
+        engine = AnimeEngine(clock=lambda: next(times), seed=0)
+        moving = FakeAnime(engine, loop_config)
+        still = FakeAnime(engine, {"interval_ms": 50})
+
+        assert engine.advance([moving, still]) == {moving: [], still: []}
+        changed = engine.advance([moving, still])
+
+        assert changed[moving] == moving.part_list
+        assert changed[still] == []
+
+    def test_advance_uses_clock(self):
+        """advanceの度に時計を読み、tick数を数える"""
+        times = iter([0.0, 1.5, 2.0])
+        engine = AnimeEngine(clock=lambda: next(times), seed=0)
+
+        engine.advance([])
+        engine.advance([])
+
+        assert engine.now == 2.0
+        assert engine.tick_count == 2
+
+    def test_seed_is_reproducible(self):
+        """同じシードなら同じアニメーションになる"""
+        config = {"selected_files": ["02.png", "03.png"], "interval_ms": 50, "anime_type": "ランダムB"}
+
+        def run(seed):
+            times = iter(i * 0.05 for i in range(1000))
+            engine = AnimeEngine(clock=lambda: next(times), seed=seed)
+            anime = FakeAnime(engine, config)
+            frames = []
+            for _ in range(300):
+                engine.advance([anime])
+                frames.append(tuple(part.shown_image() for part in anime.part_list))
+            return frames
+
+        assert run(3) == run(3)
+
+    def test_get_engine_shared(self, monkeypatch):
+        """get_engineは共有のエンジンを返す"""
+        monkeypatch.setattr(mod_anime_engine, "_engine", None)
+
+        assert mod_anime_engine.get_engine() is mod_anime_engine.get_engine()
@@ -0,0 +1,182 @@
+"""
+test_asset_bundle.py
+mod_asset_bundleのユニットテスト
+"""
+
+import os
+import zipfile
+import pytest
+from unittest.mock import patch
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PySide6.QtGui import QImage, QColor
+
+import pvv_mcp_server.avatar.mod_asset_bundle as mod_asset_bundle
+from pvv_mcp_server.avatar.mod_load_image import load_image, close_image
+
+
+def _png_bytes(width, height, color):
+    """テスト用のPNGバイナリを作成"""
+    image = QImage(width, height, QImage.Format_ARGB32)
+    image.fill(QColor(color))
+    data = QByteArray()
+    buf = QBuffer(data)
+    buf.open(QIODevice.WriteOnly)
+    image.save(buf, "PNG")
+    buf.close()
+    return bytes(data)
+
+
+def _decode(png):
+    image = QImage()
+    image.loadFromData(png)
+    return image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+
+@pytest.fixture(autouse=True)
+def auto_compile():
+    """テストではバンドルの自動書き出しを有効にする"""
+    mod_asset_bundle.configure(True)
+    yield
+    mod_asset_bundle.configure(False)
+
+
+@pytest.fixture
+def zip_path(tmp_path):
+    """テスト用のキャラ素材ZIP"""
+    path = tmp_path / "avatar.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("avatar/目/00.png", _png_bytes(5, 4, Qt.red))
+        zf.writestr("avatar/目/01.png", _png_bytes(5, 4, Qt.blue))
+        # 内容が同一の画像
+        zf.writestr("avatar/口/00.png", _png_bytes(5, 4, Qt.red))
+        zf.writestr("avatar/体/00.png", _png_bytes(7, 9, QColor(0, 255, 0, 128)))
+    return str(path)
+
+
+class TestCompileBundle:
+    """compile_bundle関数のテスト"""
+
+    def test_compile_and_load(self, zip_path):
+        """コンパイルしたバンドルから同じ画像が得られる"""
+        assert mod_asset_bundle.compile_bundle(zip_path)
+        assert os.path.exists(mod_asset_bundle.bundle_path(zip_path))
+
+        zip_data = mod_asset_bundle.load_bundle(zip_path)
+
+        assert list(zip_data["目"].keys()) == ["00.png", "01.png"]
+        with zipfile.ZipFile(zip_path) as zf:
+            for cat, fname in [("目", "00.png"), ("目", "01.png"), ("口", "00.png"), ("体", "00.png")]:
+                expected = _decode(zf.read(f"avatar/{cat}/{fname}"))
+                image = zip_data[cat].decode(fname)
+                assert image.format() == QImage.Format_ARGB32_Premultiplied
+                assert image == expected
+
+    def test_dedup(self, zip_path):
+        """内容が同一の画像は1つにまとめられる"""
+        mod_asset_bundle.compile_bundle(zip_path)
+        bundle = mod_asset_bundle._Bundle(mod_asset_bundle.bundle_path(zip_path))
+
+        categories = bundle.manifest["categories"]
+        assert len(bundle.manifest["images"]) == 3
+        assert categories["目"]["00.png"] == categories["口"]["00.png"]
+
+    def test_pixel_data_aligned(self, zip_path):
+        """画素データの先頭は境界が揃っている"""
+        mod_asset_bundle.compile_bundle(zip_path)
+        bundle = mod_asset_bundle._Bundle(mod_asset_bundle.bundle_path(zip_path))
+
+        for offset, width, height, bytes_per_line in bundle.manifest["images"]:
+            assert offset % mod_asset_bundle._ALIGN == 0
+
+    def test_compile_broken_png(self, zip_path):
+        """デコードできないPNGがあればバンドルを作らず、ZIPから読み込ませる"""
+        with zipfile.ZipFile(zip_path, "a") as zf:
+            zf.writestr("avatar/目/02.png", b"broken")
+
+        assert not mod_asset_bundle.compile_bundle(zip_path)
+        assert not os.path.exists(mod_asset_bundle.bundle_path(zip_path))
+
+        zip_data = load_image(zip_path)
+        assert sorted(zip_data["目"]) == ["00.png", "01.png", "02.png"]
+        close_image(zip_data)
+
+    def test_compile_missing_zip(self, tmp_path):
+        """ZIPが存在しない場合は失敗する"""
+        assert not mod_asset_bundle.compile_bundle(str(tmp_path / "none.zip"))
+        assert os.listdir(tmp_path) == []
+
+
+class TestLoadBundle:
+    """load_bundle/load_or_compile関数のテスト"""
+
+    def test_no_bundle(self, zip_path):
+        """バンドルが無ければNone"""
+        assert mod_asset_bundle.load_bundle(zip_path) is None
+
+    def test_stale_bundle(self, zip_path):
+        """元ZIPが更新されたバンドルは使わない"""
+        mod_asset_bundle.compile_bundle(zip_path)
+        with zipfile.ZipFile(zip_path, "a") as zf:
+            zf.writestr("avatar/目/02.png", _png_bytes(5, 4, Qt.green))
+
+        with patch.object(mod_asset_bundle._Bundle, "close", autospec=True,
+                          side_effect=mod_asset_bundle._Bundle.close) as mock_close:
+            assert mod_asset_bundle.load_bundle(zip_path) is None
+            # 使わないバンドルは閉じる(Windowsで再コンパイル時に上書きできるように)
+            mock_close.assert_called_once()
+
+        zip_data = mod_asset_bundle.load_or_compile(zip_path)
+        assert "02.png" in zip_data["目"]
+
+    def test_load_or_compile_once(self, zip_path):
+        """2回目以降はコンパイルしない"""
+        assert mod_asset_bundle.load_or_compile(zip_path) is not None
+
+        with patch.object(mod_asset_bundle, "compile_bundle") as mock_compile:
+            assert mod_asset_bundle.load_or_compile(zip_path) is not None
+            mock_compile.assert_not_called()
+
+    def test_broken_bundle(self, zip_path):
+        """壊れたバンドルはNone"""
+        with open(mod_asset_bundle.bundle_path(zip_path), "wb") as f:
+            f.write(b"broken")
+
+        assert mod_asset_bundle.load_bundle(zip_path) is None
+
+    def test_close(self, zip_path):
+        """閉じたバンドルはメモリマップを解放する"""
+        zip_data = mod_asset_bundle.load_or_compile(zip_path)
+        bundle = zip_data["目"]._bundle
+
+        close_image(zip_data)
+
+        assert bundle.mapped.closed
+
+    def test_no_auto_compile(self, zip_path):
+        """自動書き出しが無効ならバンドルを書き出さない"""
+        mod_asset_bundle.configure(False)
+
+        assert mod_asset_bundle.load_or_compile(zip_path) is None
+        zip_data = load_image(zip_path)
+
+        assert not os.path.exists(mod_asset_bundle.bundle_path(zip_path))
+        assert sorted(zip_data["目"]) == ["00.png", "01.png"]
+        close_image(zip_data)
+
+    def test_existing_bundle_used(self, zip_path):
+        """自動書き出しが無効でも、書き出し済みのバンドルは使う"""
+        mod_asset_bundle.compile_bundle(zip_path)
+        mod_asset_bundle.configure(False)
+
+        zip_data = mod_asset_bundle.load_or_compile(zip_path)
+
+        assert hasattr(zip_data["目"], "decode")
+        close_image(zip_data)
+
+    def test_load_image_uses_bundle(self, zip_path):
+        """load_imageはローカルZIPをバンドル経由で読み込む"""
+        zip_data = load_image(zip_path)
+
+        assert os.path.exists(mod_asset_bundle.bundle_path(zip_path))
+        assert hasattr(zip_data["目"], "decode")
+        assert sorted(zip_data["目"]) == ["00.png", "01.png"]
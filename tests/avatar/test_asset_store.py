@@ -0,0 +1,138 @@
+"""
+test_asset_store.py
+mod_asset_storeのユニットテスト
+"""
+
+import os
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+import pvv_mcp_server.avatar.mod_asset_store as mod_asset_store
+
+
+@pytest.fixture(autouse=True)
+def clear_store():
+    """テスト毎にストアを空にする"""
+    mod_asset_store.clear()
+    yield
+    mod_asset_store.clear()
+
+
+def _loader():
+    """呼ばれる毎に新しい画像データを返すローダー"""
+    return MagicMock(side_effect=lambda source, speaker: {"目": {"00.png": source}})
+
+
+class TestSourceKey:
+    """source_key関数のテスト"""
+
+    def test_local_path_normalized(self, tmp_path):
+        """同じファイルを指すパスは同じキー"""
+        path = str(tmp_path / "avatar.zip")
+        other = os.path.join(str(tmp_path), ".", "avatar.zip")
+        assert mod_asset_store.source_key(path) == mod_asset_store.source_key(other)
+
+    def test_url(self):
+        """URLはそのままキーになる"""
+        url = "https://example.com/avatar.zip"
+        assert mod_asset_store.source_key(url) == url
+
+    def test_portrait_per_speaker(self):
+        """ポートレートは話者毎に別のキー"""
+        assert mod_asset_store.source_key("portrait", "A") != mod_asset_store.source_key("portrait", "B")
+
+
+class TestAcquireRelease:
+    """acquire/release関数のテスト"""
+
+    def test_shared(self):
+        """同じソースは1回だけ読み込み、同じ画像データを返す"""
+        loader = _loader()
+
+        data1 = mod_asset_store.acquire("test.zip", "A", loader)
+        data2 = mod_asset_store.acquire("./test.zip", "B", loader)
+
+        assert data1 is data2
+        loader.assert_called_once_with("test.zip", "A")
+        assert mod_asset_store.refcount(data1) == 2
+
+    def test_different_source(self):
+        """異なるソースは別々に読み込む"""
+        loader = _loader()
+
+        data1 = mod_asset_store.acquire("a.zip", "A", loader)
+        data2 = mod_asset_store.acquire("b.zip", "A", loader)
+
+        assert data1 is not data2
+        assert loader.call_count == 2
+
+    def test_release_last_user(self):
+        """最後の利用者が解放したらデコード済み画像も破棄する"""
+        loader = _loader()
+        data1 = mod_asset_store.acquire("test.zip", "A", loader)
+        mod_asset_store.acquire("test.zip", "B", loader)
+
+        with patch("pvv_mcp_server.avatar.mod_image_cache.clear") as mock_clear:
+            mod_asset_store.release(data1)
+            mock_clear.assert_not_called()
+            assert mod_asset_store.refcount(data1) == 1
+
+            mod_asset_store.release(data1)
+            mock_clear.assert_called_once_with(data1)
+            assert mod_asset_store.refcount(data1) == 0
+
+        # 再度取得すると読み込み直す
+        data3 = mod_asset_store.acquire("test.zip", "A", loader)
+        assert data3 is not data1
+        assert loader.call_count == 2
+
+    def test_release_closes_files(self):
+        """最後の利用者が解放したら画像データのファイルを閉じる"""
+        members = MagicMock()
+        loader = MagicMock(return_value={"目": members})
+        data = mod_asset_store.acquire("test.zip", "A", loader)
+        mod_asset_store.acquire("test.zip", "B", loader)
+
+        mod_asset_store.release(data)
+        members.close.assert_not_called()
+
+        mod_asset_store.release(data)
+        members.close.assert_called_once_with()
+
+    def test_release_unknown(self):
+        """ストア管理外の画像データの解放は無視する"""
+        mod_asset_store.release({"目": {}})
+
+    def test_loader_error(self):
+        """読み込みに失敗した場合は参照を残さない"""
+        loader = MagicMock(side_effect=RuntimeError("error"))
+
+        with pytest.raises(RuntimeError):
+            mod_asset_store.acquire("test.zip", "A", loader)
+
+        assert mod_asset_store._entries == {}
+
+    def test_concurrent_acquire(self):
+        """複数スレッドから同時に取得しても読み込みは1回"""
+        calls = []
+
+        def slow_loader(source, speaker):
+            calls.append(source)
+            time.sleep(0.05)
+            return {"目": {}}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(mod_asset_store.acquire("test.zip", "A", slow_loader)))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert all(data is results[0] for data in results)
+        assert mod_asset_store.refcount(results[0]) == 4
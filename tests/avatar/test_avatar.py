@@ -5,6 +5,10 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import QPoint, Qt
 from PySide6.QtTest import QTest
 from pvv_mcp_server.avatar.mod_avatar import AvatarWindow
+import pvv_mcp_server.avatar.mod_asset_store as mod_asset_store
+import pvv_mcp_server.avatar.mod_window_backend as mod_window_backend
+import pvv_mcp_server.avatar.mod_window_tracker as mod_window_tracker
+import pvv_mcp_server.avatar.mod_avatar_layout as mod_avatar_layout
 
 
 @pytest.fixture(scope="module")
@@ -22,7 +26,8 @@ def mock_dependencies():
     """依存関係をモック化"""
     with patch('pvv_mcp_server.avatar.mod_avatar.load_image') as mock_load_image, \
          patch('pvv_mcp_server.avatar.mod_avatar.update_frame') as mock_update_frame, \
-         patch('pvv_mcp_server.avatar.mod_avatar.AvatarDialog') as mock_dialog, \
+         patch('pvv_mcp_server.avatar.mod_avatar.AvatarAnime') as mock_dialog, \
+         patch('pvv_mcp_server.avatar.mod_avatar.prepare_images') as mock_prepare_images, \
          patch('pvv_mcp_server.avatar.mod_avatar.pvv_mcp_server.avatar.mod_update_position') as mock_update_pos_module:
         
         # load_imageは空のzip_dataを返す
@@ -31,22 +36,32 @@ def mock_dependencies():
             '口': {}, '目': {}, '眉': {}, '他': {}
         }
         
-        # AvatarDialogのモックインスタンスを設定
+        # AvatarAnimeのモックインスタンスを設定
         mock_dialog_instance = MagicMock()
         mock_dialog_instance.save_config.return_value = {
             "parts": {},
             "timer_interval": 50
         }
+        mock_dialog_instance.editor = None
         mock_dialog.return_value = mock_dialog_instance
         
         # mod_update_position.update_positionのモック
         mock_update_pos_module.update_position = MagicMock()
+
+        # 共有の画像データはテスト毎に破棄する
+        mod_asset_store.clear()
+
+        # 追随対象ウィンドウはメモリ上の仮想ウィンドウ
+        mod_window_backend.set_backend(mod_window_backend.FakeWindowBackend())
+        mod_avatar_layout.clear()
+        mod_window_tracker.clear()
         
         yield {
             'load_image': mock_load_image,
             'update_frame': mock_update_frame,
             'dialog': mock_dialog,
             'dialog_instance': mock_dialog_instance,
+            'prepare_images': mock_prepare_images,
             'update_position_module': mock_update_pos_module
         }
 
@@ -81,13 +96,14 @@ class TestAvatarWindow:
         # load_imageが呼ばれたことを確認
         mock_dependencies['load_image'].assert_called_once_with("test.zip", "テスト話者")
         
-        # タイマーが開始されていることを確認
-        assert avatar.frame_timer.isActive()
-        assert avatar.follow_timer.isActive()
+        # 共通のスケジューラでアニメーション・位置追随が開始されていることを確認
+        assert avatar in avatar.scheduler.avatars
+        assert avatar.scheduler.timer.isActive()
+        assert avatar.animating
+        assert avatar.follow_enabled
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_init_default_anime_types(self, qapp, mock_dependencies):
         """anime_typesがNoneの場合のデフォルト値テスト"""
@@ -101,8 +117,7 @@ class TestAvatarWindow:
         assert avatar.anime_type == "立ち絵"
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_save_config(self, qapp, mock_dependencies):
         """save_config()のテスト"""
@@ -133,8 +148,7 @@ class TestAvatarWindow:
         assert "口パク" in config["dialogs"]
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_load_config(self, qapp, mock_dependencies):
         """load_config()のテスト"""
@@ -172,8 +186,7 @@ class TestAvatarWindow:
         mock_dependencies['dialog_instance'].load_config.assert_called()
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_set_anime_type(self, qapp, mock_dependencies):
         """set_anime_type()のテスト"""
@@ -193,8 +206,28 @@ class TestAvatarWindow:
         mock_dependencies['dialog_instance'].start_oneshot.assert_called()
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
+    
+    def test_post_anime_type(self, qapp, mock_dependencies):
+        """post_anime_type()は次のtickで表示・反映し、Futureを完了する"""
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            anime_types=["立ち絵", "口パク"]
+        )
+        avatar.hide()
+        
+        future = avatar.post_anime_type("口パク")
+        assert avatar.anime_type == "立ち絵"
+        
+        avatar.scheduler.tick()
+        
+        assert avatar.isVisible()
+        assert avatar.anime_type == "口パク"
+        assert future.result(timeout=0) == "口パク"
+        
+        # クリーンアップ
+        avatar.dispose()
     
     def test_set_anime_type_invalid(self, qapp, mock_dependencies):
         """無効なanime_typeを指定した場合のテスト"""
@@ -213,8 +246,7 @@ class TestAvatarWindow:
         assert avatar.anime_type == original_type
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_set_frame_timer_interval(self, qapp, mock_dependencies):
         """set_frame_timer_interval()のテスト"""
@@ -228,14 +260,13 @@ class TestAvatarWindow:
         
         # 間隔が変更されていること
         assert avatar.frame_timer_interval == 200
-        assert avatar.frame_timer.interval() == 200
+        assert avatar.scheduler.divider(avatar.frame_timer_interval) == 4
         
         # ダイアログの間隔も変更されたこと
         mock_dependencies['dialog_instance'].set_frame_timer_interval.assert_called_with(200)
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_set_position(self, qapp, mock_dependencies):
         """set_position()のテスト"""
@@ -252,8 +283,7 @@ class TestAvatarWindow:
         assert avatar.position == "left_in"
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_set_flip(self, qapp, mock_dependencies):
         """set_flip()のテスト"""
@@ -273,8 +303,7 @@ class TestAvatarWindow:
         mock_dependencies['dialog_instance'].set_flip.assert_called_with(True)
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_set_scale(self, qapp, mock_dependencies):
         """set_scale()のテスト"""
@@ -294,8 +323,27 @@ class TestAvatarWindow:
         mock_dependencies['dialog_instance'].set_scale.assert_called_with(50)
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
+    
+    def test_config_changed(self, qapp, mock_dependencies):
+        """設定を変更する度にconfig_revisionを進め、config_changedを通知する"""
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            position="right_out"
+        )
+        changed = MagicMock()
+        avatar.config_changed.connect(changed)
+        
+        avatar.set_position("left_in")
+        avatar.set_flip(True)
+        avatar.set_scale(80)
+        
+        assert avatar.config_revision == 3
+        assert changed.call_count == 3
+        
+        # クリーンアップ
+        avatar.dispose()
     
     def test_update_position(self, qapp, mock_dependencies):
         """update_position()のテスト"""
@@ -311,8 +359,7 @@ class TestAvatarWindow:
         mock_dependencies['update_position_module'].update_position.assert_called_with(avatar)
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_mouse_press_event(self, qapp, mock_dependencies):
         """mousePressEvent()のテスト"""
@@ -321,8 +368,8 @@ class TestAvatarWindow:
             speaker_name="テスト話者"
         )
         
-        # follow_timerが動いていることを確認
-        assert avatar.follow_timer.isActive()
+        # 位置追随が有効なことを確認
+        assert avatar.follow_enabled
         
         # 左クリックイベントをシミュレート
         event = MagicMock()
@@ -336,11 +383,11 @@ class TestAvatarWindow:
         # ドラッグ位置が設定されていること
         assert avatar._drag_pos is not None
         
-        # follow_timerが停止していること
-        assert not avatar.follow_timer.isActive()
+        # 位置追随が停止していること
+        assert not avatar.follow_enabled
         
         # クリーンアップ
-        avatar.frame_timer.stop()
+        avatar.dispose()
     
     def test_mouse_move_event(self, qapp, mock_dependencies):
         """mouseMoveEvent()のテスト"""
@@ -364,8 +411,7 @@ class TestAvatarWindow:
             mock_move.assert_called_once()
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_mouse_release_event(self, qapp, mock_dependencies):
         """mouseReleaseEvent()のテスト"""
@@ -387,8 +433,7 @@ class TestAvatarWindow:
         assert avatar._drag_pos is None
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_right_click_context_menu(self, qapp, mock_dependencies):
         """right_click_context_menu()のテスト"""
@@ -406,8 +451,7 @@ class TestAvatarWindow:
             mock_menu.assert_called_once_with(avatar, position)
             
             # クリーンアップ
-            avatar.frame_timer.stop()
-            avatar.follow_timer.stop()
+            avatar.dispose()
     
     def test_show_override(self, qapp, mock_dependencies):
         """show()のオーバーライドテスト"""
@@ -424,8 +468,7 @@ class TestAvatarWindow:
         
         # クリーンアップ
         avatar.hide()
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
     
     def test_dialogs_created(self, qapp, mock_dependencies):
         """ダイアログが正しく作成されるテスト"""
@@ -436,23 +479,409 @@ class TestAvatarWindow:
         )
         
         # 各anime_typeに対してダイアログが作成されていること
-        assert "立ち絵" in avatar.dialogs
-        assert "口パク" in avatar.dialogs
-        assert "瞬き" in avatar.dialogs
+        assert "立ち絵" in avatar.animes
+        assert "口パク" in avatar.animes
+        assert "瞬き" in avatar.animes
         
-        # AvatarDialogが3回呼ばれたこと
+        # AvatarAnimeが3回呼ばれたこと
         assert mock_dependencies['dialog'].call_count == 3
         
         # クリーンアップ
-        avatar.frame_timer.stop()
-        avatar.follow_timer.stop()
+        avatar.dispose()
+    
+    def test_editor_created_on_demand(self, qapp, mock_dependencies):
+        """編集ダイアログは初回のopen_editor()で作成されるテスト"""
+        with patch('pvv_mcp_server.avatar.mod_avatar.AvatarDialog') as mock_editor:
+            avatar = AvatarWindow(
+                style_id=1,
+                speaker_name="テスト話者",
+                anime_types=["立ち絵", "口パク"]
+            )
+            
+            # 起動時には作成しない
+            mock_editor.assert_not_called()
+            
+            editor = avatar.open_editor("立ち絵")
+            
+            # 2回目以降は同じダイアログを返す
+            assert avatar.open_editor("立ち絵") is editor
+            mock_editor.assert_called_once_with(avatar, avatar.animes["立ち絵"])
+            assert avatar.animes["立ち絵"].editor is editor
+        
+        # クリーンアップ
+        avatar.dispose()
+
+
+
+def _wait_loaded(qapp, avatar, timeout=5.0):
+    """画像の読み込み完了を待つ"""
+    import time
+    end = time.monotonic() + timeout
+    while avatar.loading and time.monotonic() < end:
+        qapp.processEvents()
+        time.sleep(0.01)
+    assert not avatar.loading
+
+
+class TestAvatarWindowScheduler:
+    """共通のスケジューラによる更新のテスト"""
+
+    def test_tick_updates_frame_and_position(self, qapp, mock_dependencies):
+        """スケジューラのtickでフレーム更新・位置追随が行われる"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者")
+        avatar.show()
+        mock_dependencies['update_frame'].reset_mock()
+        avatar.tracker = MagicMock()
+
+        scheduler = avatar.scheduler
+        for _ in range(scheduler.divider(avatar.follow_timer_interval)):
+            scheduler.tick()
+
+        mock_dependencies['update_frame'].assert_called_with(avatar, [])
+        avatar.tracker.poll.assert_called()
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_follow_disabled(self, qapp, mock_dependencies):
+        """位置追随をOFFにするとtickで位置を更新しない"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者")
+        avatar.show()
+        avatar.set_follow(False)
+        avatar.tracker = MagicMock()
+
+        for _ in range(avatar.scheduler.divider(avatar.follow_timer_interval)):
+            avatar.scheduler.tick()
+
+        avatar.tracker.poll.assert_not_called()
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_set_follow_relayouts(self, qapp, mock_dependencies):
+        """位置追随のON/OFFで、同じ追随対象のアバターを配置し直す"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者")
+        mock_dependencies['update_position_module'].update_position.reset_mock()
+
+        avatar.set_follow(False)
+        mock_dependencies['update_position_module'].update_position.assert_called_once_with(avatar)
+        assert not avatar.follow_enabled
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_follow_unsupported(self, qapp, mock_dependencies):
+        """位置追随に対応していない環境では追随を無効にし、ONにもできない"""
+        mod_window_backend.set_backend(None)
+        mod_avatar_layout.clear()
+        mod_window_tracker.clear()
+
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者")
+        assert not avatar.follow_enabled
+
+        avatar.set_follow(True)
+        assert not avatar.follow_enabled
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_set_app_title(self, qapp, mock_dependencies):
+        """追随対象を変えると、対象のウィンドウタイトルの配置・トラッカーに移る"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者", app_title="OldApp")
+        old_layout = avatar.avatar_layout
+
+        avatar.set_app_title("NewApp")
+
+        assert avatar.app_title == "NewApp"
+        assert avatar.avatar_layout is not old_layout
+        assert avatar.tracker is avatar.avatar_layout.tracker
+        assert avatar.tracker.title == "NewApp"
+        assert avatar in avatar.avatar_layout.avatars
+        assert avatar not in old_layout.avatars
+
+        # クリーンアップ
+        avatar.dispose()
+        assert avatar not in avatar.avatar_layout.avatars
+
+    def test_same_position_not_overlapped(self, qapp, mock_dependencies):
+        """同じ位置のアバターは重ならないように並べる"""
+        backend = mod_window_backend.FakeWindowBackend()
+        backend.add_window("TestApp", (1000, 100, 1200, 800))
+        mod_window_backend.set_backend(backend)
+        mod_avatar_layout.clear()
+        mod_window_tracker.clear()
+        mod_avatar_layout.configure("stack")
+        # update_positionは実際の配置を行う
+        mock_dependencies['update_position_module'].update_position.side_effect = \
+            lambda avatar: avatar.avatar_layout.update()
+
+        avatar1 = AvatarWindow(style_id=1, speaker_name="テスト話者1", app_title="TestApp", position="right_in")
+        avatar2 = AvatarWindow(style_id=2, speaker_name="テスト話者2", app_title="TestApp", position="right_in")
+        avatar1.resize(300, 500)
+        avatar2.resize(300, 500)
+        avatar1.show()
+        avatar2.show()
+        avatar1.tracker.poll()
+
+        assert (avatar1.x(), avatar1.y()) == (1900, 400)
+        assert (avatar2.x(), avatar2.y()) == (1600, 400)
+
+        # クリーンアップ
+        avatar1.dispose()
+        avatar2.dispose()
+        mod_avatar_layout.configure()
+
+
+class TestAvatarWindowIdle:
+    """アイドル状態(省電力)のテスト"""
+
+    def test_idle_after_timeout(self, qapp, mock_dependencies):
+        """発話・感情表現がidle_timeout秒無ければアイドル状態になる"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者", idle_timeout=60)
+
+        assert not avatar.is_idle(avatar.last_active + 59)
+        assert avatar.is_idle(avatar.last_active + 60)
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_set_anime_type_wakes(self, qapp, mock_dependencies):
+        """set_anime_type()でアイドル状態から即座に通常の更新間隔に戻る"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者", idle_timeout=60)
+        avatar.show()
+        avatar.last_active -= 60
+        avatar.scheduler.tick()
+        assert avatar.scheduler.power_save
+
+        avatar.set_anime_type("口パク")
+
+        assert not avatar.is_idle(avatar.last_active)
+        assert not avatar.scheduler.power_save
+
+        # クリーンアップ
+        avatar.dispose()
 
+    def test_hidden_not_updated(self, qapp, mock_dependencies):
+        """非表示のアバターはフレーム更新しない"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者")
+        avatar.hide()
+        mock_dependencies['update_frame'].reset_mock()
+
+        avatar.scheduler.tick()
+
+        mock_dependencies['update_frame'].assert_not_called()
+
+        # クリーンアップ
+        avatar.dispose()
+
+
+class TestAvatarWindowAsyncLoad:
+    """画像の非同期読み込みのテスト"""
+
+    def test_placeholder_while_loading(self, qapp, mock_dependencies):
+        """読み込み中はプレースホルダーを表示し、フレーム更新しない"""
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            anime_types=["立ち絵", "口パク"],
+            async_load=True
+        )
+
+        # 読み込み完了の通知はGUIスレッドのイベント処理で反映される
+        assert avatar.loading
+        assert avatar.animes == {}
+        assert "読み込み中" in avatar.label.text()
+        assert not avatar.animating
+        assert avatar.follow_enabled
+
+        _wait_loaded(qapp, avatar)
+
+        assert set(avatar.animes) == {"立ち絵", "口パク"}
+        assert avatar.label.text() == ""
+        assert avatar.animating
+        mock_dependencies['load_image'].assert_called_once_with(None, "テスト話者")
+        mock_dependencies['update_frame'].assert_called_with(avatar)
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_set_anime_type_buffered(self, qapp, mock_dependencies):
+        """読み込み中のset_anime_typeは読み込み完了後に反映される"""
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            anime_types=["立ち絵", "口パク"],
+            async_load=True
+        )
+
+        avatar.set_anime_type("口パク")
+        assert avatar.anime_type == "立ち絵"
+        mock_dependencies['dialog_instance'].start_oneshot.assert_not_called()
+
+        _wait_loaded(qapp, avatar)
+
+        assert avatar.anime_type == "口パク"
+        mock_dependencies['dialog_instance'].start_oneshot.assert_called_once()
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_save_config_while_loading(self, qapp, mock_dependencies):
+        """読み込み中のsave_configは受け取った設定を引き継ぐ"""
+        config = {"dialogs": {"立ち絵": {"parts": {"目": {}}}}}
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            anime_types=["立ち絵", "口パク"],
+            config=config,
+            async_load=True
+        )
+
+        saved = avatar.save_config()
+        assert saved["dialogs"] == config["dialogs"]
+
+        _wait_loaded(qapp, avatar)
+
+        # ダイアログは受け取った設定で作成される
+        mock_dependencies['dialog'].assert_any_call(
+            avatar.zip_data, 100, False, 50, {"parts": {"目": {}}})
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_images_prepared_in_loader(self, qapp, mock_dependencies):
+        """表示するパーツは読み込みスレッドでデコードしておく"""
+        import threading
+        config = {"dialogs": {"立ち絵": {"parts": {"目": {}}}}}
+        threads = []
+        mock_dependencies['prepare_images'].side_effect = lambda *args: threads.append(threading.current_thread())
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            anime_types=["立ち絵", "口パク"],
+            config=config,
+            async_load=True
+        )
+
+        _wait_loaded(qapp, avatar)
+
+        mock_dependencies['prepare_images'].assert_has_calls([
+            call(avatar.zip_data, 100, False, 50, {"parts": {"目": {}}}),
+            call(avatar.zip_data, 100, False, 50, None),
+        ])
+        assert threads and threading.main_thread() not in threads
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_load_error(self, qapp, mock_dependencies):
+        """読み込みに失敗した場合は空の画像データで作成する"""
+        mock_dependencies['load_image'].side_effect = RuntimeError("error")
+
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            async_load=True
+        )
+
+        _wait_loaded(qapp, avatar)
+
+        assert avatar.zip_data["目"] == {}
+        assert "立ち絵" in avatar.animes
+
+        # クリーンアップ
+        avatar.dispose()
+
+    def test_dispose_while_loading(self, qapp, mock_dependencies):
+        """読み込み中に破棄した場合は、読み込んだ画像データを解放し、通知しない"""
+        import threading
+        import time
+        loading = threading.Event()
+        finish = threading.Event()
+
+        def slow_load(source, speaker):
+            loading.set()
+            finish.wait(5)
+            return {"目": {}}
+
+        mock_dependencies['load_image'].side_effect = slow_load
+        avatar = AvatarWindow(
+            style_id=1,
+            speaker_name="テスト話者",
+            async_load=True
+        )
+        on_loaded = MagicMock()
+        avatar.assets_loaded.connect(on_loaded)
+        assert loading.wait(5)
+
+        avatar.dispose()
+        finish.set()
+
+        end = time.monotonic() + 5
+        while mod_asset_store._entries and time.monotonic() < end:
+            time.sleep(0.01)
+        qapp.processEvents()
+
+        assert mod_asset_store._entries == {}
+        assert avatar.zip_data is None
+        assert avatar.animes == {}
+        on_loaded.assert_not_called()
+
+    def test_loaded_after_dispose(self, qapp, mock_dependencies):
+        """破棄後に読み込み完了の通知が届いた場合は画像データを解放する"""
+        avatar = AvatarWindow(style_id=1, speaker_name="テスト話者", zip_path="test.zip")
+        zip_data = mod_asset_store.acquire("test.zip", "テスト話者", mock_dependencies['load_image'])
+        assert mod_asset_store.refcount(zip_data) == 2
+
+        avatar.dispose()
+        avatar._on_assets_loaded(zip_data)
+
+        assert mod_asset_store.refcount(zip_data) == 0
+        assert avatar.zip_data is None
+
+
+class TestAvatarWindowSharedAssets:
+    """画像データの共有のテスト"""
+
+    def test_same_source_shared(self, qapp, mock_dependencies):
+        """同じ画像ソースのアバターは画像データを共有する"""
+        avatar1 = AvatarWindow(style_id=1, speaker_name="テスト話者", zip_path="test.zip", flip=False)
+        avatar2 = AvatarWindow(style_id=2, speaker_name="テスト話者", zip_path="./test.zip", flip=True, scale_percent=50)
+
+        assert avatar1.zip_data is avatar2.zip_data
+        mock_dependencies['load_image'].assert_called_once()
+        assert mod_asset_store.refcount(avatar1.zip_data) == 2
+
+        # クリーンアップ
+        avatar1.dispose()
+        avatar2.dispose()
+
+    def test_dispose_releases(self, qapp, mock_dependencies):
+        """dispose()で画像データを解放する"""
+        avatar1 = AvatarWindow(style_id=1, speaker_name="テスト話者", zip_path="test.zip")
+        avatar2 = AvatarWindow(style_id=2, speaker_name="テスト話者", zip_path="test.zip")
+        zip_data = avatar1.zip_data
+
+        avatar1.dispose()
+        assert not avatar1.animating
+        assert avatar1 not in avatar1.scheduler.avatars
+        assert mod_asset_store.refcount(zip_data) == 1
+
+        avatar2.dispose()
+        assert mod_asset_store.refcount(zip_data) == 0
+
+        # 再度作成すると読み込み直す
+        avatar3 = AvatarWindow(style_id=3, speaker_name="テスト話者", zip_path="test.zip")
+        assert mock_dependencies['load_image'].call_count == 2
+
+        # クリーンアップ
+        avatar3.dispose()
 
 class TestAvatarWindowIntegration:
     """統合テスト(モックなし)"""
     
     @patch('pvv_mcp_server.avatar.mod_avatar.load_image')
-    @patch('pvv_mcp_server.avatar.mod_avatar.AvatarDialog')
+    @patch('pvv_mcp_server.avatar.mod_avatar.AvatarAnime')
     @patch('pvv_mcp_server.avatar.mod_avatar.pvv_mcp_server.avatar.mod_update_position')
     def test_config_roundtrip(self, mock_update_pos, mock_dialog, mock_load_image, qapp):
         """save_config→load_configのラウンドトリップテスト"""
@@ -462,7 +891,7 @@ class TestAvatarWindowIntegration:
             '口': {}, '目': {}, '眉': {}, '他': {}
         }
         
-        # AvatarDialogのモック設定
+        # AvatarAnimeのモック設定
         mock_dialog_instance = MagicMock()
         mock_dialog_instance.save_config.return_value = {"parts": {}}
         mock_dialog.return_value = mock_dialog_instance
@@ -496,7 +925,5 @@ class TestAvatarWindowIntegration:
         assert avatar2.scale_percent == 75
         
         # クリーンアップ
-        avatar1.frame_timer.stop()
-        avatar1.follow_timer.stop()
-        avatar2.frame_timer.stop()
-        avatar2.follow_timer.stop()
\ No newline at end of file
+        avatar1.dispose()
+        avatar2.dispose()
\ No newline at end of file
@@ -0,0 +1,350 @@
+"""
+test_avatar_anime.py
+avatar.mod_avatar_animeモジュールのユニットテスト
+"""
+
+import pytest
+from unittest.mock import ANY, MagicMock, patch
+from collections import defaultdict
+
+from pvv_mcp_server.avatar import mod_avatar_anime
+from pvv_mcp_server.avatar.mod_avatar_anime import AvatarAnime
+
+
+PARTS = ['後', '体', '顔', '髪', '口', '目', '眉', '服下', '服上', '全', '他']
+
+
+@pytest.fixture
+def mock_zip_dat():
+    """zipデータのモック"""
+    zip_dat = defaultdict(dict)
+    # 各パーツカテゴリにダミーファイルを追加
+    for part in PARTS:
+        zip_dat[part][f"{part}_01.png"] = b"dummy_png_data_1"
+        zip_dat[part][f"{part}_02.png"] = b"dummy_png_data_2"
+    return zip_dat
+
+
+@pytest.fixture
+def test_config():
+    """テスト用設定"""
+    return {
+        "parts": {
+            "顔": {
+                "base_image": "顔_02.png",
+                "selected_files": ["顔_01.png", "顔_02.png"],
+            },
+            "目": {
+                "base_image": "目_01.png",
+                "selected_files": ["目_02.png"],
+            }
+        }
+    }
+
+
+def create_part_model_side_effect(*args, **kwargs):
+    """
+    AvatarPartModelの生成時に呼び出される関数。
+    カテゴリ名に基づいてモックのshown_image()の戻り値を設定する。
+    """
+    part_category = args[0] if args else "後"
+
+    mock = MagicMock()
+    mock.base_image = f"{part_category}_01.png"
+    mock.selected_files = []
+    mock.save_config.return_value = {"base_image": f"{part_category}_01.png"}
+    mock.tick.return_value = True
+    mock.shown_image.return_value = f"{part_category}_01.png"
+    return mock
+
+
+@pytest.fixture
+def mock_part_model():
+    """AvatarPartModelのモック"""
+    with patch('pvv_mcp_server.avatar.mod_anime_engine.AvatarPartModel') as mock_class, \
+         patch('pvv_mcp_server.avatar.mod_image_cache.get_image'):
+        mock_class.side_effect = create_part_model_side_effect
+        yield mock_class
+
+
+class TestAvatarAnimeInit:
+    """__init__メソッドのテスト"""
+
+    def test_init_without_config(self, mock_part_model, mock_zip_dat):
+        """設定なしでの初期化"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        assert anime.zip_dat is mock_zip_dat
+        assert anime.scale == 50
+        assert anime.flip == False
+        assert anime.frame_timer_interval == 100
+        assert anime.current_pixmap is None
+        assert anime.editor is None
+
+        # 全カテゴリのパーツが作成されたことを確認
+        assert list(anime.part_models) == PARTS
+        mock_part_model.assert_any_call('目', ['目_01.png', '目_02.png'], None, rng=ANY, tick_ms=100)
+
+    def test_init_with_config(self, mock_part_model, mock_zip_dat, test_config):
+        """設定ありでの初期化"""
+        AvatarAnime(mock_zip_dat, 75, True, 50, test_config)
+
+        mock_part_model.assert_any_call('顔', ['顔_01.png', '顔_02.png'], test_config["parts"]["顔"], rng=ANY, tick_ms=50)
+        mock_part_model.assert_any_call('口', ['口_01.png', '口_02.png'], None, rng=ANY, tick_ms=50)
+
+    def test_real_parts(self, mock_zip_dat, test_config):
+        """実際のパーツモデルで設定が反映される"""
+        with patch('pvv_mcp_server.avatar.mod_image_cache.get_image'):
+            anime = AvatarAnime(mock_zip_dat, 50, False, 100, test_config)
+
+        assert anime.part_models['顔'].base_image == "顔_02.png"
+        assert anime.part_models['目'].selected_files == ["目_02.png"]
+
+
+class TestAvatarAnimeConfig:
+    """save_config/load_configのテスト"""
+
+    def test_save_config(self, mock_part_model, mock_zip_dat):
+        """設定の保存"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        config = anime.save_config()
+
+        assert len(config["parts"]) == len(PARTS)
+        assert config["parts"]["目"] == {"base_image": "目_01.png"}
+
+    def test_load_config(self, mock_part_model, mock_zip_dat, test_config):
+        """設定の読み込み"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        anime.load_config(test_config)
+
+        anime.part_models['顔'].load_config.assert_called_once_with(test_config["parts"]["顔"], tick_ms=100)
+        anime.part_models['口'].load_config.assert_not_called()
+
+    def test_load_config_unknown_part(self, mock_part_model, mock_zip_dat):
+        """未知のパーツ名を含む設定の読み込み"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        # 例外が発生しないことを確認
+        anime.load_config({"parts": {"未知パーツ": {"base_image": "test.png"}}})
+
+    def test_load_config_refreshes_editor(self, mock_part_model, mock_zip_dat, test_config):
+        """編集ダイアログが作成済みなら表示を更新する"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime.editor = MagicMock()
+
+        anime.load_config(test_config)
+
+        anime.editor.refresh.assert_called_once()
+
+
+class TestAvatarAnimeSetters:
+    """setter系メソッドのテスト"""
+
+    def test_set_flip(self, mock_part_model, mock_zip_dat):
+        """左右反転の設定"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        anime.set_flip(True)
+        assert anime.flip == True
+
+    def test_set_scale(self, mock_part_model, mock_zip_dat):
+        """スケールの設定"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        anime.set_scale(75)
+        assert anime.scale == 75
+
+    def test_set_frame_timer_interval(self, mock_part_model, mock_zip_dat):
+        """フレーム更新間隔の設定"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        anime.set_frame_timer_interval(200)
+        assert anime.frame_timer_interval == 200
+
+    def test_start_oneshot(self, mock_part_model, mock_zip_dat):
+        """ワンショットアニメーションの開始"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+
+        anime.start_oneshot()
+
+        for part in anime.part_models.values():
+            part.start_oneshot.assert_called_once()
+
+
+class TestAvatarAnimeUpdateFrame:
+    """update_frameメソッドのテスト"""
+
+    def test_update_frame_no_parts(self, mock_part_model, mock_zip_dat):
+        """パーツなしでのフレーム更新"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        for part in anime.part_models.values():
+            part.shown_image.return_value = None
+
+        anime.update_frame()
+
+        assert anime.current_pixmap is None
+
+    def test_unchanged_frame_not_recomposed(self, mock_part_model, mock_zip_dat):
+        """パーツの組み合わせが変わらなければ再合成しない"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        mock_pixmap = MagicMock()
+        anime._compose_frame = MagicMock(return_value=mock_pixmap)
+
+        anime.update_frame()
+        anime.update_frame()
+        anime.update_frame()
+
+        anime._compose_frame.assert_called_once()
+        assert anime.get_current_pixmap() is mock_pixmap
+
+    def test_no_changed_parts_skips_frame(self, mock_part_model, mock_zip_dat):
+        """表示画像が変わったパーツが無ければ表示画像を確認しない"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+        anime.update_frame()
+
+        anime.part_models['口'].shown_image.reset_mock()
+        anime.update_frame(changed=[])
+
+        anime.part_models['口'].shown_image.assert_not_called()
+        anime._compose_frame.assert_called_once()
+
+    def test_invalidate_rechecks_parts(self, mock_part_model, mock_zip_dat):
+        """invalidate()後はパーツが変わっていなくても表示画像を確認する"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+        anime.update_frame()
+
+        # 編集ダイアログでパーツを無効にした
+        anime.part_models['口'].shown_image.return_value = None
+        anime.invalidate()
+        anime.update_frame(changed=[])
+
+        assert anime._compose_frame.call_count == 2
+
+    def test_update_frame_advances_engine(self, mock_zip_dat):
+        """引数なしのupdate_frame()はエンジンでこのアニメーションだけを進める"""
+        engine = MagicMock()
+        engine.advance.side_effect = lambda animes: {anime: [] for anime in animes}
+        with patch('pvv_mcp_server.avatar.mod_image_cache.get_image'):
+            anime = AvatarAnime(mock_zip_dat, 50, False, 100, None, engine=engine)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+
+        anime.update_frame()
+
+        engine.advance.assert_called_once_with([anime])
+        assert len(engine.create_part.call_args_list) == len(PARTS)
+
+    def test_cached_frame_reused(self, mock_part_model, mock_zip_dat):
+        """一度合成したフレームはキャッシュから再利用される"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+
+        anime.update_frame()
+        first_pixmap = anime.get_current_pixmap()
+
+        # 口だけ切り替えて戻す
+        anime.part_models['口'].shown_image.return_value = "口_02.png"
+        anime.update_frame()
+        anime.part_models['口'].shown_image.return_value = "口_01.png"
+        anime.update_frame()
+
+        assert anime._compose_frame.call_count == 2
+        assert anime.get_current_pixmap() is first_pixmap
+
+    def test_scale_and_flip_in_key(self, mock_part_model, mock_zip_dat):
+        """スケール・反転が変わると再合成される"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+
+        anime.update_frame()
+        anime.set_scale(75)
+        anime.update_frame()
+        anime.set_flip(True)
+        anime.update_frame()
+
+        assert anime._compose_frame.call_count == 3
+
+    def test_frame_version(self, mock_part_model, mock_zip_dat):
+        """表示フレームが変わった時だけフレーム番号が進む"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+        assert anime.frame_version == 0
+
+        anime.update_frame()
+        anime.update_frame()
+        assert anime.frame_version == 1
+
+        anime.part_models['口'].shown_image.return_value = "口_02.png"
+        anime.update_frame()
+        assert anime.frame_version == 2
+
+    def test_editor_preview_updated(self, mock_part_model, mock_zip_dat):
+        """編集ダイアログが作成済みならプレビューを更新する"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+
+        # 未作成でも例外にならない
+        anime.update_frame()
+
+        anime.editor = MagicMock()
+        anime.part_models['口'].shown_image.return_value = "口_02.png"
+        anime.update_frame()
+
+        anime.editor.update_preview.assert_called_once_with(anime.get_current_pixmap())
+
+    def test_parts_transformed_to_display_scale(self, mock_part_model, mock_zip_dat):
+        """パーツは現在の縮尺・反転で取得される"""
+        with patch('pvv_mcp_server.avatar.mod_image_cache.get_image') as mock_get_image, \
+             patch('pvv_mcp_server.avatar.mod_avatar_anime.QPixmap'):
+            anime = AvatarAnime(mock_zip_dat, 50, True, 100, None)
+            anime._compositor = MagicMock()
+
+            anime.update_frame()
+
+        mock_get_image.assert_any_call(mock_zip_dat, '目', '目_01.png', 50, True)
+        for args in mock_get_image.call_args_list:
+            assert args.args[3:] == (50, True)
+
+    def test_set_scale_prepares_images(self, mock_part_model, mock_zip_dat):
+        """スケール変更時に選択中のパーツを変換しておく"""
+        with patch('pvv_mcp_server.avatar.mod_image_cache.get_image') as mock_get_image:
+            anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+            anime.part_models['目'].base_image = '目_01.png'
+            anime.part_models['目'].selected_files = ['目_02.png']
+            mock_get_image.reset_mock()
+
+            anime.set_scale(75)
+
+        mock_get_image.assert_any_call(mock_zip_dat, '目', '目_01.png', 75, False)
+        mock_get_image.assert_any_call(mock_zip_dat, '目', '目_02.png', 75, False)
+
+    def test_cache_bounded(self, mock_part_model, mock_zip_dat):
+        """キャッシュは上限を超えると古いものから破棄される"""
+        anime = AvatarAnime(mock_zip_dat, 50, False, 100, None)
+        anime._compose_frame = MagicMock(side_effect=lambda files: MagicMock())
+
+        for i in range(mod_avatar_anime._FRAME_CACHE_SIZE + 5):
+            anime.part_models['口'].shown_image.return_value = f"口_{i:02}.png"
+            anime.update_frame()
+
+        assert len(anime._frame_cache) == mod_avatar_anime._FRAME_CACHE_SIZE
+
+
+class TestPrepareImages:
+    """prepare_images関数のテスト"""
+
+    def test_selected_images_cached(self, mock_zip_dat, test_config):
+        """設定で選択されているパーツだけを、縮尺・反転を指定して画像キャッシュに載せる"""
+        with patch('pvv_mcp_server.avatar.mod_image_cache.get_image') as mock_get_image:
+            mod_avatar_anime.prepare_images(mock_zip_dat, 50, True, 100, test_config)
+
+        prepared = {(call.args[1], call.args[2]) for call in mock_get_image.call_args_list}
+        assert ("顔", "顔_01.png") in prepared
+        assert ("顔", "顔_02.png") in prepared
+        assert ("目", "目_02.png") in prepared
+        assert ("他", "他_02.png") not in prepared
+        assert all(call.args[0] is mock_zip_dat and call.args[3:] == (50, True)
+                   for call in mock_get_image.call_args_list)
@@ -0,0 +1,165 @@
+"""
+test_avatar_command.py
+avatar.mod_avatar_commandモジュールのユニットテスト
+"""
+
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from pvv_mcp_server.avatar.mod_avatar_command import AvatarCommandQueue
+
+
+def make_avatar():
+    """アバターのモック(draw()でフレームを描画する)"""
+    avatar = MagicMock()
+    avatar.frame_count = 0
+    return avatar
+
+
+def draw(*avatars):
+    """アバターがフレームを描画する"""
+    for avatar in avatars:
+        avatar.frame_count += 1
+
+
+class TestAvatarCommandQueue:
+    """AvatarCommandQueueのテスト"""
+
+    def test_drain_applies(self):
+        """積まれた操作を反映し、描画後のcomplete()でFutureが完了する"""
+        queue = AvatarCommandQueue()
+        avatar = make_avatar()
+
+        future = queue.post(avatar, "口パク")
+        assert not future.done()
+
+        applied = queue.drain()
+        avatar.showWindow.assert_called_once()
+        avatar.set_anime_type.assert_called_once_with("口パク")
+        assert not future.done()
+
+        draw(avatar)
+        queue.complete(applied)
+        assert future.result(timeout=0) == "口パク"
+        assert not queue.pending()
+
+    def test_wait_for_frame(self):
+        """画像の読み込み中などで描画されていなければ、描画されるまで完了しない"""
+        queue = AvatarCommandQueue()
+        avatar = make_avatar()
+        other = make_avatar()
+
+        future = queue.post(avatar, "口パク")
+        other_future = queue.post(other, "口パク")
+        queue.complete(queue.drain())
+        assert not future.done()
+        assert not other_future.done()
+
+        # 以降のtickで描画されたら完了する
+        draw(other)
+        queue.complete(queue.drain())
+        assert not future.done()
+        assert other_future.done()
+
+        draw(avatar)
+        queue.complete(queue.drain())
+        assert future.result(timeout=0) == "口パク"
+
+    def test_discard_waiting(self):
+        """描画待ちの操作も、アバターを破棄したら取り消す"""
+        queue = AvatarCommandQueue()
+        avatar = make_avatar()
+
+        future = queue.post(avatar, "口パク")
+        queue.complete(queue.drain())
+        queue.discard(avatar)
+
+        assert future.cancelled()
+
+    def test_coalesce_latest_wins(self):
+        """同じアバターへの反映前の操作は、最新のものだけを反映する"""
+        queue = AvatarCommandQueue()
+        avatar = make_avatar()
+        other = make_avatar()
+
+        futures = [queue.post(avatar, anime_type) for anime_type in ("口パク", "えがお", "立ち絵")]
+        queue.post(other, "口パク")
+        applied = queue.drain()
+        draw(avatar, other)
+        queue.complete(applied)
+
+        avatar.set_anime_type.assert_called_once_with("立ち絵")
+        other.set_anime_type.assert_called_once_with("口パク")
+        assert [future.result(timeout=0) for future in futures] == ["立ち絵"] * 3
+
+    def test_wakeup_once(self):
+        """キューが空の時に積まれた時だけ反映を依頼する"""
+        wakeup = MagicMock()
+        queue = AvatarCommandQueue(wakeup)
+        avatar = MagicMock()
+
+        queue.post(avatar, "口パク")
+        queue.post(avatar, "立ち絵")
+        assert wakeup.call_count == 1
+
+        queue.drain()
+        queue.post(avatar, "口パク")
+        assert wakeup.call_count == 2
+
+    def test_error(self):
+        """反映に失敗した操作のFutureは例外で完了する"""
+        queue = AvatarCommandQueue()
+        avatar = MagicMock()
+        avatar.set_anime_type.side_effect = RuntimeError("closed")
+
+        future = queue.post(avatar, "口パク")
+        queue.complete(queue.drain())
+
+        with pytest.raises(RuntimeError):
+            future.result(timeout=0)
+
+    def test_discard(self):
+        """破棄するアバターの操作は反映せず取り消す"""
+        queue = AvatarCommandQueue()
+        avatar = MagicMock()
+
+        future = queue.post(avatar, "口パク")
+        queue.discard(avatar)
+
+        assert queue.drain() == []
+        assert future.cancelled()
+        avatar.set_anime_type.assert_not_called()
+
+    def test_post_from_threads(self):
+        """複数のスレッドから積んでも、全てのFutureが完了する"""
+        queue = AvatarCommandQueue()
+        avatars = [make_avatar() for _ in range(4)]
+        futures = []
+        lock = threading.Lock()
+
+        def worker(avatar):
+            for anime_type in ("口パク", "立ち絵") * 50:
+                future = queue.post(avatar, anime_type)
+                with lock:
+                    futures.append(future)
+
+        threads = [threading.Thread(target=worker, args=(avatar,)) for avatar in avatars]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        applied = queue.drain()
+        draw(*avatars)
+        queue.complete(applied)
+
+        assert len(futures) == 400
+        assert all(future.done() for future in futures)
+        for avatar in avatars:
+            avatar.set_anime_type.assert_called_once_with("立ち絵")
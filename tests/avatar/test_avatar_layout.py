@@ -0,0 +1,203 @@
+"""
+test_avatar_layout.py
+mod_avatar_layoutのユニットテスト
+"""
+
+import pytest
+import sys
+from unittest.mock import Mock, MagicMock
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import pvv_mcp_server.avatar.mod_avatar_layout as mod_avatar_layout
+import pvv_mcp_server.avatar.mod_window_backend as mod_window_backend
+import pvv_mcp_server.avatar.mod_window_tracker as mod_window_tracker
+from pvv_mcp_server.avatar.mod_avatar_layout import AvatarLayout, solve, get_layout, configure
+
+# 追随対象ウィンドウ (x, y, width, height)
+TARGET = (1000, 100, 1200, 800)
+
+
+def make_avatar(position="right_in", width=300, height=500):
+    """配置するアバターのモック"""
+    avatar = Mock()
+    avatar.position = position
+    avatar.follow_enabled = True
+    avatar.isVisible.return_value = True
+    avatar.width.return_value = width
+    avatar.height.return_value = height
+    avatar.x.return_value = 0
+    avatar.y.return_value = 0
+    return avatar
+
+
+@pytest.fixture(autouse=True)
+def reset_globals():
+    """テスト毎に配置・トラッカーを破棄"""
+    yield
+    configure()
+    mod_avatar_layout.clear()
+    mod_window_tracker.clear()
+
+
+class TestSolve:
+    """solveのテスト"""
+
+    def test_single_avatar(self):
+        """1体だけなら位置設定どおりに置く"""
+        avatar = make_avatar("right_in")
+
+        assert solve(TARGET, [avatar]) == [(avatar, (1900, 400))]
+
+    def test_none(self):
+        """none(デフォルト): 同じ位置のアバターもそれぞれ位置設定どおりに置く"""
+        avatars = [make_avatar("right_in"), make_avatar("right_in", width=200)]
+
+        placements = solve(TARGET, avatars)
+
+        assert placements == [(avatars[0], (1900, 400)), (avatars[1], (2000, 400))]
+
+    def test_stack_right_in(self):
+        """stack: right_inは内側(左)へ横に並べる"""
+        avatars = [make_avatar("right_in"), make_avatar("right_in", width=200)]
+
+        placements = solve(TARGET, avatars, "stack")
+
+        assert placements == [(avatars[0], (1900, 400)), (avatars[1], (1700, 400))]
+
+    def test_stack_left_out(self):
+        """stack: left_outは外側(左)へ横に並べる"""
+        avatars = [make_avatar("left_out"), make_avatar("left_out")]
+
+        placements = solve(TARGET, avatars, "stack")
+
+        assert placements == [(avatars[0], (700, 400)), (avatars[1], (400, 400))]
+
+    def test_stack_separate_positions(self):
+        """位置が違うアバターは別々に並べる"""
+        left = make_avatar("left_in")
+        right = make_avatar("right_in")
+
+        placements = dict(solve(TARGET, [left, right], "stack"))
+
+        assert placements[left] == (1000, 400)
+        assert placements[right] == (1900, 400)
+
+    def test_tile(self):
+        """tile: 上に積み、ウィンドウの高さを超えたら外側に次の列を作る"""
+        avatars = [make_avatar("right_out", height=400) for _ in range(3)]
+
+        placements = solve(TARGET, avatars, "tile")
+
+        assert placements == [
+            (avatars[0], (2200, 500)),
+            (avatars[1], (2200, 100)),
+            (avatars[2], (2500, 500)),
+        ]
+
+    def test_offset(self):
+        """offset: 固定のオフセットずつ、アンカーの外側へずらす"""
+        avatars = [make_avatar("right_in") for _ in range(3)]
+
+        placements = solve(TARGET, avatars, "offset", (40, -30))
+
+        assert placements == [
+            (avatars[0], (1900, 400)),
+            (avatars[1], (1860, 370)),
+            (avatars[2], (1820, 340)),
+        ]
+
+    def test_unknown_position(self):
+        """不明な位置のアバターは配置しない"""
+        assert solve(TARGET, [make_avatar("unknown")]) == []
+
+
+class TestAvatarLayout:
+    """AvatarLayoutのテスト"""
+
+    def test_apply_moves_all(self):
+        """同じ追随対象のアバターを1回でまとめて配置する"""
+        layout = AvatarLayout(MagicMock(), "stack")
+        avatar1 = make_avatar()
+        avatar2 = make_avatar()
+        layout.add(avatar1)
+        layout.add(avatar2)
+
+        layout.apply(TARGET)
+
+        avatar1.move.assert_called_once_with(1900, 400)
+        avatar2.move.assert_called_once_with(1600, 400)
+
+    def test_not_solved_again_when_unchanged(self):
+        """追随対象・アバターのサイズが変わらなければ計算し直さない"""
+        layout = AvatarLayout(MagicMock())
+        avatar = make_avatar()
+        layout.add(avatar)
+
+        layout.apply(TARGET)
+        avatar.x.return_value, avatar.y.return_value = 0, 0
+        layout.apply(TARGET)
+        assert avatar.move.call_count == 1
+
+        # アバターのサイズが変わったら配置し直す
+        avatar.width.return_value = 200
+        layout.apply(TARGET)
+        avatar.move.assert_called_with(2000, 400)
+
+    def test_excludes_hidden_and_not_following(self):
+        """非表示・位置追随OFFのアバターは配置せず、残りで詰める"""
+        layout = AvatarLayout(MagicMock(), "stack")
+        hidden = make_avatar()
+        hidden.isVisible.return_value = False
+        dragged = make_avatar()
+        dragged.follow_enabled = False
+        avatar = make_avatar()
+        for a in (hidden, dragged, avatar):
+            layout.add(a)
+
+        layout.apply(TARGET)
+
+        hidden.move.assert_not_called()
+        dragged.move.assert_not_called()
+        avatar.move.assert_called_once_with(1900, 400)
+
+    def test_target_moved(self):
+        """トラッカーから通知されたら配置し直す"""
+        backend = mod_window_backend.FakeWindowBackend()
+        handle = backend.add_window("Test App", TARGET)
+        tracker = mod_window_tracker.WindowTracker("Test App", backend)
+        layout = AvatarLayout(tracker)
+        avatar = make_avatar()
+        layout.add(avatar)
+
+        tracker.poll()
+        backend.move_window(handle, (0, 100, 1200, 800))
+
+        avatar.move.assert_called_with(900, 400)
+
+
+class TestGetLayout:
+    """get_layout・configureのテスト"""
+
+    def test_shared_per_title(self):
+        """同じタイトルの配置は共有され、共有のトラッカーを使う"""
+        mod_window_backend.set_backend(mod_window_backend.FakeWindowBackend())
+
+        layout = get_layout("Test App")
+
+        assert get_layout("Test App") is layout
+        assert layout.tracker is mod_window_tracker.get_tracker("Test App")
+
+    def test_configure(self):
+        """configure()で作成済みの配置の配置方法も変わる"""
+        mod_window_backend.set_backend(mod_window_backend.FakeWindowBackend())
+        layout = get_layout("Test App")
+
+        configure("tile")
+        assert layout.mode == "tile"
+
+        configure("unknown")
+        assert layout.mode == "none"
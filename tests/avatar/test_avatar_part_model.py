@@ -0,0 +1,181 @@
+"""
+test_avatar_part_model.py
+AvatarPartModelクラスのユニットテスト
+"""
+
+import sys
+import random
+import pytest
+from unittest.mock import Mock
+
+from pvv_mcp_server.avatar.mod_avatar_part_model import AvatarPartModel
+
+
+def run(part, count, step=50):
+    """時刻0でアニメーションを開始し、step(ミリ秒)毎にcount回updateする"""
+    part.tick(0)
+    return [part.update(step * (i + 1)) for i in range(count)]
+
+
+@pytest.fixture
+def image_files():
+    """テスト用の画像ファイルリスト"""
+    return ["01.png", "02.png", "03.png"]
+
+
+class TestAvatarPartModelConfig:
+    """初期化と設定のテスト"""
+
+    def test_no_qt(self):
+        """モデルはQtに依存しない"""
+        assert not any(name.startswith("PySide6") for name in vars(sys.modules["pvv_mcp_server.avatar.mod_avatar_part_model"]))
+
+    def test_init_default_values(self, image_files):
+        """デフォルト値で初期化される"""
+        part = AvatarPartModel("目", image_files)
+
+        assert part.base_image == "01.png"
+        assert part.current_image == "01.png"
+        assert part.selected_files == []
+        assert part.anime_type == "固定"
+        assert part.is_enabled
+
+    def test_config_roundtrip(self, image_files):
+        """save_configした設定で同じ状態を復元できる"""
+        config = {
+            "part_name": "口",
+            "base_image": "02.png",
+            "selected_files": ["01.png", "03.png"],
+            "interval_ms": 150,
+            "anime_type": "ループ",
+            "is_enabled": False,
+        }
+        part = AvatarPartModel("口", image_files, config)
+
+        assert part.save_config() == config
+
+    def test_legacy_interval_migrated(self, image_files):
+        """旧形式(tick数)のintervalはミリ秒に変換される"""
+        part = AvatarPartModel("目", image_files, {"interval": 2}, tick_ms=100)
+
+        assert part.interval_ms == 300
+        assert "interval" not in part.save_config()
+
+    def test_set_anime_type(self, image_files):
+        """アニメーションタイプ変更でカウンタをリセットし、ワンショットを開始する"""
+        part = AvatarPartModel("目", image_files, {"selected_files": ["02.png"]})
+        part.tick(0)
+        part.loop_anime_idx = 1
+
+        part.set_anime_type("ワンショット")
+
+        assert part.anime_type == "ワンショット"
+        assert part.next_update is None
+        assert part.loop_anime_idx == 0
+        assert part.oneshot_idx == 1
+
+
+class TestAvatarPartModelAnimation:
+    """アニメーションのテスト"""
+
+    def test_fixed(self, image_files):
+        """固定はベース画像のまま"""
+        part = AvatarPartModel("目", image_files, {"base_image": "02.png", "interval_ms": 50})
+
+        assert run(part, 3) == ["02.png"] * 3
+
+    def test_loop(self, image_files):
+        """ループは選択画像を順番に表示する"""
+        part = AvatarPartModel("目", image_files, {
+            "selected_files": ["02.png", "03.png"], "interval_ms": 50, "anime_type": "ループ"})
+
+        assert run(part, 4) == ["02.png", "03.png", "02.png", "03.png"]
+
+    def test_oneshot(self, image_files):
+        """ワンショットは選択画像を一巡してベース画像に戻る"""
+        part = AvatarPartModel("口", image_files, {
+            "selected_files": ["02.png", "03.png"], "interval_ms": 50, "anime_type": "ワンショット"})
+
+        part.start_oneshot()
+
+        assert run(part, 4) == ["02.png", "03.png", "01.png", "01.png"]
+
+    def test_interval(self, image_files):
+        """interval_msの間は同じ画像を保持する"""
+        part = AvatarPartModel("目", image_files, {
+            "selected_files": ["02.png", "03.png"], "interval_ms": 100, "anime_type": "ループ"})
+
+        assert run(part, 4) == ["01.png", "02.png", "02.png", "03.png"]
+
+    def test_frame_rate_independent(self, image_files):
+        """フレームレートを変えても同じ時刻には同じ画像になる"""
+        config = {"selected_files": ["01.png", "02.png", "03.png"], "interval_ms": 100, "anime_type": "ループ"}
+        slow = AvatarPartModel("目", image_files, config)
+        fast = AvatarPartModel("目", image_files, config)
+
+        slow_frames = run(slow, 10, step=100)
+        fast_frames = run(fast, 40, step=25)
+
+        assert slow_frames == fast_frames[3::4]
+
+    def test_dropped_frames_catch_up(self, image_files):
+        """フレームが落ちても遅れた分のステップを進める"""
+        part = AvatarPartModel("目", image_files, {
+            "selected_files": ["01.png", "02.png", "03.png"], "interval_ms": 100, "anime_type": "ループ"})
+        part.tick(0)
+
+        # 300ms後まで呼ばれなかった → 3ステップ分進む
+        assert part.update(300) == "03.png"
+        assert part.update(400) == "01.png"
+
+    @pytest.mark.parametrize("anime_type", ["ループ", "ランダムA", "ランダムB", "ワンショット"])
+    def test_idle_interval_catch_up(self, image_files, anime_type):
+        """省電力時の長い更新間隔でも、短いinterval_msのパーツは毎ステップ進めた場合と同じ画像になる"""
+        config = {"selected_files": ["02.png", "03.png"], "interval_ms": 50, "anime_type": anime_type}
+        fine = AvatarPartModel("目", image_files, config, rng=random.Random(1))
+        coarse = AvatarPartModel("目", image_files, config, rng=random.Random(1))
+        fine.start_oneshot()
+        coarse.start_oneshot()
+
+        fine_frames = run(fine, 400, step=50)
+        coarse_frames = run(coarse, 40, step=500)
+
+        assert coarse_frames == fine_frames[9::10]
+
+    def test_random_a(self, image_files):
+        """ランダムAは待機後に選択画像をワンショット再生する"""
+        rng = Mock()
+        rng.choice.return_value = 2
+        part = AvatarPartModel("目", image_files, {
+            "selected_files": ["02.png"], "interval_ms": 50, "anime_type": "ランダムA"}, rng=rng)
+
+        assert run(part, 4) == ["01.png", "01.png", "02.png", "01.png"]
+
+    def test_disabled(self, image_files):
+        """無効なパーツはNone"""
+        part = AvatarPartModel("目", image_files, {"is_enabled": False})
+
+        assert part.update(0) is None
+
+    def test_no_images(self):
+        """画像が無いパーツはNone"""
+        part = AvatarPartModel("目", [])
+
+        assert part.base_image is None
+        assert part.update(0) is None
+
+    def test_tick_reports_change(self, image_files):
+        """tickは表示画像が変わった時だけTrueを返す"""
+        part = AvatarPartModel("目", image_files, {
+            "selected_files": ["01.png", "02.png"], "interval_ms": 100, "anime_type": "ループ"})
+
+        assert [part.tick(t) for t in range(0, 350, 50)] == [False, False, False, False, True, False, True]
+        assert part.shown_image() == "01.png"
+
+    def test_seeded_rng_is_reproducible(self, image_files):
+        """同じシードの乱数なら同じアニメーションになる"""
+        config = {"selected_files": ["02.png", "03.png"], "interval_ms": 50, "anime_type": "ランダムB"}
+        part1 = AvatarPartModel("目", image_files, config, rng=random.Random(1))
+        part2 = AvatarPartModel("目", image_files, config, rng=random.Random(1))
+
+        assert run(part1, 200) == run(part2, 200)
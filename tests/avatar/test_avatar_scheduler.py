@@ -0,0 +1,343 @@
+"""
+test_avatar_scheduler.py
+avatar.mod_avatar_schedulerモジュールのユニットテスト
+"""
+
+import sys
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from PySide6.QtWidgets import QApplication
+
+from pvv_mcp_server.avatar import mod_avatar_scheduler
+from pvv_mcp_server.avatar.mod_avatar_scheduler import AvatarScheduler
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    """QApplicationのフィクスチャ"""
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+    yield app
+
+
+class FakeEngine:
+    """全パーツが変化したと報告するエンジン"""
+
+    def __init__(self):
+        self.calls = []
+
+    def advance(self, animes):
+        self.calls.append(list(animes))
+        return {anime: ["changed"] for anime in animes}
+
+
+def make_avatar(name, visible=True, speaking=False, frame_interval=50, follow_interval=150, idle=False):
+    """スケジューラに登録するアバターのモック"""
+    avatar = MagicMock()
+    avatar.speaker_name = name
+    avatar.animating = True
+    avatar.follow_enabled = True
+    avatar.frame_timer_interval = frame_interval
+    avatar.follow_timer_interval = follow_interval
+    avatar.anime_types = ["立ち絵", "口パク"]
+    avatar.anime_type = "口パク" if speaking else "立ち絵"
+    avatar.animes = {"立ち絵": MagicMock(), "口パク": MagicMock()}
+    avatar.isVisible.return_value = visible
+    avatar.is_idle.return_value = idle
+    avatar.frame_count = 0
+
+    def tick_frame(changed):
+        avatar.frame_count += 1
+    avatar.tick_frame.side_effect = tick_frame
+    return avatar
+
+
+@pytest.fixture
+def engine():
+    return FakeEngine()
+
+
+@pytest.fixture
+def scheduler(qapp, engine):
+    scheduler = AvatarScheduler(engine=engine)
+    yield scheduler
+    scheduler.timer.stop()
+
+
+class TestAvatarScheduler:
+    """AvatarSchedulerのテスト"""
+
+    def test_single_timer(self, scheduler):
+        """登録したアバターがあれば1つのタイマーが動き、無くなれば止まる"""
+        avatar1 = make_avatar("a")
+        avatar2 = make_avatar("b")
+
+        scheduler.register(avatar1)
+        scheduler.register(avatar2)
+        assert scheduler.timer.isActive()
+
+        scheduler.unregister(avatar1)
+        assert scheduler.timer.isActive()
+        scheduler.unregister(avatar2)
+        assert not scheduler.timer.isActive()
+
+    def test_divider(self, scheduler):
+        """更新間隔は共通のtick数に丸められる"""
+        assert scheduler.divider(50) == 1
+        assert scheduler.divider(150) == 3
+        assert scheduler.divider(10) == 1
+
+    def test_batched_advance(self, scheduler, engine):
+        """同じtickで更新するアバターは1回のadvanceでまとめて進める"""
+        avatar1 = make_avatar("a")
+        avatar2 = make_avatar("b", frame_interval=100)
+        scheduler.register(avatar1)
+        scheduler.register(avatar2)
+
+        for _ in range(4):
+            scheduler.tick()
+
+        # 登録直後に1回更新し、以降は間隔の倍数のtickに揃える
+        anime1 = avatar1.animes["立ち絵"]
+        anime2 = avatar2.animes["立ち絵"]
+        assert engine.calls == [[anime1, anime2], [anime1, anime2], [anime1], [anime1, anime2]]
+        avatar1.tick_frame.assert_called_with(["changed"])
+        assert avatar2.tick_frame.call_count == 3
+
+    def test_follow(self, scheduler):
+        """位置追随は追随間隔のtick毎、有効なアバターだけ行う"""
+        avatar1 = make_avatar("a")
+        avatar2 = make_avatar("b")
+        avatar2.follow_enabled = False
+        scheduler.register(avatar1)
+        scheduler.register(avatar2)
+
+        for _ in range(6):
+            scheduler.tick()
+
+        # 登録直後・3tick目・6tick目
+        assert avatar1.tracker.poll.call_count == 3
+        avatar2.tracker.poll.assert_not_called()
+
+    def test_shared_tracker_polled_once(self, scheduler):
+        """同じウィンドウを追随するアバターはトラッカーを1tickに1回だけ確認する"""
+        tracker = MagicMock()
+        avatar1 = make_avatar("a")
+        avatar2 = make_avatar("b")
+        avatar1.tracker = tracker
+        avatar2.tracker = tracker
+        scheduler.register(avatar1)
+        scheduler.register(avatar2)
+
+        scheduler.tick()
+
+        assert tracker.poll.call_count == 1
+
+    def test_not_animating(self, scheduler, engine):
+        """読み込み中のアバターはアニメーションを進めない"""
+        avatar = make_avatar("a")
+        avatar.animating = False
+        scheduler.register(avatar)
+
+        scheduler.tick()
+
+        assert engine.calls == []
+        avatar.tick_frame.assert_not_called()
+
+    def test_budget_defers_low_priority(self, qapp, engine):
+        """バジェット超過時はアイドル・待機中のアバターから先送りする"""
+        # 時計を読む度に1秒進む → 最初の1体を描画した時点でバジェット超過
+        times = iter(range(1000))
+        scheduler = AvatarScheduler(engine=engine, frame_budget=0.5, clock=lambda: next(times))
+        idle = make_avatar("idle", idle=True, frame_interval=500)
+        waiting = make_avatar("waiting")
+        speaking = make_avatar("speaking", speaking=True)
+        for avatar in (idle, waiting, speaking):
+            scheduler.register(avatar)
+
+        scheduler.tick()
+        speaking.tick_frame.assert_called_once()
+        waiting.tick_frame.assert_not_called()
+        idle.tick_frame.assert_not_called()
+
+        # 先送りした分の変化は次のtickにまとめて描画される
+        speaking.animating = False
+        scheduler.tick()
+        waiting.tick_frame.assert_called_once_with(["changed", "changed"])
+        idle.tick_frame.assert_not_called()
+        scheduler.timer.stop()
+
+    def test_deferred_limit(self, qapp, engine):
+        """先送りが続いたアバターは優先度に関係なく描画する"""
+        times = iter(range(1000))
+        scheduler = AvatarScheduler(engine=engine, frame_budget=0.5, clock=lambda: next(times))
+        speaking = make_avatar("speaking", speaking=True)
+        waiting = make_avatar("waiting")
+        scheduler.register(speaking)
+        scheduler.register(waiting)
+
+        for _ in range(mod_avatar_scheduler.MAX_DEFERRED_TICKS + 1):
+            scheduler.tick()
+
+        waiting.tick_frame.assert_called_once()
+        scheduler.timer.stop()
+
+    def test_unregister_drops_pending(self, qapp, engine):
+        """登録解除したアバターの描画待ちは破棄される"""
+        times = iter(range(1000))
+        scheduler = AvatarScheduler(engine=engine, frame_budget=0.5, clock=lambda: next(times))
+        speaking = make_avatar("speaking", speaking=True)
+        waiting = make_avatar("waiting")
+        scheduler.register(speaking)
+        scheduler.register(waiting)
+        scheduler.tick()
+
+        scheduler.unregister(waiting)
+        scheduler.tick()
+
+        waiting.tick_frame.assert_not_called()
+        scheduler.timer.stop()
+
+
+class TestAvatarSchedulerPowerSave:
+    """省電力のテスト"""
+
+    def test_hidden_paused(self, scheduler, engine):
+        """非表示のアバターは位置追随・アニメーションを止める"""
+        hidden = make_avatar("hidden", visible=False)
+        scheduler.register(hidden)
+
+        for _ in range(3):
+            scheduler.tick()
+
+        assert engine.calls == []
+        hidden.tracker.poll.assert_not_called()
+        hidden.tick_frame.assert_not_called()
+
+    def test_stopped_when_all_hidden(self, scheduler):
+        """表示中のアバターが無ければクロックを止め、表示されたら再開する"""
+        hidden = make_avatar("hidden", visible=False)
+        scheduler.register(hidden)
+        assert scheduler.timer.isActive()
+
+        scheduler.tick()
+        assert not scheduler.timer.isActive()
+
+        hidden.isVisible.return_value = True
+        scheduler.resume()
+        assert scheduler.timer.isActive()
+
+    def test_resume_without_avatars(self, scheduler):
+        """登録されたアバターが無ければ再開しない"""
+        scheduler.resume()
+
+        assert not scheduler.timer.isActive()
+
+    def test_idle_interval(self, scheduler, engine):
+        """アイドル状態のアバターはアイドル間隔で更新する"""
+        idle = make_avatar("idle", idle=True)
+        active = make_avatar("active")
+        scheduler.register(idle)
+        scheduler.register(active)
+
+        for _ in range(scheduler.divider(scheduler.idle_interval)):
+            scheduler.tick()
+
+        # 登録直後と10tick目
+        assert sum(idle.animes["立ち絵"] in call for call in engine.calls) == 2
+        assert sum(active.animes["立ち絵"] in call for call in engine.calls) == 10
+
+    def test_power_save_when_all_idle(self, scheduler):
+        """全アバターがアイドル・非表示ならクロックを遅くする"""
+        scheduler.register(make_avatar("idle", idle=True))
+        scheduler.register(make_avatar("hidden", visible=False))
+
+        scheduler.tick()
+
+        assert scheduler.power_save
+        assert scheduler.timer.interval() == scheduler.idle_interval
+
+        # 省電力中の1tickはアイドル間隔分のtickとして数える
+        tick_count = scheduler.tick_count
+        scheduler.tick()
+        assert scheduler.tick_count == tick_count + scheduler.divider(scheduler.idle_interval)
+
+    def test_wake(self, scheduler, engine):
+        """wake()で即座に通常の間隔に戻り、次のtickで更新する"""
+        avatar = make_avatar("idle", idle=True)
+        scheduler.register(avatar)
+        scheduler.tick()
+        scheduler.tick()
+        assert len(engine.calls) == 2
+        assert scheduler.power_save
+
+        avatar.is_idle.return_value = False
+        scheduler.wake(avatar)
+
+        assert not scheduler.power_save
+        assert scheduler.timer.interval() == scheduler.interval
+        scheduler.tick()
+        assert len(engine.calls) == 3
+
+
+class TestAvatarSchedulerCommands:
+    """操作キューのテスト"""
+
+    def test_applied_on_tick(self, scheduler, engine):
+        """積まれた操作はtickの最初に反映し、描画が終わってからFutureを完了する"""
+        avatar = make_avatar("a")
+        scheduler.register(avatar)
+        future = scheduler.commands.post(avatar, "口パク")
+        done_at_render = []
+
+        def tick_frame(changed):
+            done_at_render.append(future.done())
+            avatar.frame_count += 1
+        avatar.tick_frame.side_effect = tick_frame
+
+        scheduler.tick()
+
+        avatar.set_anime_type.assert_called_once_with("口パク")
+        assert done_at_render == [False]
+        assert future.result(timeout=0) == "口パク"
+
+    def test_posted_from_thread(self, qapp, scheduler):
+        """他のスレッドから積まれたら、省電力中でも次のtickを待たずに反映する"""
+        avatar = make_avatar("idle", idle=True)
+        applied_threads = []
+
+        def set_anime_type(anime_type):
+            # AvatarWindow.set_anime_typeと同様に、省電力から起こして次の描画を待つ
+            applied_threads.append(threading.current_thread())
+            scheduler.wake(avatar)
+        avatar.set_anime_type.side_effect = set_anime_type
+        scheduler.register(avatar)
+        scheduler.tick()
+        assert scheduler.power_save
+        futures = []
+
+        thread = threading.Thread(target=lambda: futures.append(scheduler.commands.post(avatar, "口パク")))
+        thread.start()
+        thread.join()
+
+        deadline = time.monotonic() + 1.0
+        while not futures[0].done() and time.monotonic() < deadline:
+            qapp.processEvents()
+        assert futures[0].result(timeout=0) == "口パク"
+        # 反映はGUIスレッドで行う
+        assert applied_threads == [threading.main_thread()]
+
+    def test_unregister_discards(self, scheduler):
+        """登録を解除したアバターの操作は取り消す"""
+        avatar = make_avatar("a")
+        scheduler.register(avatar)
+        future = scheduler.commands.post(avatar, "口パク")
+
+        scheduler.unregister(avatar)
+        scheduler.tick()
+
+        assert future.cancelled()
+        avatar.set_anime_type.assert_not_called()
@@ -0,0 +1,192 @@
+"""
+test_compositor.py
+mod_compositorのユニットテスト
+"""
+
+import pytest
+import weakref
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QImage, QPainter, QColor
+
+from pvv_mcp_server.avatar.mod_compositor import LayerCompositor, opaque_rect
+
+
+def _part(width, height, rect=None, color=Qt.red):
+    """rectの範囲だけ塗りつぶしたパーツ画像を作成"""
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    if rect is not None:
+        painter = QPainter(image)
+        painter.fillRect(rect, QColor(color))
+        painter.end()
+    return image
+
+
+def _naive(layers):
+    """全レイヤーを毎回描き直した場合の合成結果"""
+    first = next(image for image in layers if image is not None)
+    canvas = QImage(first.size(), QImage.Format_ARGB32_Premultiplied)
+    canvas.fill(Qt.transparent)
+    painter = QPainter(canvas)
+    for image in layers:
+        if image is not None:
+            x = (canvas.width() - image.width()) // 2
+            y = (canvas.height() - image.height()) // 2
+            painter.drawImage(x, y, image)
+    painter.end()
+    return canvas
+
+
+@pytest.fixture
+def layers():
+    """体・顔・目(開)・目(閉)・髪のパーツ"""
+    return {
+        "体": _part(100, 100, QRect(0, 0, 100, 100), Qt.blue),
+        "顔": _part(100, 100, QRect(20, 10, 60, 60), Qt.yellow),
+        "目_開": _part(100, 100, QRect(30, 30, 40, 10), Qt.black),
+        "目_閉": _part(100, 100, QRect(30, 35, 40, 2), Qt.black),
+        "髪": _part(100, 100, QRect(10, 0, 80, 30), QColor(128, 64, 0, 128)),
+    }
+
+
+class TestOpaqueRect:
+    """opaque_rect関数のテスト"""
+
+    def test_opaque_rect(self):
+        """不透明領域が求まる"""
+        image = _part(50, 40, QRect(5, 6, 10, 12))
+        assert opaque_rect(image) == QRect(5, 6, 10, 12)
+
+    def test_transparent(self):
+        """全て透明なら空の矩形"""
+        assert opaque_rect(_part(10, 10)).isEmpty()
+
+    def test_other_format(self):
+        """premultiplied以外の形式でも求まる"""
+        image = _part(20, 20, QRect(1, 2, 3, 4)).convertToFormat(QImage.Format_ARGB32)
+        assert opaque_rect(image) == QRect(1, 2, 3, 4)
+
+
+class TestLayerCompositor:
+    """LayerCompositorクラスのテスト"""
+
+    def test_no_layers(self):
+        """描画するレイヤーが無い場合はNone"""
+        compositor = LayerCompositor()
+        assert compositor.compose([None, None]) is None
+
+    def test_first_compose_full(self, layers):
+        """初回は全体を描画する"""
+        compositor = LayerCompositor()
+        frame = [layers["体"], layers["顔"], layers["目_開"], layers["髪"]]
+
+        canvas = compositor.compose(frame)
+
+        assert canvas == _naive(frame)
+        assert compositor.last_dirty_rect == QRect(0, 0, 100, 100)
+
+    def test_blink_redraws_eye_region(self, layers):
+        """まばたきでは目の領域だけを再描画する"""
+        compositor = LayerCompositor()
+        compositor.compose([layers["体"], layers["顔"], layers["目_開"], layers["髪"]])
+
+        frame = [layers["体"], layers["顔"], layers["目_閉"], layers["髪"]]
+        canvas = compositor.compose(frame)
+
+        assert canvas == _naive(frame)
+        assert compositor.last_dirty_rect == QRect(30, 30, 40, 10)
+
+    def test_unchanged(self, layers):
+        """変化が無ければ再描画しない"""
+        compositor = LayerCompositor()
+        frame = [layers["体"], layers["顔"], layers["目_開"], layers["髪"]]
+        compositor.compose(frame)
+
+        canvas = compositor.compose(list(frame))
+
+        assert canvas == _naive(frame)
+        assert compositor.last_dirty_rect.isEmpty()
+
+    def test_layer_hidden_and_shown(self, layers):
+        """レイヤーの表示・非表示の切り替え"""
+        compositor = LayerCompositor()
+        frames = [
+            [layers["体"], layers["顔"], layers["目_開"], layers["髪"]],
+            [layers["体"], layers["顔"], None, layers["髪"]],
+            [layers["体"], None, layers["目_閉"], layers["髪"]],
+            [layers["体"], layers["顔"], layers["目_開"], None],
+            [layers["体"], layers["顔"], layers["目_閉"], layers["髪"]],
+        ]
+        for frame in frames:
+            assert compositor.compose(frame) == _naive(frame)
+
+    def test_size_changed(self, layers):
+        """キャンバスサイズが変わった場合は全体を描き直す"""
+        compositor = LayerCompositor()
+        compositor.compose([layers["体"], layers["目_開"]])
+
+        small = _part(50, 50, QRect(0, 0, 50, 50), Qt.green)
+        frame = [small, layers["目_開"]]
+        canvas = compositor.compose(frame)
+
+        assert canvas.size() == small.size()
+        assert canvas == _naive(frame)
+
+    def test_result_copy_not_overwritten(self, layers):
+        """呼び出し側でコピーした結果は次の合成で変わらない"""
+        compositor = LayerCompositor()
+        frame1 = [layers["体"], layers["目_開"]]
+        copied = compositor.compose(frame1).copy()
+
+        compositor.compose([layers["体"], layers["目_閉"]])
+
+        assert copied == _naive(frame1)
+
+    def test_opaque_rects_released(self, layers):
+        """破棄されたパーツ画像・reset()前のパーツ画像の不透明領域は保持しない"""
+        compositor = LayerCompositor()
+        eye = _part(100, 100, QRect(30, 30, 40, 10), Qt.black)
+        compositor.compose([layers["体"], layers["目_開"]])
+        compositor.compose([layers["体"], eye])
+        assert len(compositor._opaque_rects) == 2
+
+        del eye
+        compositor.compose([layers["体"], layers["目_閉"]])
+        # 目_開・目_閉だけが残る
+        assert len(compositor._opaque_rects) == 2
+        assert all(entry[0]() is not None for entry in compositor._opaque_rects.values())
+
+        compositor.reset()
+        assert compositor._opaque_rects == {}
+
+    def test_stack_released(self, layers):
+        """破棄されたパーツ画像を含む中間画像は保持しない"""
+        compositor = LayerCompositor()
+        hair = _part(100, 100, QRect(10, 0, 80, 30), Qt.green)
+        compositor.compose([layers["体"], layers["目_開"], hair])
+        compositor.compose([layers["体"], layers["目_閉"], hair])
+        assert len(compositor._upper_cache) == 1
+
+        hair_key = (id(hair),)
+        assert list(compositor._upper_cache) == [hair_key]
+
+        # 目と髪が変わるので、上側は空の中間画像になる
+        compositor.compose([layers["体"], layers["目_開"], layers["髪"]])
+        del hair
+        assert list(compositor._upper_cache) == [()]
+
+    def test_stack_reused_id(self, layers):
+        """同じidの別の画像には、古い中間画像を使わない"""
+        compositor = LayerCompositor()
+        frame = [layers["体"], layers["目_開"], layers["髪"]]
+        compositor.compose(frame)
+        compositor.compose([layers["体"], layers["目_閉"], layers["髪"]])
+
+        # 髪の中間画像を、同じidの別の画像のものとして差し替える
+        key = (id(layers["髪"]),)
+        other = _part(100, 100)
+        compositor._upper_cache[key] = ((weakref.ref(other),), _part(100, 100))
+
+        canvas = compositor.compose(frame)
+
+        assert canvas == _naive(frame)
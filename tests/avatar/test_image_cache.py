@@ -0,0 +1,194 @@
+"""
+test_image_cache.py
+mod_image_cacheのユニットテスト
+"""
+
+import pytest
+from collections import defaultdict
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PySide6.QtGui import QImage
+
+import pvv_mcp_server.avatar.mod_image_cache as mod_image_cache
+
+
+def _png_bytes(width=4, height=3):
+    """テスト用のPNGバイナリを作成"""
+    image = QImage(width, height, QImage.Format_ARGB32)
+    image.fill(Qt.red)
+    data = QByteArray()
+    buf = QBuffer(data)
+    buf.open(QIODevice.WriteOnly)
+    image.save(buf, "PNG")
+    buf.close()
+    return bytes(data)
+
+
+@pytest.fixture
+def zip_dat():
+    """zipデータ"""
+    dat = defaultdict(dict)
+    dat["目"]["01.png"] = _png_bytes()
+    dat["口"]["01.png"] = _png_bytes(8, 6)
+    dat["他"]["broken.png"] = b"not a png"
+    return dat
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """各テストの前後でキャッシュを破棄"""
+    mod_image_cache.clear()
+    yield
+    mod_image_cache.clear()
+
+
+class TestGetImage:
+    """get_image関数のテスト"""
+
+    def test_decode_premultiplied(self, zip_dat):
+        """premultiplied ARGB にデコードされる"""
+        image = mod_image_cache.get_image(zip_dat, "目", "01.png")
+
+        assert image is not None
+        assert image.format() == QImage.Format_ARGB32_Premultiplied
+        assert image.width() == 4
+        assert image.height() == 3
+
+    def test_decode_once(self, zip_dat):
+        """同じ画像は一度だけデコードされる"""
+        image1 = mod_image_cache.get_image(zip_dat, "目", "01.png")
+        # 元データを壊しても再デコードされないこと
+        zip_dat["目"]["01.png"] = b"not a png"
+        image2 = mod_image_cache.get_image(zip_dat, "目", "01.png")
+
+        assert image1 is image2
+
+    def test_separate_per_zip(self, zip_dat):
+        """zip_data毎に別のキャッシュになる"""
+        other = defaultdict(dict)
+        other["目"]["01.png"] = _png_bytes(2, 2)
+
+        image1 = mod_image_cache.get_image(zip_dat, "目", "01.png")
+        image2 = mod_image_cache.get_image(other, "目", "01.png")
+
+        assert image1.width() == 4
+        assert image2.width() == 2
+
+    def test_broken_png(self, zip_dat):
+        """デコードできない場合はNone"""
+        assert mod_image_cache.get_image(zip_dat, "他", "broken.png") is None
+
+    def test_broken_png_cached(self, zip_dat, monkeypatch):
+        """デコードできなかった画像は再デコードしない"""
+        calls = []
+        decode = mod_image_cache._decode
+        monkeypatch.setattr(mod_image_cache, "_decode", lambda *args: calls.append(args) or decode(*args))
+
+        for _ in range(3):
+            assert mod_image_cache.get_image(zip_dat, "他", "broken.png") is None
+
+        assert len(calls) == 1
+
+
+class TestTransform:
+    """縮尺・反転済み画像のテスト"""
+
+    def test_scaled(self, zip_dat):
+        """縮尺した画像が取得できる"""
+        image = mod_image_cache.get_image(zip_dat, "口", "01.png", 50, False)
+
+        assert image.width() == 4
+        assert image.height() == 3
+        assert image.format() == QImage.Format_ARGB32_Premultiplied
+
+    def test_flipped(self):
+        """左右反転した画像が取得できる"""
+        dat = defaultdict(dict)
+        image = QImage(2, 1, QImage.Format_ARGB32)
+        image.setPixelColor(0, 0, Qt.red)
+        image.setPixelColor(1, 0, Qt.blue)
+        buf_data = QByteArray()
+        buf = QBuffer(buf_data)
+        buf.open(QIODevice.WriteOnly)
+        image.save(buf, "PNG")
+        buf.close()
+        dat["目"]["01.png"] = bytes(buf_data)
+
+        flipped = mod_image_cache.get_image(dat, "目", "01.png", 100, True)
+
+        assert flipped.pixelColor(0, 0) == Qt.blue
+        assert flipped.pixelColor(1, 0) == Qt.red
+
+    def test_transformed_cached(self, zip_dat):
+        """変換済みの画像もキャッシュされる"""
+        image1 = mod_image_cache.get_image(zip_dat, "口", "01.png", 75, True)
+        image2 = mod_image_cache.get_image(zip_dat, "口", "01.png", 75, True)
+        native = mod_image_cache.get_image(zip_dat, "口", "01.png")
+
+        assert image1 is image2
+        assert image1 is not native
+        assert native.width() == 8
+
+
+class TestClear:
+    """clear関数のテスト"""
+
+    def test_clear_zip(self, zip_dat):
+        """指定したzip_dataのキャッシュのみ破棄される"""
+        other = defaultdict(dict)
+        other["目"]["01.png"] = _png_bytes(2, 2)
+        mod_image_cache.get_image(zip_dat, "目", "01.png")
+        mod_image_cache.get_image(other, "目", "01.png")
+
+        mod_image_cache.clear(zip_dat)
+
+        assert all(key[0] != id(zip_dat) for key in mod_image_cache._image_cache)
+        assert len(mod_image_cache._image_cache) == 1
+        assert id(zip_dat) not in mod_image_cache._zip_refs
+
+    def test_clear_while_decoding(self, zip_dat, monkeypatch):
+        """デコード中に破棄されたzip_dataの画像はキャッシュに登録しない"""
+        decode = mod_image_cache._decode
+
+        def decode_and_release(dat, cat, fname):
+            image = decode(dat, cat, fname)
+            # デコード中に他のスレッドが画像データを解放した
+            mod_image_cache.clear(dat)
+            return image
+
+        monkeypatch.setattr(mod_image_cache, "_decode", decode_and_release)
+        image = mod_image_cache.get_image(zip_dat, "目", "01.png")
+
+        assert image is not None
+        assert mod_image_cache._image_cache == {}
+        assert mod_image_cache._zip_refs == {}
+
+
+class TestLimit:
+    """キャッシュサイズの上限のテスト"""
+
+    def test_evict_least_recently_used(self, zip_dat, monkeypatch):
+        """上限を超えたら最近使われていない画像から破棄する"""
+        eye = mod_image_cache.get_image(zip_dat, "目", "01.png")
+        monkeypatch.setattr(mod_image_cache, "MAX_CACHE_BYTES", eye.sizeInBytes() * 2)
+
+        mod_image_cache.get_image(zip_dat, "目", "01.png", 100, True)
+        # 反転前の画像を使う → 反転した画像の方が古くなる
+        assert mod_image_cache.get_image(zip_dat, "目", "01.png") is eye
+        mod_image_cache.get_image(zip_dat, "目", "01.png", 50, False)
+
+        keys = [key[1:] for key in mod_image_cache._image_cache]
+        assert ("目", "01.png", 100, True) not in keys
+        assert ("目", "01.png", 100, False) in keys
+        assert mod_image_cache._cache_bytes <= mod_image_cache.MAX_CACHE_BYTES
+
+    def test_zip_ref_released(self, zip_dat, monkeypatch):
+        """zip_dataの画像が全て破棄されたら、zip_dataの参照も手放す"""
+        other = defaultdict(dict)
+        other["目"]["01.png"] = _png_bytes(2, 2)
+        monkeypatch.setattr(mod_image_cache, "MAX_CACHE_BYTES", 1)
+
+        mod_image_cache.get_image(other, "目", "01.png")
+        mod_image_cache.get_image(zip_dat, "目", "01.png")
+
+        assert id(other) not in mod_image_cache._zip_refs
+        assert id(zip_dat) in mod_image_cache._zip_refs
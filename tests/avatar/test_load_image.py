@@ -11,7 +11,8 @@ from pvv_mcp_server.avatar.mod_load_image import (
     _load_local_zip,
     _load_zip_from_url,
     _load_voicevox_portrait,
-    _create_empty_zip_data
+    _create_empty_zip_data,
+    close_image
 )
 
 
@@ -104,30 +105,61 @@ class TestLoadImage:
         assert "unknown.png" in result["他"]
         assert result["他"]["unknown.png"] == b'PNG_DATA'
     
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('pvv_mcp_server.avatar.mod_load_image.zipfile.ZipFile')
-    def test_load_local_zip_success(self, mock_zipfile, mock_file):
+    def test_load_local_zip_success(self, tmp_path):
         """ローカルZIPファイルの読み込みが成功するテスト"""
-        # モックのZIPファイルを設定
-        mock_file.return_value.read.return_value = b'ZIP_DATA'
-        
-        # ZipFileのモック
-        mock_zip_instance = MagicMock()
-        mock_info1 = MagicMock()
-        mock_info1.filename = "avatar/口/mouth.png"
-        mock_info2 = MagicMock()
-        mock_info2.filename = "avatar/目/eye.png"
+        zip_path = tmp_path / "test.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("avatar/口/mouth.png", b'PNG_DATA_MOUTH')
+            zf.writestr("avatar/目/eye.png", b'PNG_DATA_EYE')
+            zf.writestr("avatar/readme.txt", b'TEXT')
         
-        mock_zip_instance.infolist.return_value = [mock_info1, mock_info2]
-        mock_zip_instance.__enter__.return_value = mock_zip_instance
-        mock_zip_instance.open.return_value.__enter__.return_value.read.return_value = b'PNG_DATA'
-        mock_zipfile.return_value = mock_zip_instance
-        
-        result = _load_local_zip("test.zip", ['後', '体', '顔', '髪', '口', '目', '眉', '他'])
+        result = _load_local_zip(str(zip_path), ['後', '体', '顔', '髪', '口', '目', '眉', '他'])
         
         # 「口」と「目」カテゴリにPNGデータが登録されていること
         assert "mouth.png" in result["口"]
         assert "eye.png" in result["目"]
+        assert list(result["口"].keys()) == ["mouth.png"]
+        assert result["口"]["mouth.png"] == b'PNG_DATA_MOUTH'
+        assert result["目"]["eye.png"] == b'PNG_DATA_EYE'
+    
+    def test_load_local_zip_lazy(self, tmp_path):
+        """PNGの中身はアクセスされた時に初めて読み出されるテスト"""
+        zip_path = tmp_path / "test.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("avatar/口/mouth.png", b'PNG_DATA_MOUTH')
+            zf.writestr("avatar/目/eye.png", b'PNG_DATA_EYE')
+        
+        with patch('zipfile.ZipFile.read', autospec=True, side_effect=zipfile.ZipFile.read) as mock_read:
+            result = _load_local_zip(str(zip_path), ['後', '体', '顔', '髪', '口', '目', '眉', '他'])
+            assert mock_read.call_count == 0
+            
+            assert result["目"]["eye.png"] == b'PNG_DATA_EYE'
+            assert mock_read.call_count == 1
+    
+    def test_close_image(self, tmp_path):
+        """close_imageでZIPファイルを閉じるテスト"""
+        zip_path = tmp_path / "test.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("avatar/口/mouth.png", b'PNG_DATA_MOUTH')
+            zf.writestr("avatar/目/eye.png", b'PNG_DATA_EYE')
+        
+        result = _load_local_zip(str(zip_path), ['後', '体', '顔', '髪', '口', '目', '眉', '他'])
+        archive = result["口"]._archive
+        close_image(result)
+        
+        assert archive._mapped.closed
+        # 閉じた後はZIPファイルを上書きできる
+        os.replace(tmp_path / "test.zip", tmp_path / "moved.zip")
+    
+    def test_load_local_zip_unknown_category(self, tmp_path):
+        """未知のカテゴリは「他」に分類されるテスト"""
+        zip_path = tmp_path / "test.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("avatar/その他/x.png", b'PNG_DATA')
+        
+        result = _load_local_zip(str(zip_path), ['後', '体', '顔', '髪', '口', '目', '眉', '他'])
+        
+        assert result["他"]["x.png"] == b'PNG_DATA'
     
     @patch('builtins.open', side_effect=FileNotFoundError)
     def test_load_local_zip_file_not_found(self, mock_file):
@@ -21,16 +21,7 @@ class TestRightClickContextMenu:
     """right_click_context_menu関数のテストクラス"""
     
     @pytest.fixture
-    def mock_timer(self):
-        """QTimerのモックを作成"""
-        timer = Mock()
-        timer.isActive.return_value = False
-        timer.start = Mock()
-        timer.stop = Mock()
-        return timer
-    
-    @pytest.fixture
-    def mock_avatar(self, mock_timer):
+    def mock_avatar(self):
         """AvatarWindowのモックを作成"""
         avatar = Mock()
         avatar.anime_types = ["立ち絵", "口パク", "感情表現"]
@@ -39,7 +30,7 @@ class TestRightClickContextMenu:
         avatar.position = "left_out"
         avatar.flip = False
         avatar.scale = 50
-        avatar.follow_timer = mock_timer
+        avatar.follow_enabled = False
         
         # メソッドのモック
         avatar.set_anime_type = Mock()
@@ -47,10 +38,11 @@ class TestRightClickContextMenu:
         avatar.set_position = Mock()
         avatar.set_flip = Mock()
         avatar.set_scale = Mock()
+        avatar.set_follow = Mock()
         avatar.mapToGlobal = Mock(return_value=QPoint(100, 100))
         
         # dialogsのモック
-        avatar.dialogs = {
+        avatar.animes = {
             "立ち絵": Mock(),
             "口パク": Mock(),
             "感情表現": Mock()
@@ -144,29 +136,25 @@ class TestRightClickContextMenu:
     
     @patch('pvv_mcp_server.avatar.mod_right_click_context_menu.QAction')
     @patch('pvv_mcp_server.avatar.mod_right_click_context_menu.QMenu')
-    def test_follow_timer_states(self, mock_qmenu_class, mock_qaction_class, mock_avatar):
-        """位置追随タイマーの状態をテスト"""
+    def test_follow_states(self, mock_qmenu_class, mock_qaction_class, mock_avatar):
+        """位置追随の状態をテスト"""
         mock_menu = Mock()
         mock_qmenu_class.return_value = mock_menu
-        mock_action = Mock()
-        mock_qaction_class.return_value = mock_action
+        actions = {}
+        mock_qaction_class.side_effect = lambda label, parent: actions.setdefault(label, Mock())
         
         position = QPoint(50, 50)
         
-        # タイマーがアクティブな場合
-        mock_avatar.follow_timer.isActive.return_value = True
-        right_click_context_menu(mock_avatar, position)
-        
-        # タイマー状態が確認されることを確認
-        mock_avatar.follow_timer.isActive.assert_called()
-        
-        # タイマーが非アクティブな場合
-        mock_avatar.follow_timer.isActive.reset_mock()
-        mock_avatar.follow_timer.isActive.return_value = False
+        # 位置追随がONの場合
+        mock_avatar.follow_enabled = True
         right_click_context_menu(mock_avatar, position)
+        actions["ON"].setChecked.assert_called_with(True)
+        actions["OFF"].setChecked.assert_called_with(False)
         
-        # タイマー状態が確認されることを確認
-        assert mock_avatar.follow_timer.isActive.called
+        # OFFを選ぶと位置追随を止める
+        callback = actions["OFF"].triggered.connect.call_args[0][0]
+        callback()
+        mock_avatar.set_follow.assert_called_once_with(False)
     
     @patch('pvv_mcp_server.avatar.mod_right_click_context_menu.QAction')
     @patch('pvv_mcp_server.avatar.mod_right_click_context_menu.QMenu')
@@ -264,7 +252,7 @@ class TestRightClickContextMenu:
         # 1つのアニメタイプ
         mock_avatar.anime_types = ["立ち絵"]
         mock_avatar.anime_type = "立ち絵"
-        mock_avatar.dialogs = {"立ち絵": Mock()}
+        mock_avatar.animes = {"立ち絵": Mock()}
         
         right_click_context_menu(mock_avatar, position)
         mock_menu.exec.assert_called()
@@ -273,7 +261,7 @@ class TestRightClickContextMenu:
         mock_menu.exec.reset_mock()
         mock_avatar.anime_types = ["立ち絵", "口パク", "感情表現", "まばたき"]
         mock_avatar.anime_type = "感情表現"
-        mock_avatar.dialogs = {
+        mock_avatar.animes = {
             "立ち絵": Mock(),
             "口パク": Mock(),
             "感情表現": Mock(),
@@ -315,11 +303,13 @@ class TestShowDialogDebug:
     def mock_avatar(self, mock_dialog):
         """AvatarWindowのモックを作成"""
         avatar = Mock()
-        avatar.dialogs = {
+        avatar.animes = {
             "立ち絵": mock_dialog,
             "口パク": Mock()
         }
         avatar.set_anime_type = Mock()
+        # 編集ダイアログはdialogsのモックをそのまま返す
+        avatar.open_editor = Mock(side_effect=lambda anime_type: avatar.animes[anime_type])
         return avatar
     
     def test_show_dialog_success(self, mock_avatar, mock_dialog):
@@ -361,7 +351,7 @@ class TestShowDialogDebug:
         """複数のダイアログタイプが存在する場合のテスト"""
         dialog1 = Mock()
         dialog2 = Mock()
-        mock_avatar.dialogs = {
+        mock_avatar.animes = {
             "立ち絵": dialog1,
             "口パク": dialog2
         }
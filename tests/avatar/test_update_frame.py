@@ -32,6 +32,7 @@ class TestUpdateFrame:
         dialog = Mock()
         dialog.update_frame = Mock()
         dialog.get_current_pixmap = Mock(return_value=mock_pixmap)
+        dialog.frame_version = 1
         return dialog
     
     @pytest.fixture
@@ -40,7 +41,8 @@ class TestUpdateFrame:
         avatar = Mock()
         avatar.zip_data = b"dummy_zip_data"  # zipデータが存在する状態
         avatar.anime_type = "idle"
-        avatar.dialogs = {"idle": mock_dialog}
+        avatar.animes = {"idle": mock_dialog}
+        avatar.shown_frame_version = None
         
         # QLabel のモック
         avatar.label = Mock()
@@ -87,7 +89,7 @@ class TestUpdateFrame:
     
     def test_update_frame_dialog_none(self, mock_avatar):
         """dialogsにNoneが入っている場合のテスト"""
-        mock_avatar.dialogs = {"idle": None}
+        mock_avatar.animes = {"idle": None}
         
         update_frame(mock_avatar)
         
@@ -147,8 +149,9 @@ class TestUpdateFrame:
         mock_dialog_talk = Mock()
         mock_dialog_talk.update_frame = Mock()
         mock_dialog_talk.get_current_pixmap = Mock(return_value=mock_pixmap)
+        mock_dialog_talk.frame_version = 1
         
-        mock_avatar.dialogs = {
+        mock_avatar.animes = {
             "idle": mock_dialog_idle,
             "talk": mock_dialog_talk
         }
@@ -166,7 +169,7 @@ class TestUpdateFrame:
     
     def test_update_frame_empty_dialogs(self, mock_avatar):
         """dialogsが空の辞書の場合のテスト"""
-        mock_avatar.dialogs = {}
+        mock_avatar.animes = {}
         
         update_frame(mock_avatar)
         
@@ -196,5 +199,41 @@ class TestUpdateFrame:
         
         for pixmap in pixmaps:
             mock_dialog.get_current_pixmap.return_value = pixmap
+            mock_dialog.frame_version += 1
             update_frame(mock_avatar)
             mock_avatar.label.setPixmap.assert_called_with(pixmap)
+    
+    def test_update_frame_unchanged_skips_repaint(self, mock_avatar, mock_dialog):
+        """フレームが変わらなければ再描画・リサイズしない"""
+        update_frame(mock_avatar)
+        update_frame(mock_avatar)
+        update_frame(mock_avatar)
+        
+        # dialogの更新は毎回行われる
+        assert mock_dialog.update_frame.call_count == 3
+        
+        # 表示更新は最初の1回だけ
+        mock_avatar.label.setPixmap.assert_called_once()
+        mock_avatar.label.adjustSize.assert_called_once()
+        mock_avatar.adjustSize.assert_called_once()
+    
+    def test_update_frame_version_changed_repaints(self, mock_avatar, mock_dialog):
+        """フレーム番号が変われば再描画する"""
+        update_frame(mock_avatar)
+        mock_dialog.frame_version += 1
+        update_frame(mock_avatar)
+        
+        assert mock_avatar.label.setPixmap.call_count == 2
+    
+    def test_update_frame_anime_type_changed_repaints(self, mock_avatar, mock_dialog, mock_pixmap):
+        """同じフレーム番号でもダイアログが切り替われば再描画する"""
+        mock_dialog_talk = Mock()
+        mock_dialog_talk.get_current_pixmap = Mock(return_value=mock_pixmap)
+        mock_dialog_talk.frame_version = mock_dialog.frame_version
+        mock_avatar.animes["talk"] = mock_dialog_talk
+        
+        update_frame(mock_avatar)
+        mock_avatar.anime_type = "talk"
+        update_frame(mock_avatar)
+        
+        assert mock_avatar.label.setPixmap.call_count == 2
@@ -5,14 +5,15 @@ mod_update_positionのユニットテスト
 
 import pytest
 import sys
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock
 from pathlib import Path
 
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from pvv_mcp_server.avatar.mod_update_position import update_position, get_windows_scaling
+from pvv_mcp_server.avatar.mod_update_position import update_position, calc_position
+from pvv_mcp_server.avatar.mod_avatar_layout import AvatarLayout
 
 
 class TestUpdatePosition:
@@ -26,27 +27,30 @@ class TestUpdatePosition:
         avatar.position = "left_out"
         avatar.width.return_value = 300
         avatar.height.return_value = 500
+        avatar.x.return_value = 0
+        avatar.y.return_value = 0
         avatar.move = Mock()
         return avatar
     
     @pytest.fixture
     def mock_window(self):
-        """pygetwindowのWindowオブジェクトのモックを作成"""
+        """追随対象ウィンドウのモックを作成(トラッカーが取得したQt座標系の値)"""
         window = Mock()
-        window.left = 1920  # 論理座標
+        window.left = 1920
         window.top = 100
         window.width = 1200
         window.height = 800
         return window
-    
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_left_out(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+
+    @pytest.fixture(autouse=True)
+    def target(self, mock_avatar, mock_window):
+        """トラッカーが取得済みの追随対象ウィンドウの位置・サイズ"""
+        mock_avatar.tracker.geometry = (mock_window.left, mock_window.top, mock_window.width, mock_window.height)
+        mock_avatar.avatar_layout = AvatarLayout(mock_avatar.tracker)
+        mock_avatar.avatar_layout.add(mock_avatar)
+    
+    def test_update_position_left_out(self, mock_avatar, mock_window):
         """left_out位置の計算をテスト"""
-        # モックの設定
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0  # スケーリングなし
-        
         # テスト実行
         update_position(mock_avatar)
         
@@ -55,13 +59,9 @@ class TestUpdatePosition:
         expected_y = int((mock_window.top / 1.0) + (mock_window.height / 1.0) - mock_avatar.height())
         mock_avatar.move.assert_called_once_with(expected_x, expected_y)
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_left_center(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+    def test_update_position_left_center(self, mock_avatar, mock_window):
         """left_center位置の計算をテスト"""
         mock_avatar.position = "left_center"
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
         
         update_position(mock_avatar)
         
@@ -69,13 +69,9 @@ class TestUpdatePosition:
         expected_y = int((mock_window.top / 1.0) + (mock_window.height / 1.0) - mock_avatar.height())
         mock_avatar.move.assert_called_once_with(expected_x, expected_y)
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_left_in(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+    def test_update_position_left_in(self, mock_avatar, mock_window):
         """left_in位置の計算をテスト"""
         mock_avatar.position = "left_in"
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
         
         update_position(mock_avatar)
         
@@ -83,13 +79,9 @@ class TestUpdatePosition:
         expected_y = int((mock_window.top / 1.0) + (mock_window.height / 1.0) - mock_avatar.height())
         mock_avatar.move.assert_called_once_with(expected_x, expected_y)
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_right_in(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+    def test_update_position_right_in(self, mock_avatar, mock_window):
         """right_in位置の計算をテスト"""
         mock_avatar.position = "right_in"
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
         
         update_position(mock_avatar)
         
@@ -97,13 +89,9 @@ class TestUpdatePosition:
         expected_y = int((mock_window.top / 1.0) + (mock_window.height / 1.0) - mock_avatar.height())
         mock_avatar.move.assert_called_once_with(expected_x, expected_y)
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_right_center(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+    def test_update_position_right_center(self, mock_avatar, mock_window):
         """right_center位置の計算をテスト"""
         mock_avatar.position = "right_center"
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
         
         update_position(mock_avatar)
         
@@ -111,13 +99,9 @@ class TestUpdatePosition:
         expected_y = int((mock_window.top / 1.0) + (mock_window.height / 1.0) - mock_avatar.height())
         mock_avatar.move.assert_called_once_with(expected_x, expected_y)
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_right_out(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+    def test_update_position_right_out(self, mock_avatar, mock_window):
         """right_out位置の計算をテスト"""
         mock_avatar.position = "right_out"
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
         
         update_position(mock_avatar)
         
@@ -125,24 +109,10 @@ class TestUpdatePosition:
         expected_y = int((mock_window.top / 1.0) + (mock_window.height / 1.0) - mock_avatar.height())
         mock_avatar.move.assert_called_once_with(expected_x, expected_y)
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_with_scaling(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
-        """DPIスケーリング適用時のテスト"""
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.25  # 125%スケーリング
-        
-        update_position(mock_avatar)
-        
-        # 座標がスケールで割られることを確認
-        expected_x = int((mock_window.left / 1.25) - mock_avatar.width())
-        expected_y = int((mock_window.top / 1.25) + (mock_window.height / 1.25) - mock_avatar.height())
-        mock_avatar.move.assert_called_once_with(expected_x, expected_y)
-    
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    def test_update_position_window_not_found(self, mock_get_windows, mock_avatar):
+    def test_update_position_window_not_found(self, mock_avatar):
         """ターゲットウィンドウが見つからない場合のテスト"""
-        mock_get_windows.return_value = []
+        mock_avatar.tracker.geometry = None
+        mock_avatar.tracker.poll.return_value = None
         
         # 例外が発生しないことを確認
         update_position(mock_avatar)
@@ -161,9 +131,7 @@ class TestUpdatePosition:
         # moveが呼ばれないことを確認
         assert not hasattr(avatar.move, 'assert_not_called') or True
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_no_position_attribute(self, mock_scaling, mock_get_windows, mock_window):
+    def test_update_position_no_position_attribute(self, mock_window):
         """positionが設定されていない場合のテスト（デフォルト値使用）"""
         avatar = Mock()
         avatar.app_title = "Test Application"
@@ -172,9 +140,9 @@ class TestUpdatePosition:
         avatar.width.return_value = 300
         avatar.height.return_value = 500
         avatar.move = Mock()
-        
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
+        avatar.tracker.geometry = (mock_window.left, mock_window.top, mock_window.width, mock_window.height)
+        avatar.avatar_layout = AvatarLayout(avatar.tracker)
+        avatar.avatar_layout.add(avatar)
         
         update_position(avatar)
         
@@ -182,62 +150,31 @@ class TestUpdatePosition:
         assert avatar.position == "left_out"
         avatar.move.assert_called_once()
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    @patch('pvv_mcp_server.avatar.mod_update_position.get_windows_scaling')
-    def test_update_position_unknown_position(self, mock_scaling, mock_get_windows, mock_avatar, mock_window):
+    def test_update_position_unknown_position(self, mock_avatar, mock_window):
         """不明なpositionが指定された場合のテスト"""
         mock_avatar.position = "unknown_position"
-        mock_get_windows.return_value = [mock_window]
-        mock_scaling.return_value = 1.0
         
         update_position(mock_avatar)
         
         # moveが呼ばれないことを確認
         mock_avatar.move.assert_not_called()
     
-    @patch('pvv_mcp_server.avatar.mod_update_position.gw.getWindowsWithTitle')
-    def test_update_position_exception_handling(self, mock_get_windows, mock_avatar):
+    def test_update_position_exception_handling(self, mock_avatar):
         """例外発生時のハンドリングをテスト"""
-        mock_get_windows.side_effect = Exception("Test exception")
+        mock_avatar.tracker.geometry = None
+        mock_avatar.tracker.poll.side_effect = Exception("Test exception")
         
         # 例外が外部に漏れないことを確認
         update_position(mock_avatar)
         
         mock_avatar.move.assert_not_called()
 
+    def test_update_position_not_moved_when_unchanged(self, mock_avatar, mock_window):
+        """位置が変わらなければ移動しない"""
+        mock_avatar.x.return_value, mock_avatar.y.return_value = calc_position(
+            "left_out", mock_avatar.tracker.geometry, 300, 500)
 
-class TestGetWindowsScaling:
-    """get_windows_scaling関数のテストクラス"""
-    
-    @patch('pvv_mcp_server.avatar.mod_update_position.ctypes.windll')
-    def test_get_windows_scaling_success(self, mock_windll):
-        """正常にスケーリングを取得できる場合のテスト"""
-        # モックの設定
-        mock_user32 = MagicMock()
-        mock_shcore = MagicMock()
-        mock_windll.user32 = mock_user32
-        mock_windll.shcore = mock_shcore
-        
-        # DPI値を120に設定（125%スケーリング）
-        def mock_get_dpi(monitor, dpi_type, dpiX, dpiY):
-            dpiX._obj.value = 120
-            dpiY._obj.value = 120
-            return 0
-        
-        mock_shcore.GetDpiForMonitor = mock_get_dpi
-        mock_user32.GetForegroundWindow.return_value = 12345
-        mock_user32.MonitorFromWindow.return_value = 67890
-        
-        scale = get_windows_scaling()
-        
-        assert scale == 120 / 96.0
-    
-    @patch('pvv_mcp_server.avatar.mod_update_position.ctypes.windll')
-    def test_get_windows_scaling_exception(self, mock_windll):
-        """例外発生時にデフォルト値1.0を返すことをテスト"""
-        mock_windll.user32.SetProcessDpiAwarenessContext.side_effect = Exception("Test error")
-        
-        scale = get_windows_scaling()
-        
-        assert scale == 1.0
-    
\ No newline at end of file
+        update_position(mock_avatar)
+
+        mock_avatar.move.assert_not_called()
+        mock_avatar.tracker.poll.assert_not_called()
@@ -0,0 +1,158 @@
+"""
+test_window_backend.py
+mod_window_backendのユニットテスト
+"""
+
+import pytest
+import sys
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import pvv_mcp_server.avatar.mod_window_backend as mod_window_backend
+from pvv_mcp_server.avatar.mod_window_backend import (
+    WindowBackend, FakeWindowBackend, WindowsWindowBackend, get_backend, get_monitor_scaling, clear_dpi_cache)
+
+
+@pytest.fixture(autouse=True)
+def reset_globals():
+    """テスト毎にモジュールのグローバル状態を初期化"""
+    mod_window_backend._dpi_cache.clear()
+    mod_window_backend._dpi_aware = False
+    mod_window_backend._backend = None
+    mod_window_backend._backend_selected = False
+    yield
+    mod_window_backend._dpi_cache.clear()
+    mod_window_backend._dpi_aware = False
+    mod_window_backend._backend = None
+    mod_window_backend._backend_selected = False
+
+
+class TestGetBackend:
+    """get_backendのテスト"""
+
+    def test_unsupported_platform(self):
+        """対応していない環境ではNoneを返し、選択は1回だけ行う"""
+        with patch.object(mod_window_backend.sys, "platform", "darwin"), \
+             patch.dict(mod_window_backend.os.environ, {}, clear=True), \
+             patch.object(mod_window_backend.logger, "warning") as mock_warning:
+            assert get_backend() is None
+            assert get_backend() is None
+
+        assert mock_warning.call_count == 1
+
+    def test_backend_error_disables(self):
+        """バックエンドを作成できなければNoneを返す"""
+        with patch.object(mod_window_backend.sys, "platform", "linux"), \
+             patch.dict(mod_window_backend.os.environ, {"DISPLAY": ":0"}), \
+             patch.object(mod_window_backend, "X11WindowBackend", side_effect=ImportError("no Xlib")):
+            assert get_backend() is None
+
+    def test_set_backend(self):
+        """set_backend()で設定したバックエンドを返す"""
+        backend = FakeWindowBackend()
+        mod_window_backend.set_backend(backend)
+
+        assert get_backend() is backend
+
+
+class TestWindowBackend:
+    """WindowBackendのテスト"""
+
+    def test_abstract(self):
+        """検索・タイトル・位置の取得を実装しないバックエンドは作成できない"""
+        class PartialBackend(WindowBackend):
+            def find_window(self, title):
+                return None
+
+        with pytest.raises(TypeError):
+            PartialBackend()
+
+
+class TestFakeWindowBackend:
+    """FakeWindowBackendのテスト"""
+
+    def test_find_and_read(self):
+        """タイトルの部分一致で探し、位置・サイズを返す"""
+        backend = FakeWindowBackend()
+        handle = backend.add_window("Test App - Editor", (1, 2, 3, 4))
+
+        assert backend.find_window("Test App") == handle
+        assert backend.find_window("Other") is None
+        assert backend.get_geometry(handle) == (1, 2, 3, 4)
+        assert backend.find_count == 2
+
+    def test_watch(self):
+        """watch()したウィンドウの変化を通知する"""
+        backend = FakeWindowBackend()
+        handle = backend.add_window("Test App", (1, 2, 3, 4))
+        callback = MagicMock()
+
+        assert backend.watch(handle, callback)
+        backend.move_window(handle, (5, 6, 7, 8))
+        backend.unwatch(handle)
+        backend.move_window(handle, (9, 9, 9, 9))
+
+        callback.assert_called_once_with(handle)
+
+    def test_watch_unsupported(self):
+        """supports_events=Falseならwatch()しない"""
+        backend = FakeWindowBackend(supports_events=False)
+        handle = backend.add_window("Test App", (1, 2, 3, 4))
+
+        assert not backend.watch(handle, MagicMock())
+
+
+class TestWindowsWindowBackend:
+    """WindowsWindowBackendのテスト"""
+
+    def test_geometry_scaled(self):
+        """pygetwindowの座標をDPIスケールで補正する"""
+        window = MagicMock(title="Test App", left=300, top=150, width=1200, height=900, _hWnd=1)
+        mock_gw = MagicMock()
+        mock_gw.getWindowsWithTitle.return_value = [window]
+
+        with patch.dict(sys.modules, {"pygetwindow": mock_gw}), \
+             patch.object(mod_window_backend, "get_monitor_scaling", return_value=1.5):
+            backend = WindowsWindowBackend()
+            found = backend.find_window("Test App")
+
+            assert found is window
+            assert backend.get_title(found) == "Test App"
+            assert backend.get_geometry(found) == (200, 100, 800, 600)
+            assert not backend.watch(found, MagicMock())
+
+
+class TestGetMonitorScaling:
+    """get_monitor_scalingのテスト"""
+
+    def test_get_monitor_scaling_no_windll(self):
+        """Windows以外の環境では1.0を返す"""
+        with patch('pvv_mcp_server.avatar.mod_window_backend.ctypes.windll', create=True) as mock_windll:
+            mock_windll.user32.SetProcessDpiAwarenessContext.side_effect = AttributeError("no windll")
+            assert get_monitor_scaling(12345) == 1.0
+
+    def test_dpi_cached_per_monitor(self):
+        """DPIはモニタ毎にキャッシュし、clear_dpi_cache()まで再取得しない"""
+        with patch('pvv_mcp_server.avatar.mod_window_backend.ctypes.windll', create=True) as mock_windll:
+            mock_windll.user32.MonitorFromWindow.return_value = 1
+            # GetDpiForMonitor(monitor, type, byref(dpiX), byref(dpiY)) で144DPI(150%)を返す
+            mock_windll.shcore.GetDpiForMonitor.side_effect = \
+                lambda monitor, dpi_type, dpi_x, dpi_y: setattr(dpi_x._obj, "value", 144)
+
+            assert get_monitor_scaling(12345) == 1.5
+            get_monitor_scaling(12345)
+            assert mock_windll.shcore.GetDpiForMonitor.call_count == 1
+            assert mock_windll.user32.SetProcessDpiAwarenessContext.call_count == 1
+
+            mock_windll.user32.MonitorFromWindow.return_value = 2
+            get_monitor_scaling(12345)
+            assert mock_windll.shcore.GetDpiForMonitor.call_count == 2
+
+            clear_dpi_cache()
+            get_monitor_scaling(12345)
+            assert mock_windll.shcore.GetDpiForMonitor.call_count == 3
+            assert mock_windll.user32.SetProcessDpiAwarenessContext.call_count == 1
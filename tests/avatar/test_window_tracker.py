@@ -0,0 +1,221 @@
+"""
+test_window_tracker.py
+mod_window_trackerのユニットテスト
+"""
+
+import pytest
+import sys
+from unittest.mock import MagicMock
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import pvv_mcp_server.avatar.mod_window_tracker as mod_window_tracker
+import pvv_mcp_server.avatar.mod_window_backend as mod_window_backend
+from pvv_mcp_server.avatar.mod_window_backend import FakeWindowBackend
+from pvv_mcp_server.avatar.mod_window_tracker import WindowTracker, get_tracker
+
+
+@pytest.fixture(autouse=True)
+def reset_globals():
+    """テスト毎にトラッカーを破棄"""
+    mod_window_tracker.clear()
+    yield
+    mod_window_tracker.clear()
+
+
+@pytest.fixture
+def clock():
+    """テストで進める時刻"""
+    now = [0.0]
+    clock = lambda: now[0]
+    clock.advance = lambda seconds: now.__setitem__(0, now[0] + seconds)
+    return clock
+
+
+@pytest.fixture
+def backend():
+    """ポーリングで追跡させる仮想ウィンドウのバックエンド"""
+    return FakeWindowBackend(supports_events=False)
+
+
+class TestWindowTracker:
+    """WindowTrackerのテスト"""
+
+    def test_poll_returns_geometry(self, backend):
+        """ウィンドウの位置・サイズを返す"""
+        backend.add_window("Test App - Editor", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend)
+
+        assert tracker.poll() == (100, 50, 800, 600)
+        assert tracker.geometry == (100, 50, 800, 600)
+
+    def test_cached_window_not_enumerated_again(self, backend):
+        """見つけたウィンドウはキャッシュし、毎回列挙しない"""
+        handle = backend.add_window("Test App", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend)
+
+        tracker.poll()
+        backend.move_window(handle, (200, 50, 800, 600))
+        assert tracker.poll() == (200, 50, 800, 600)
+
+        assert backend.find_count == 1
+
+    def test_lost_window_is_found_again(self, backend):
+        """ウィンドウを見失ったら探し直す"""
+        old_handle = backend.add_window("Test App", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend)
+        tracker.poll()
+
+        backend.close_window(old_handle)
+        new_handle = backend.add_window("Test App", (300, 50, 800, 600))
+
+        assert tracker.poll() == (300, 50, 800, 600)
+        assert tracker.window == new_handle
+        assert backend.find_count == 2
+
+    def test_title_changed(self, backend):
+        """タイトルが変わったウィンドウは見失ったものとして扱う"""
+        handle = backend.add_window("Test App", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend)
+        tracker.poll()
+
+        backend.set_title(handle, "Other")
+
+        assert tracker.poll() is None
+        assert tracker.window is None
+
+    def test_window_not_found(self, backend):
+        """ウィンドウが見つからなければNone"""
+        tracker = WindowTracker("Test App", backend)
+
+        assert tracker.poll() is None
+        assert tracker.geometry is None
+
+    def test_not_found_enumerated_once_per_interval(self, backend, clock):
+        """見つからない間は、FIND_INTERVAL秒に1回だけ列挙し直す"""
+        tracker = WindowTracker("Test App", backend, clock=clock)
+
+        for _ in range(10):
+            assert tracker.poll() is None
+        assert backend.find_count == 1
+
+        backend.add_window("Test App", (100, 50, 800, 600))
+        clock.advance(mod_window_tracker.FIND_INTERVAL / 2)
+        assert tracker.poll() is None
+        assert backend.find_count == 1
+
+        clock.advance(mod_window_tracker.FIND_INTERVAL / 2)
+        assert tracker.poll() == (100, 50, 800, 600)
+        assert backend.find_count == 2
+
+    def test_lost_window_enumerated_once_per_interval(self, backend, clock):
+        """見失ったウィンドウが見つからない間も、列挙はFIND_INTERVAL秒に1回まで"""
+        handle = backend.add_window("Test App", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend, clock=clock)
+        tracker.poll()
+
+        backend.close_window(handle)
+        for _ in range(10):
+            assert tracker.poll() is None
+        assert backend.find_count == 2
+
+    def test_subscribers_notified_only_on_change(self, backend):
+        """位置・サイズが変わった時だけ購読中のアバターに通知する"""
+        handle = backend.add_window("Test App", (100, 50, 800, 600))
+        avatar1 = MagicMock()
+        avatar2 = MagicMock()
+        tracker = WindowTracker("Test App", backend)
+        tracker.subscribe(avatar1)
+        tracker.subscribe(avatar2)
+        tracker.subscribe(avatar1)
+
+        tracker.poll()
+        tracker.poll()
+        backend.move_window(handle, (100, 80, 800, 600))
+        tracker.poll()
+
+        assert avatar1.on_target_moved.call_count == 2
+        avatar1.on_target_moved.assert_called_with((100, 80, 800, 600))
+        assert avatar2.on_target_moved.call_count == 2
+
+    def test_unsubscribe(self, backend):
+        """購読を解除したアバターには通知しない"""
+        backend.add_window("Test App", (100, 50, 800, 600))
+        avatar = MagicMock()
+        tracker = WindowTracker("Test App", backend)
+        tracker.subscribe(avatar)
+        tracker.unsubscribe(avatar)
+
+        tracker.poll()
+
+        avatar.on_target_moved.assert_not_called()
+
+    def test_unsupported(self):
+        """バックエンドが無ければ何もしない"""
+        tracker = WindowTracker("Test App", None)
+
+        assert not tracker.supported
+        assert tracker.poll() is None
+
+
+class TestWindowTrackerEvents:
+    """ウィンドウの変化を通知できるバックエンドでのテスト"""
+
+    @pytest.fixture
+    def backend(self):
+        return FakeWindowBackend()
+
+    def test_not_read_until_notified(self, backend):
+        """通知が来るまでウィンドウを読み直さない"""
+        backend.add_window("Test App", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend)
+
+        tracker.poll()
+        tracker.poll()
+        tracker.poll()
+
+        assert tracker.watching
+        assert backend.read_count == 1
+
+    def test_notified_change_pushed(self, backend):
+        """ウィンドウの移動が通知されたら、ポーリングを待たずに購読中のアバターに通知する"""
+        handle = backend.add_window("Test App", (100, 50, 800, 600))
+        avatar = MagicMock()
+        tracker = WindowTracker("Test App", backend)
+        tracker.subscribe(avatar)
+        tracker.poll()
+
+        backend.move_window(handle, (400, 50, 800, 600))
+
+        avatar.on_target_moved.assert_called_with((400, 50, 800, 600))
+        assert tracker.geometry == (400, 50, 800, 600)
+
+    def test_closed_window_polled_until_found(self, backend, clock):
+        """閉じられたウィンドウは、再び見つかるまでポーリングで探す"""
+        handle = backend.add_window("Test App", (100, 50, 800, 600))
+        tracker = WindowTracker("Test App", backend, clock=clock)
+        tracker.poll()
+
+        backend.close_window(handle)
+        assert tracker.geometry is None
+        assert not tracker.watching
+
+        backend.add_window("Test App", (0, 0, 640, 480))
+        clock.advance(mod_window_tracker.FIND_INTERVAL)
+        assert tracker.poll() == (0, 0, 640, 480)
+        assert tracker.watching
+
+
+class TestGetTracker:
+    """get_trackerのテスト"""
+
+    def test_shared_per_title(self):
+        """同じタイトルのトラッカーは共有される"""
+        mod_window_backend.set_backend(FakeWindowBackend())
+
+        assert get_tracker("Test App") is get_tracker("Test App")
+        assert get_tracker("Test App") is not get_tracker("Other App")
+        assert get_tracker("Test App").supported
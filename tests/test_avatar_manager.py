@@ -77,13 +77,34 @@ def reset_module_globals():
     mod_avatar_manager._avatar_global_config = None
     mod_avatar_manager._avatars_config = None
     mod_avatar_manager._avatar_cache = {}
+    mod_avatar_manager._avatar_index = {}
     mod_avatar_manager._auto_save_timer = None
+    mod_avatar_manager._avatar_state = None
+    mod_avatar_manager._state_entries = {}
+    mod_avatar_manager._saved_revisions = {}
     yield
     # テスト後もクリーンアップ
     mod_avatar_manager._avatar_global_config = None
     mod_avatar_manager._avatars_config = None
     mod_avatar_manager._avatar_cache = {}
+    mod_avatar_manager._avatar_index = {}
     mod_avatar_manager._auto_save_timer = None
+    mod_avatar_manager._avatar_state = None
+    mod_avatar_manager._state_entries = {}
+    mod_avatar_manager._saved_revisions = {}
+
+
+def add_avatar(key, avatar, avatar_id=None, defaults=None):
+    """作成済みのアバターとして登録する(状態ファイルのIDとデフォルト付き)"""
+    mod_avatar_manager._avatar_cache[key] = avatar
+    mod_avatar_manager._state_entries[key] = (avatar_id or key, defaults or {})
+
+
+def read_state(dat_file):
+    """状態ファイルのアバター毎の設定を読み込む"""
+    data = json.loads(dat_file.read_text(encoding="utf-8"))
+    assert data["version"] == 2
+    return data["avatars"]
 
 
 class TestSetup:
@@ -103,6 +124,28 @@ class TestSetup:
         mock_create.assert_called_once()
         mock_timer.assert_called_once()
     
+    @patch.object(mod_avatar_manager, '_create_all_avatars')
+    @patch.object(mod_avatar_manager, '_start_auto_save_timer')
+    @patch.object(mod_avatar_manager, 'mod_avatar_layout')
+    def test_setup_layout(self, mock_layout, mock_timer, mock_create, test_avatar_config):
+        """同じ位置のアバターの並べ方を設定する"""
+        config = dict(test_avatar_config, layout="offset", layout_offset=[10, -10])
+        mod_avatar_manager.setup(config)
+
+        mock_layout.configure.assert_called_once_with("offset", [10, -10])
+
+    @patch.object(mod_avatar_manager, '_create_all_avatars')
+    @patch.object(mod_avatar_manager, '_start_auto_save_timer')
+    @patch.object(mod_avatar_manager, 'mod_asset_bundle')
+    def test_setup_compile_bundle(self, mock_bundle, mock_timer, mock_create, test_avatar_config):
+        """バンドルの自動書き出しは指定された場合だけ有効にする"""
+        mod_avatar_manager.setup(test_avatar_config)
+        mock_bundle.configure.assert_called_once_with(False)
+
+        mock_bundle.reset_mock()
+        mod_avatar_manager.setup(dict(test_avatar_config, compile_bundle=True))
+        mock_bundle.configure.assert_called_once_with(True)
+
     @patch.object(mod_avatar_manager, '_create_all_avatars')
     @patch.object(mod_avatar_manager, '_start_auto_save_timer')
     def test_setup_disabled(self, mock_timer, mock_create):
@@ -125,9 +168,12 @@ class TestSetAnimeType:
         mod_avatar_manager._avatar_global_config = test_avatar_config
         mock_get_avatar.return_value = mock_avatar_window
         
-        mod_avatar_manager.set_anime_type(2, "口パク")
+        future = mod_avatar_manager.set_anime_type(2, "口パク")
         
         mock_get_avatar.assert_called_once_with(2)
+        # GUIスレッドの操作キューに積み、反映を待てるFutureを返す
+        mock_avatar_window.post_anime_type.assert_called_once_with("口パク")
+        assert future is mock_avatar_window.post_anime_type.return_value
     
     @patch.object(mod_avatar_manager, '_get_avatar')
     def test_set_anime_type_disabled(self, mock_get_avatar):
@@ -144,7 +190,17 @@ class TestSetAnimeType:
         mock_get_avatar.return_value = None
         
         # 例外が発生しないことを確認
-        mod_avatar_manager.set_anime_type(999, "口パク")
+        assert mod_avatar_manager.set_anime_type(999, "口パク") is None
+
+    def test_wait_applied(self):
+        """反映を待ち、反映されない場合はタイムアウトでFalseを返す"""
+        from concurrent.futures import Future
+        applied = Future()
+        applied.set_result("口パク")
+
+        assert mod_avatar_manager.wait_applied(applied)
+        assert not mod_avatar_manager.wait_applied(Future(), timeout=0.01)
+        assert not mod_avatar_manager.wait_applied(None)
 
 
 class TestSaveAllConfigs:
@@ -237,41 +293,151 @@ class TestPrivateFunctions:
             
             mod_avatar_manager._start_auto_save_timer()
             
-            # タイマーが作成され、設定されたことを確認
+            # タイマーが作成され、設定された間隔の単発タイマーになったことを確認
             mock_qtimer_class.assert_called_once()
             mock_timer_instance.timeout.connect.assert_called_once()
-            mock_timer_instance.start.assert_called_once()
+            mock_timer_instance.setSingleShot.assert_called_once_with(True)
+            mock_timer_instance.setInterval.assert_called_once_with(5000)
+            # 設定が変わるまで保存しない
+            mock_timer_instance.start.assert_not_called()
+
+    def test_on_config_changed_restarts_timer(self):
+        """設定が変わる毎に自動保存タイマーを再始動する(デバウンス)"""
+        mod_avatar_manager._auto_save_timer = MagicMock()
+
+        mod_avatar_manager._on_config_changed()
+        mod_avatar_manager._on_config_changed()
+
+        assert mod_avatar_manager._auto_save_timer.start.call_count == 2
     
-    @patch('builtins.open', new_callable=mock_open)
-    @patch.object(mod_avatar_manager, 'save_all_configs')
-    @patch('os.path.exists', return_value=True)
-    def test_on_auto_save_success(self, mock_exists, mock_save, mock_file, 
-                                  test_avatar_config):
+    def test_on_auto_save_success(self, test_avatar_config, tmp_path):
         """自動保存のコールバック（正常系）"""
-        mod_avatar_manager._avatar_global_config = test_avatar_config
-        mock_save.return_value = {"avatar1": {"data": "test"}}
-        
-        mod_avatar_manager._on_auto_save()
-        
-        mock_save.assert_called_once()
-        # ファイルが存在し、書き込みが行われたことを確認
-        mock_file.assert_called_once_with("test_config.json", 'w', encoding='utf-8')
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text("{}", encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        avatar = MagicMock(config_revision=1)
+        avatar.save_config.return_value = {"data": "テスト", "scale": 50}
+        add_avatar("avatar1", avatar, "a1b2c3d4", {"scale": 50})
+        
+        future = mod_avatar_manager._on_auto_save()
+        future.result()
+        
+        # 一時ファイルから置き換えられ、一時ファイルは残らない
+        # デフォルトと同じ値は保存しない
+        assert read_state(dat_file) == {"a1b2c3d4": {"data": "テスト"}}
+        assert [p.name for p in tmp_path.iterdir()] == ["avatar.json"]
+
+    def test_on_auto_save_unchanged(self, test_avatar_config, tmp_path):
+        """設定が変わったアバターだけを集め直し、どれも変わっていなければ保存しない"""
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text("{}", encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        avatar1 = MagicMock(config_revision=1)
+        avatar1.save_config.return_value = {"data": 1}
+        avatar2 = MagicMock(config_revision=1)
+        avatar2.save_config.return_value = {"data": 2}
+        add_avatar("avatar1", avatar1)
+        add_avatar("avatar2", avatar2)
+
+        mod_avatar_manager._on_auto_save().result()
+        assert mod_avatar_manager._on_auto_save() is None
+
+        avatar2.config_revision = 2
+        avatar2.save_config.return_value = {"data": 3}
+        mod_avatar_manager._on_auto_save().result()
+
+        assert avatar1.save_config.call_count == 1
+        assert avatar2.save_config.call_count == 2
+        assert read_state(dat_file) == {"avatar1": {"data": 1}, "avatar2": {"data": 3}}
+
+    def test_on_auto_save_keeps_unconfigured(self, test_avatar_config, tmp_path):
+        """今は設定に無いアバターの状態も、状態ファイルに残す"""
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text(json.dumps({"version": 2, "avatars": {"old": {"scale": 10}}}), encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        avatar = MagicMock(config_revision=1)
+        avatar.save_config.return_value = {"data": 1}
+        add_avatar("avatar1", avatar)
+
+        mod_avatar_manager._on_auto_save().result()
+
+        assert read_state(dat_file) == {"old": {"scale": 10}, "avatar1": {"data": 1}}
+
+    def test_write_failure_keeps_file(self, tmp_path):
+        """書き込みに失敗しても元のファイルは壊れず、次の保存で集め直す"""
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text('{"old": {}}', encoding="utf-8")
+
+        assert not mod_avatar_manager._write_configs(str(dat_file), {"bad": object()})
+
+        assert dat_file.read_text(encoding="utf-8") == '{"old": {}}'
+        assert [p.name for p in tmp_path.iterdir()] == ["avatar.json"]
+
+    def test_write_failure_collected_again(self, test_avatar_config, tmp_path):
+        """書き込みに失敗したアバターは保存済みにせず、次の保存で集め直す"""
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text("{}", encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        avatar = MagicMock(config_revision=1)
+        avatar.save_config.return_value = {"data": 1}
+        add_avatar("avatar1", avatar)
+
+        with patch.object(mod_avatar_manager, "_write_configs", return_value=False):
+            assert mod_avatar_manager._on_auto_save().result() is False
+        assert mod_avatar_manager._saved_revisions == {}
+
+        mod_avatar_manager._on_auto_save().result()
+        assert read_state(dat_file) == {"avatar1": {"data": 1}}
+        assert mod_avatar_manager._saved_revisions == {"avatar1": 1}
+
+    def test_no_file_not_marked_saved(self, test_avatar_config, tmp_path):
+        """保存先のファイルが無い間は保存済みにせず、ファイルができたら保存する"""
+        dat_file = tmp_path / "avatar.json"
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        avatar = MagicMock(config_revision=1)
+        avatar.save_config.return_value = {"data": 1}
+        add_avatar("avatar1", avatar)
+
+        assert mod_avatar_manager._on_auto_save() is None
+        assert mod_avatar_manager._saved_revisions == {}
+
+        dat_file.write_text("{}", encoding="utf-8")
+        mod_avatar_manager.flush()
+        assert read_state(dat_file) == {"avatar1": {"data": 1}}
+
+    def test_flush(self, test_avatar_config, tmp_path):
+        """終了時は未保存の設定をすぐに書き出す"""
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text("{}", encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        mod_avatar_manager._auto_save_timer = MagicMock()
+        avatar = MagicMock(config_revision=1)
+        avatar.save_config.return_value = {"data": 1}
+        add_avatar("avatar1", avatar)
+
+        mod_avatar_manager.flush()
+
+        mod_avatar_manager._auto_save_timer.stop.assert_called_once()
+        assert read_state(dat_file) == {"avatar1": {"data": 1}}
     
-    @patch.object(mod_avatar_manager, 'save_all_configs')
-    def test_on_auto_save_no_file(self, mock_save):
+    def test_on_auto_save_no_file(self):
         """自動保存（ファイルパス未設定）"""
         mod_avatar_manager._avatar_global_config = {"save_file": None}
-        mock_save.return_value = {}
+        avatar = MagicMock(config_revision=1)
+        add_avatar("avatar1", avatar)
         
         # 例外が発生しないことを確認
-        mod_avatar_manager._on_auto_save()
+        assert mod_avatar_manager._on_auto_save() is None
         
-        mock_save.assert_called_once()
+        # 保存先が無ければ集めない(保存済みの扱いにしない)
+        avatar.save_config.assert_not_called()
+        assert mod_avatar_manager._saved_revisions == {}
     
     @patch.object(mod_avatar_manager, '_create_avatar')
     @patch.object(mod_avatar_manager, '_get_avatar')
     def test_create_all_avatars(self, mock_get, mock_create, test_avatar_config):
         """全アバターの作成"""
+        mod_avatar_manager._avatar_global_config = test_avatar_config
         mod_avatar_manager._avatars_config = test_avatar_config["avatars"]
         mock_get.return_value = None  # アバターが未作成の状態
         
@@ -279,6 +445,32 @@ class TestPrivateFunctions:
         
         # avatarsの数だけcreate_avatarが呼ばれる
         assert mock_create.call_count == len(test_avatar_config["avatars"])
+
+    @patch('pvv_mcp_server.mod_avatar_manager.AvatarWindow')
+    @patch.object(mod_avatar_manager, '_load_config', return_value=None)
+    def test_create_all_avatars_anchored(self, mock_load_config, mock_avatar_class, test_avatar_config):
+        """YAMLのアンカーで設定を共有するstyle_idは、1つのアバターを共有する"""
+        shared_conf = test_avatar_config["avatars"][2]
+        avatars_config = {0: shared_conf, 2: shared_conf, 4: shared_conf, 14: test_avatar_config["avatars"][14]}
+        mod_avatar_manager._avatar_global_config = test_avatar_config
+        mod_avatar_manager._avatars_config = avatars_config
+        mock_avatar_class.side_effect = lambda **kwargs: MagicMock(name=kwargs["speaker_name"])
+
+        with patch.object(mod_avatar_manager.json, 'dumps', wraps=json.dumps) as mock_dumps:
+            mod_avatar_manager._create_all_avatars()
+            # 設定のキーは設定毎に計算する(作成時と索引の作成時)
+            calls_at_setup = mock_dumps.call_count
+
+            # style_idからの取得はキーを計算しない
+            for _ in range(10):
+                mod_avatar_manager._get_avatar(2)
+            assert mock_dumps.call_count == calls_at_setup
+
+        assert mock_avatar_class.call_count == 2
+        avatar = mod_avatar_manager._get_avatar(0)
+        assert mod_avatar_manager._get_avatar(2) is avatar
+        assert mod_avatar_manager._get_avatar(4) is avatar
+        assert mod_avatar_manager._get_avatar(14) is not avatar
     
     @patch('pvv_mcp_server.mod_avatar_manager.AvatarWindow')
     @patch.object(mod_avatar_manager, '_load_config', return_value=None)
@@ -299,6 +491,64 @@ class TestPrivateFunctions:
         assert result == mock_instance
         # キャッシュに登録されたことを確認
         assert len(mod_avatar_manager._avatar_cache) == 1
+
+    @patch('pvv_mcp_server.mod_avatar_manager.AvatarWindow')
+    def test_create_avatar_restores_state(self, mock_avatar_class, test_avatar_config, tmp_path):
+        """状態ファイルは1回だけ読み込み、保存した差分をデフォルトに重ねて渡す"""
+        avatar_conf = test_avatar_config["avatars"][14]
+        avatar_id = mod_avatar_manager.mod_avatar_state.avatar_id(avatar_conf, 14)
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text(json.dumps({"version": 2, "avatars": {avatar_id: {
+            "scale": 60,
+            "dialogs": {"立ち絵": {"parts": {"顔": {"base_image": "02.png"}}}},
+        }}}), encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        mod_avatar_manager._avatars_config = test_avatar_config["avatars"]
+
+        with patch.object(mod_avatar_manager, '_load_config', wraps=mod_avatar_manager._load_config) as mock_load:
+            mod_avatar_manager._create_all_avatars()
+            assert mock_load.call_count == 1
+
+        config = mock_avatar_class.call_args_list[1].kwargs["config"]
+        assert config["scale"] == 60
+        assert config["position"] == "left_out"
+        assert config["dialogs"]["立ち絵"]["parts"]["顔"]["base_image"] == "02.png"
+        assert config["dialogs"]["立ち絵"]["parts"]["顔"]["anime_type"] == "固定"
+        # 保存していないアバターはデフォルトのまま
+        assert mock_avatar_class.call_args_list[0].kwargs["config"] is None
+
+    def test_avatar_ids(self, test_avatar_config):
+        """話者・画像が同じ別々の設定は、style_idでIDを区別する(設定の順序に依らない)"""
+        conf = test_avatar_config["avatars"][14]
+        other = dict(conf, 縮尺=30)
+        mod_avatar_manager._avatars_config = {20: other, 14: conf}
+        mod_avatar_manager._avatar_state = {}
+
+        ids = mod_avatar_manager._avatar_ids()
+
+        assert ids[mod_avatar_manager._config_key(conf)] == mod_avatar_manager.mod_avatar_state.avatar_id(conf, 14)
+        assert ids[mod_avatar_manager._config_key(other)] == mod_avatar_manager.mod_avatar_state.avatar_id(other, 20)
+
+    def test_avatar_ids_shared(self, test_avatar_config):
+        """設定を共有するstyle_idは、最小のstyle_idのIDになる"""
+        conf = test_avatar_config["avatars"][14]
+        mod_avatar_manager._avatars_config = {30: conf, 14: conf}
+        mod_avatar_manager._avatar_state = {}
+
+        ids = mod_avatar_manager._avatar_ids()
+
+        assert list(ids.values()) == [mod_avatar_manager.mod_avatar_state.avatar_id(conf, 14)]
+
+    def test_avatar_ids_alias_added(self, test_avatar_config):
+        """小さいstyle_idを共有に追加しても、保存済みのIDを使い続ける"""
+        conf = test_avatar_config["avatars"][14]
+        saved_id = mod_avatar_manager.mod_avatar_state.avatar_id(conf, 14)
+        mod_avatar_manager._avatars_config = {14: conf, 3: conf}
+        mod_avatar_manager._avatar_state = {saved_id: {"scale": 60}}
+
+        ids = mod_avatar_manager._avatar_ids()
+
+        assert list(ids.values()) == [saved_id]
     
     def test_get_avatar_found(self, test_avatar_config, mock_avatar_window):
         """アバターの取得（存在する場合）"""
@@ -306,10 +556,25 @@ class TestPrivateFunctions:
         avatar_conf = test_avatar_config["avatars"][2]
         key = json.dumps(avatar_conf, sort_keys=True)
         mod_avatar_manager._avatar_cache = {key: mock_avatar_window}
+        mod_avatar_manager._build_avatar_index()
         
         result = mod_avatar_manager._get_avatar(2)
         
         assert result == mock_avatar_window
+
+    def test_build_avatar_index_swaps(self, test_avatar_config, mock_avatar_window):
+        """索引の再作成中も参照中の索引は変わらない(新しい索引に差し替える)"""
+        mod_avatar_manager._avatars_config = test_avatar_config["avatars"]
+        key = json.dumps(test_avatar_config["avatars"][2], sort_keys=True)
+        mod_avatar_manager._avatar_cache = {key: mock_avatar_window}
+        mod_avatar_manager._build_avatar_index()
+        old_index = mod_avatar_manager._avatar_index
+
+        mod_avatar_manager._build_avatar_index()
+
+        assert old_index == {2: mock_avatar_window}
+        assert mod_avatar_manager._avatar_index is not old_index
+        assert mod_avatar_manager._get_avatar(2) == mock_avatar_window
     
     def test_get_avatar_not_found(self):
         """アバターの取得（存在しない場合）"""
@@ -320,7 +585,7 @@ class TestPrivateFunctions:
         assert result is None
     
     @patch('builtins.open', new_callable=mock_open, 
-           read_data='{"avatar1": {"data": "test"}}')
+           read_data='{"version": 2, "avatars": {"avatar1": {"data": "test"}}}')
     @patch('pathlib.Path.exists', return_value=True)
     def test_load_config_success(self, mock_path_exists, mock_file, 
                                  test_avatar_config):
@@ -332,6 +597,31 @@ class TestPrivateFunctions:
         assert result is not None
         assert isinstance(result, dict)
         assert "avatar1" in result
+
+    def test_load_config_legacy(self, test_avatar_config, tmp_path):
+        """旧形式(YAMLの設定のjson.dumpsがキー)の状態ファイルは新しい形式に変換する"""
+        avatar_conf = test_avatar_config["avatars"][14]
+        dat_file = tmp_path / "avatar.json"
+        dat_file.write_text(json.dumps({json.dumps(avatar_conf, sort_keys=True): {
+            "zip_path": "test.zip", "app_title": "TestApp", "position": "left_out",
+            "flip": True, "scale": 60, "frame_timer_interval": 50,
+            "dialogs": {"立ち絵": {"parts": {
+                "顔": {"part_name": "顔", "base_image": "01.png", "selected_files": [], "interval": 3,
+                       "anime_type": "固定", "is_enabled": True},
+                "後": {"part_name": "後", "base_image": None, "selected_files": [], "interval": 3,
+                       "anime_type": "固定", "is_enabled": True},
+            }}},
+        }}), encoding="utf-8")
+        mod_avatar_manager._avatar_global_config = dict(test_avatar_config, save_file=str(dat_file))
+        mod_avatar_manager._avatars_config = test_avatar_config["avatars"]
+
+        result = mod_avatar_manager._load_config()
+
+        avatar_id = mod_avatar_manager.mod_avatar_state.avatar_id(avatar_conf, 14)
+        assert result == {avatar_id: {
+            "scale": 60,
+            "dialogs": {"立ち絵": {"parts": {"顔": {"base_image": "01.png"}}}},
+        }}
     
     @patch('pathlib.Path.exists', return_value=False)
     def test_load_config_file_not_found(self, mock_path_exists, test_avatar_config):
@@ -343,6 +633,125 @@ class TestPrivateFunctions:
         assert result is None
 
 
+def make_avatar_window(**kwargs):
+    """AvatarWindowのモック(コンストラクタの引数を属性に持つ)"""
+    avatar = MagicMock(name=kwargs["speaker_name"])
+    avatar.app_title = kwargs["app_title"]
+    avatar.position = kwargs["position"]
+    avatar.flip = kwargs["flip"]
+    avatar.scale_percent = kwargs["scale_percent"]
+    avatar.config_revision = 0
+    return avatar
+
+
+class TestReload:
+    """reload関数のテスト"""
+
+    @pytest.fixture
+    def running(self, test_avatar_config):
+        """設定を読み込み済みの状態"""
+        with patch('pvv_mcp_server.mod_avatar_manager.AvatarWindow', side_effect=make_avatar_window) as mock_class, \
+             patch.object(mod_avatar_manager, '_load_config', return_value=None), \
+             patch.object(mod_avatar_manager, '_on_auto_save'), \
+             patch.object(mod_avatar_manager, 'mod_avatar_layout') as mock_layout:
+            mod_avatar_manager._avatar_global_config = test_avatar_config
+            mod_avatar_manager._avatars_config = test_avatar_config["avatars"]
+            mod_avatar_manager._auto_save_timer = MagicMock()
+            mod_avatar_manager._create_all_avatars()
+            mock_class.reset_mock()
+            yield mock_class, mock_layout
+
+    def new_config(self, test_avatar_config):
+        """実行中の設定のコピー"""
+        return json.loads(json.dumps(test_avatar_config))
+
+    def test_unchanged(self, running, test_avatar_config):
+        """変更が無ければアバターを作り直さない"""
+        mock_class, _ = running
+        avatars = dict(mod_avatar_manager._avatar_index)
+        new_conf = self.new_config(test_avatar_config)
+        new_conf["avatars"] = {int(k): v for k, v in new_conf["avatars"].items()}
+
+        mod_avatar_manager.reload(new_conf)
+
+        mock_class.assert_not_called()
+        assert mod_avatar_manager._avatar_index == avatars
+        for avatar in avatars.values():
+            avatar.dispose.assert_not_called()
+            avatar.set_scale.assert_not_called()
+
+    def test_reconfigure(self, running, test_avatar_config):
+        """話者・画像が同じアバターは作り直さず、変わった設定だけを反映する"""
+        mock_class, _ = running
+        avatar = mod_avatar_manager._get_avatar(14)
+        new_conf = self.new_config(test_avatar_config)
+        new_conf["avatars"] = {2: new_conf["avatars"]["2"], 14: dict(new_conf["avatars"]["14"], 縮尺=60, 表示=True)}
+
+        mod_avatar_manager.reload(new_conf)
+
+        mock_class.assert_not_called()
+        assert mod_avatar_manager._get_avatar(14) is avatar
+        avatar.set_scale.assert_called_once_with(60)
+        avatar.set_position.assert_not_called()
+        avatar.show.assert_called()
+
+    def test_user_setting_kept(self, running, test_avatar_config):
+        """右クリックメニューなどで変更済みの設定は、YAMLの値で上書きしない"""
+        avatar = mod_avatar_manager._get_avatar(14)
+        avatar.scale_percent = 90
+        new_conf = self.new_config(test_avatar_config)
+        new_conf["avatars"] = {2: new_conf["avatars"]["2"], 14: dict(new_conf["avatars"]["14"], 縮尺=60)}
+
+        mod_avatar_manager.reload(new_conf)
+
+        avatar.set_scale.assert_not_called()
+
+    def test_add_and_remove(self, running, test_avatar_config):
+        """追加されたアバターは作成し、削除されたアバターは新しいアバターの作成後に破棄する"""
+        mock_class, _ = running
+        removed = mod_avatar_manager._get_avatar(2)
+        mock_class.side_effect = lambda **kwargs: (removed.dispose.assert_not_called(), make_avatar_window(**kwargs))[1]
+        new_conf = self.new_config(test_avatar_config)
+        new_conf["avatars"] = {
+            14: new_conf["avatars"]["14"],
+            3: {"話者": "ずんだもん", "画像": "zunda.zip", "表示": True},
+        }
+
+        mod_avatar_manager.reload(new_conf)
+
+        mock_class.assert_called_once()
+        assert mock_class.call_args.kwargs["speaker_name"] == "ずんだもん"
+        removed.dispose.assert_called_once()
+        assert mod_avatar_manager._get_avatar(2) is None
+        assert mod_avatar_manager._get_avatar(3) is not None
+        assert len(mod_avatar_manager._avatar_cache) == 2
+
+    def test_global_settings(self, running, test_avatar_config):
+        """target・idle_timeout・layout・auto_save_intervalを作成済みのアバターに反映する"""
+        _, mock_layout = running
+        new_conf = self.new_config(test_avatar_config)
+        new_conf["avatars"] = {int(k): v for k, v in new_conf["avatars"].items()}
+        new_conf.update(target="OtherApp", idle_timeout=60, layout="tile", auto_save_interval=1000)
+
+        mod_avatar_manager.reload(new_conf)
+
+        for avatar in mod_avatar_manager._avatar_cache.values():
+            avatar.set_app_title.assert_called_once_with("OtherApp")
+            assert avatar.idle_timeout == 60
+        mock_layout.configure.assert_called_once_with("tile", mock_layout.DEFAULT_OFFSET)
+        mod_avatar_manager._auto_save_timer.setInterval.assert_called_with(1000)
+
+    def test_disable(self, running, test_avatar_config):
+        """アバターを無効にしたら全て破棄する"""
+        avatars = list(mod_avatar_manager._avatar_cache.values())
+
+        mod_avatar_manager.reload(dict(self.new_config(test_avatar_config), enabled=False))
+
+        for avatar in avatars:
+            avatar.dispose.assert_called_once()
+        assert mod_avatar_manager._avatar_cache == {}
+
+
 class TestIntegration:
     """統合テスト"""
     
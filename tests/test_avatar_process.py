@@ -0,0 +1,350 @@
+"""
+test_avatar_process.py
+mod_avatar_processモジュールのユニットテスト
+"""
+
+import sys
+import queue
+import socket
+import subprocess
+import threading
+import time
+import multiprocessing
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from pvv_mcp_server import mod_avatar_process
+
+
+@pytest.fixture
+def pipe():
+    """親プロセス側と子プロセス側のパイプ"""
+    parent_conn, child_conn = multiprocessing.Pipe()
+    yield parent_conn, child_conn
+    parent_conn.close()
+    child_conn.close()
+
+
+@pytest.fixture
+def home(monkeypatch, tmp_path):
+    """共有デーモンの認証キー・ログを置くホームディレクトリ"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def client(monkeypatch, pipe):
+    """子プロセスと接続した状態の親プロセス側(子プロセス側のパイプを返す)"""
+    parent_conn, child_conn = pipe
+    monkeypatch.setattr(mod_avatar_process, "_conn", parent_conn)
+    monkeypatch.setattr(mod_avatar_process, "_pending", {})
+    thread = threading.Thread(target=mod_avatar_process._receive_loop, args=(parent_conn,), daemon=True)
+    thread.start()
+    yield child_conn, thread
+    child_conn.close()
+    thread.join(timeout=5)
+
+
+class TestServe:
+    """子プロセス側(_serve)のテスト"""
+
+    def run_serve(self, conn, call_in_gui=None):
+        thread = threading.Thread(target=mod_avatar_process._serve, args=(conn, call_in_gui or MagicMock()),
+                                  daemon=True)
+        thread.start()
+        return thread
+
+    def test_set_anime_type_replies_when_applied(self, pipe):
+        """反映・描画が終わったら応答する"""
+        parent_conn, child_conn = pipe
+        applied = Future()
+
+        with patch("pvv_mcp_server.mod_avatar_manager.set_anime_type", return_value=applied) as mock_set:
+            thread = self.run_serve(child_conn)
+            parent_conn.send(("set_anime_type", 1, 10, "口パク"))
+
+            assert not parent_conn.poll(0.2)
+            applied.set_result("口パク")
+            assert parent_conn.poll(5)
+            assert parent_conn.recv() == ("applied", 1, "口パク", None)
+            mock_set.assert_called_once_with(10, "口パク")
+
+            parent_conn.send(("close",))
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+
+    def test_set_anime_type_no_avatar(self, pipe):
+        """アバターが無い場合はすぐにNoneを応答する"""
+        parent_conn, child_conn = pipe
+
+        with patch("pvv_mcp_server.mod_avatar_manager.set_anime_type", return_value=None):
+            self.run_serve(child_conn)
+            parent_conn.send(("set_anime_type", 2, 99, "えがお"))
+
+            assert parent_conn.poll(5)
+            assert parent_conn.recv() == ("applied", 2, None, None)
+
+    def test_reload_in_gui_thread(self, pipe):
+        """reloadはGUIスレッドで反映する"""
+        parent_conn, child_conn = pipe
+        call_in_gui = MagicMock()
+
+        with patch("pvv_mcp_server.mod_avatar_manager.reload") as mock_reload:
+            thread = self.run_serve(child_conn, call_in_gui)
+            parent_conn.send(("reload", {"enabled": True}))
+            parent_conn.send(("close",))
+            thread.join(timeout=5)
+
+            call_in_gui.assert_called_once()
+            mock_reload.assert_not_called()
+            call_in_gui.call_args.args[0]()
+            mock_reload.assert_called_once_with({"enabled": True})
+
+    def test_play_queued(self, pipe):
+        """playは再生キューに積み、再生が終わったら応答する"""
+        parent_conn, child_conn = pipe
+        playback = queue.Queue()
+
+        thread = threading.Thread(target=mod_avatar_process._serve, args=(child_conn, MagicMock()),
+                                  kwargs={"playback": playback}, daemon=True)
+        thread.start()
+        parent_conn.send(("play", 3, 10, b"wav"))
+        style_id, wav, done = playback.get(timeout=5)
+        assert (style_id, wav) == (10, b"wav")
+        assert not parent_conn.poll(0.1)
+
+        done(True, None)
+        assert parent_conn.recv() == ("applied", 3, True, None)
+
+    def test_hello(self, pipe):
+        """helloはon_helloに渡し、戻り値を応答する"""
+        parent_conn, child_conn = pipe
+        on_hello = MagicMock(return_value="ignored: enabled")
+
+        thread = threading.Thread(target=mod_avatar_process._serve, args=(child_conn, MagicMock()),
+                                  kwargs={"on_hello": on_hello}, daemon=True)
+        thread.start()
+        parent_conn.send(("hello", 4, {"enabled": True}, "test.yaml"))
+        assert parent_conn.poll(5)
+        assert parent_conn.recv() == ("applied", 4, "ignored: enabled", None)
+        parent_conn.send(("close",))
+        thread.join(timeout=5)
+
+        on_hello.assert_called_once_with({"enabled": True}, "test.yaml")
+
+    def test_parent_exit(self, pipe):
+        """親プロセスが終了したら処理を終える"""
+        parent_conn, child_conn = pipe
+
+        thread = self.run_serve(child_conn)
+        parent_conn.close()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+
+
+class TestPlaybackLoop:
+    """共有デーモンの再生キューのテスト"""
+
+    def test_play_in_order(self):
+        """積まれた順に1つずつ再生し、結果を返す"""
+        playback = queue.Queue()
+        played = []
+        results = queue.Queue()
+
+        def play_wav(style_id, wav):
+            played.append(wav)
+            if wav == b"bad":
+                raise RuntimeError("device error")
+
+        with patch("pvv_mcp_server.mod_speak.play_wav", side_effect=play_wav):
+            threading.Thread(target=mod_avatar_process._playback_loop, args=(playback,), daemon=True).start()
+            for wav in (b"a", b"bad", b"c"):
+                playback.put((10, wav, lambda result, error, wav=wav: results.put((wav, result, error))))
+
+            replies = [results.get(timeout=5) for _ in range(3)]
+
+        assert played == [b"a", b"bad", b"c"]
+        assert replies == [(b"a", True, None), (b"bad", None, "device error"), (b"c", True, None)]
+
+
+class TestClient:
+    """親プロセス側のテスト"""
+
+    def test_not_running(self, monkeypatch):
+        """子プロセスと接続していない場合は何もしない"""
+        monkeypatch.setattr(mod_avatar_process, "_conn", None)
+
+        assert mod_avatar_process.set_anime_type(10, "口パク") is None
+        assert mod_avatar_process.wait_applied(None) is False
+
+    def test_set_anime_type(self, client):
+        """子プロセスの応答でFutureが完了する"""
+        child_conn, _ = client
+
+        future = mod_avatar_process.set_anime_type(10, "口パク")
+        command, request_id, style_id, anime_type = child_conn.recv()
+        assert (command, style_id, anime_type) == ("set_anime_type", 10, "口パク")
+        assert not future.done()
+
+        child_conn.send(("applied", request_id, "口パク", None))
+        assert mod_avatar_process.wait_applied(future, timeout=5) is True
+
+    def test_error(self, client):
+        """子プロセスでの失敗は例外で完了する"""
+        child_conn, _ = client
+
+        future = mod_avatar_process.set_anime_type(10, "口パク")
+        request_id = child_conn.recv()[1]
+        child_conn.send(("applied", request_id, None, "closed"))
+
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+    def test_play_not_shared(self, client):
+        """共有デーモンでなければ自分で再生する(Noneを返す)"""
+        assert mod_avatar_process.play(10, b"wav") is None
+
+    def test_play_shared(self, monkeypatch, client):
+        """共有デーモンの再生が終わるとFutureが完了する"""
+        child_conn, _ = client
+        monkeypatch.setattr(mod_avatar_process, "_shared", True)
+
+        future = mod_avatar_process.play(10, b"wav")
+        command, request_id, style_id, wav = child_conn.recv()
+        assert (command, style_id, wav) == ("play", 10, b"wav")
+
+        child_conn.send(("applied", request_id, True, None))
+        assert future.result(timeout=5) is True
+
+    def test_attach_logs_ignored_config(self, monkeypatch, pipe):
+        """共有デーモンで使われなかった設定は警告としてログに出す"""
+        parent_conn, child_conn = pipe
+        monkeypatch.setattr(mod_avatar_process, "_conn", None)
+        monkeypatch.setattr(mod_avatar_process, "_pending", {})
+        monkeypatch.setattr(mod_avatar_process, "_daemon_authkey", lambda: b"key")
+        monkeypatch.setattr(mod_avatar_process, "_connect_daemon", lambda port, authkey: parent_conn)
+
+        with patch.object(mod_avatar_process.logger, "warning") as mock_warning:
+            assert mod_avatar_process.attach({"enabled": True}, "test.yaml") is True
+            command, request_id, avs, watch_file = child_conn.recv()
+            assert (command, avs, watch_file) == ("hello", {"enabled": True}, "test.yaml")
+
+            child_conn.send(("applied", request_id, "ignored: enabled", None))
+            deadline = time.monotonic() + 5
+            while not mock_warning.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        mock_warning.assert_called_once_with("ignored: enabled")
+        monkeypatch.setattr(mod_avatar_process, "_conn", None)
+
+    def test_controller(self, client):
+        """接続中はこのモジュールで操作する"""
+        assert mod_avatar_process.is_running()
+        assert mod_avatar_process.controller() is mod_avatar_process
+
+    def test_disconnected(self, client):
+        """子プロセスが終了したら、応答待ちは失敗になり、接続中でなくなる"""
+        child_conn, thread = client
+
+        future = mod_avatar_process.set_anime_type(10, "口パク")
+        child_conn.recv()
+        child_conn.close()
+        thread.join(timeout=5)
+
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+        assert not mod_avatar_process.is_running()
+        assert mod_avatar_process.set_anime_type(10, "口パク") is None
+
+
+class TestProcess:
+    """子プロセスの起動・終了のテスト"""
+
+    def test_start_and_close(self, monkeypatch):
+        """子プロセスを起動して操作し、終了する"""
+        monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+
+        mod_avatar_process.start({"enabled": False})
+        try:
+            assert mod_avatar_process.is_running()
+            process = mod_avatar_process._process
+
+            # アバター無効の子プロセスは、反映するアバターが無いと応答する
+            future = mod_avatar_process.set_anime_type(10, "口パク")
+            assert future.result(timeout=60) is None
+        finally:
+            mod_avatar_process.close()
+
+        assert process.exitcode == 0
+        assert not mod_avatar_process.is_running()
+
+
+class TestDaemon:
+    """共有デーモンのテスト"""
+
+    def test_authkey(self, home):
+        """認証キーはユーザ毎のファイルに作成し、以降は同じキーを使う"""
+        authkey = mod_avatar_process._daemon_authkey()
+
+        assert len(authkey) == 32
+        assert mod_avatar_process._daemon_authkey() == authkey
+        assert (home / ".pvv-mcp-server" / mod_avatar_process.DAEMON_KEY_FILE).read_bytes() == authkey
+
+    def test_attach(self, monkeypatch, home):
+        """起動済みの共有デーモンに複数のMCPサーバが接続し、接続が無くなると終了する"""
+        monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+        monkeypatch.setattr(mod_avatar_process, "_shared", False)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        authkey = mod_avatar_process._daemon_authkey()
+
+        daemon = subprocess.Popen(
+            [sys.executable, "-c",
+             f"from pvv_mcp_server import mod_avatar_process; mod_avatar_process.run_daemon({port}, idle_exit=1)"],
+            cwd=project_root,
+        )
+        try:
+            # 共有デーモンが待ち受けるまで待つ
+            other = None
+            deadline = time.monotonic() + 60
+            while other is None and daemon.poll() is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+                other = mod_avatar_process._connect_daemon(port, authkey)
+            assert other is not None
+
+            assert mod_avatar_process.attach({"enabled": False, "daemon_port": port}) is True
+            assert mod_avatar_process.is_running()
+            # アバター無効の共有デーモンは、反映するアバターが無いと応答する
+            assert mod_avatar_process.set_anime_type(10, "口パク").result(timeout=30) is None
+
+            # 他のMCPサーバからも操作できる
+            # 他のMCPサーバのアバター設定は使わず、helloの応答で知らせる
+            other.send(("hello", 1, {"enabled": True}, None))
+            assert other.poll(30)
+            command, request_id, ignored, error = other.recv()
+            assert (command, request_id, error) == ("applied", 1, None)
+            assert "daemon_port" in ignored and "enabled" in ignored
+
+            other.send(("set_anime_type", 2, 10, "えがお"))
+            assert other.poll(30)
+            assert other.recv() == ("applied", 2, None, None)
+            other.close()
+
+            mod_avatar_process.close()
+            assert not mod_avatar_process.is_running()
+            assert daemon.wait(timeout=30) == 0
+        finally:
+            mod_avatar_process.close()
+            if daemon.poll() is None:
+                daemon.kill()
+                daemon.wait()
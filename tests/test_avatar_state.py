@@ -0,0 +1,165 @@
+"""
+test_avatar_state.py
+mod_avatar_stateモジュールのユニットテスト
+"""
+
+import pytest
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from pvv_mcp_server import mod_avatar_state
+from pvv_mcp_server.mod_avatar_state import avatar_id, resolve_avatar_id, encode, decode, parse, dumps
+from pvv_mcp_server.avatar.mod_avatar_part_model import AvatarPartModel
+
+
+@pytest.fixture
+def defaults():
+    """アバターの設定のデフォルト"""
+    return {
+        "zip_path": "test.zip",
+        "position": "right_out",
+        "flip": False,
+        "scale": 50,
+        "frame_timer_interval": 50,
+    }
+
+
+def part_config(part_name, **values):
+    """AvatarPartModel.save_config()と同じ形式のパーツ設定"""
+    config = AvatarPartModel(part_name, []).save_config()
+    config.update(values)
+    return config
+
+
+class TestAvatarId:
+    """avatar_idのテスト"""
+
+    def test_stable_for_cosmetic_changes(self):
+        """位置・縮尺・反転・表示を変えてもIDは変わらない"""
+        conf = {"話者": "ずんだもん", "画像": "a.zip", "位置": "left_in", "縮尺": 50}
+        moved = dict(conf, 位置="right_out", 縮尺=75, 反転=True, 表示=False)
+
+        assert avatar_id(conf, 3) == avatar_id(moved, 3)
+        assert avatar_id(conf, 3).endswith("-3")
+        assert len(avatar_id(conf, 3).split("-")[0]) == mod_avatar_state.AVATAR_ID_LENGTH
+
+    def test_different_avatar(self):
+        """話者・画像・style_idが違えば別のID"""
+        conf = {"話者": "ずんだもん", "画像": "a.zip"}
+
+        assert avatar_id(conf, 3) != avatar_id(dict(conf, 話者="四国めたん"), 3)
+        assert avatar_id(conf, 3) != avatar_id(dict(conf, 画像="b.zip"), 3)
+        assert avatar_id(conf, 3) != avatar_id(conf, 1)
+
+    def test_resolve_saved(self):
+        """設定を共有するstyle_idのうち、保存済みのIDを選ぶ"""
+        conf = {"話者": "ずんだもん", "画像": "a.zip"}
+
+        assert resolve_avatar_id(conf, [1, 3], {avatar_id(conf, 3)}) == avatar_id(conf, 3)
+        assert resolve_avatar_id(conf, [1, 3], {avatar_id(conf, 1), avatar_id(conf, 3)}) == avatar_id(conf, 1)
+        # 保存済みのIDが無ければ最小のstyle_id
+        assert resolve_avatar_id(conf, [1, 3], set()) == avatar_id(conf, 1)
+
+
+class TestEncodeDecode:
+    """encode・decodeのテスト"""
+
+    def test_part_defaults_match_model(self):
+        """PART_DEFAULTSはAvatarPartModelの初期値と同じ"""
+        config = part_config("顔")
+
+        for name, value in mod_avatar_state.PART_DEFAULTS.items():
+            assert config[name] == value
+
+    def test_encode_only_changed(self, defaults):
+        """デフォルトと異なる値だけを残す"""
+        config = dict(defaults, scale=75, dialogs={
+            "立ち絵": {"parts": {
+                "顔": part_config("顔", base_image="01.png"),
+                "後": part_config("後"),
+            }},
+            "口パク": {"parts": {"後": part_config("後")}},
+        })
+
+        delta = encode(config, defaults)
+
+        assert delta == {"scale": 75, "dialogs": {"立ち絵": {"parts": {"顔": {"base_image": "01.png"}}}}}
+
+    def test_roundtrip(self, defaults):
+        """decode(encode())で同じ設定に戻る"""
+        config = dict(defaults, flip=True, dialogs={
+            "立ち絵": {"parts": {
+                "目": part_config("目", base_image="01.png", selected_files=["02.png", "03.png"],
+                                  interval_ms=100, anime_type="ランダムA"),
+            }},
+        })
+
+        restored = decode(encode(config, defaults), defaults)
+
+        assert restored["flip"] is True
+        assert restored["scale"] == 50
+        part = restored["dialogs"]["立ち絵"]["parts"]["目"]
+        for name in ("base_image", "selected_files", "interval_ms", "anime_type", "is_enabled"):
+            assert part[name] == config["dialogs"]["立ち絵"]["parts"]["目"][name]
+
+    def test_decode_uses_current_defaults(self, defaults):
+        """保存していない値は、その時のデフォルト(YAMLの設定)に従う"""
+        delta = encode(dict(defaults), defaults)
+
+        restored = decode(delta, dict(defaults, position="left_in"))
+
+        assert restored["position"] == "left_in"
+
+
+class TestParse:
+    """parse・dumpsのテスト"""
+
+    def test_current_version(self):
+        """現在の形式はそのまま読み込む"""
+        data = json.loads(dumps({"a1b2c3d4": {"scale": 60}}))
+
+        assert data["version"] == mod_avatar_state.STATE_VERSION
+        assert parse(data, lambda conf: {}, lambda conf: None) == {"a1b2c3d4": {"scale": 60}}
+
+    def test_migrate_legacy(self, defaults):
+        """旧形式は現在の同じ設定のアバターのIDに変換し、intervalをミリ秒にする"""
+        conf = {"話者": "ずんだもん", "画像": "test.zip", "縮尺": 50}
+        legacy = {
+            json.dumps(conf, sort_keys=True): dict(defaults, frame_timer_interval=100, dialogs={
+                "立ち絵": {"parts": {"目": part_config("目", interval=3)}},
+            }),
+            "not json": {},
+        }
+        legacy[json.dumps(conf, sort_keys=True)]["dialogs"]["立ち絵"]["parts"]["目"].pop("interval_ms")
+
+        avatars = parse(legacy, lambda avatar_conf: dict(defaults), lambda avatar_conf: avatar_id(avatar_conf, 3))
+
+        assert avatars == {avatar_id(conf, 3): {
+            "frame_timer_interval": 100,
+            "dialogs": {"立ち絵": {"parts": {"目": {"interval_ms": 400}}}},
+        }}
+
+    def test_migrate_legacy_same_speaker(self, defaults):
+        """話者・画像が同じ別々のアバターの設定も、全て変換する"""
+        conf1 = {"話者": "ずんだもん", "画像": "test.zip", "縮尺": 60}
+        conf2 = dict(conf1, 縮尺=30)
+        removed = dict(conf1, 縮尺=10)
+        legacy = {json.dumps(conf, sort_keys=True): dict(defaults, scale=conf["縮尺"])
+                  for conf in (conf1, conf2, removed)}
+        ids = {json.dumps(conf1, sort_keys=True): avatar_id(conf1, 3),
+               json.dumps(conf2, sort_keys=True): avatar_id(conf2, 7)}
+
+        avatars = parse(legacy, lambda avatar_conf: dict(defaults),
+                        lambda avatar_conf: ids.get(json.dumps(avatar_conf, sort_keys=True)))
+
+        # 現在の設定に無いアバターは変換できない
+        assert avatars == {avatar_id(conf1, 3): {"scale": 60}, avatar_id(conf2, 7): {"scale": 30}}
+
+    def test_invalid(self):
+        """不正な内容は空として扱う"""
+        assert parse([], lambda conf: {}, lambda conf: None) == {}
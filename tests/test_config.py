@@ -0,0 +1,46 @@
+"""
+test_config.py
+mod_configモジュールのユニットテスト
+"""
+
+import pytest
+import os
+
+from pvv_mcp_server import mod_config
+
+
+class TestLoadConfig:
+    """load_config関数のテスト"""
+
+    def test_load(self, tmp_path):
+        """YAMLを読み込み、save_fileのdefaultはYAMLと同じディレクトリのファイルにする"""
+        yaml_path = tmp_path / "pvv-mcp-server.yaml"
+        yaml_path.write_text(
+            'avatar:\n'
+            '  "enabled" : True\n'
+            '  "save_file" : "default"\n'
+            '  "avatars":\n'
+            '    10:\n'
+            '      "話者" : "雨晴はう"\n',
+            encoding="utf-8")
+
+        config = mod_config.load_config(str(yaml_path))
+
+        assert config["avatar"]["enabled"] is True
+        assert config["avatar"]["avatars"][10]["話者"] == "雨晴はう"
+        assert config["avatar"]["save_file"] == os.path.join(str(tmp_path), mod_config.DEFAULT_SAVE_FILE)
+
+    def test_empty(self, tmp_path):
+        """空のYAMLは空の設定"""
+        yaml_path = tmp_path / "empty.yaml"
+        yaml_path.write_text("", encoding="utf-8")
+
+        assert mod_config.load_config(str(yaml_path)) == {}
+
+    def test_invalid(self, tmp_path):
+        """編集途中などで不正なYAMLは例外"""
+        yaml_path = tmp_path / "invalid.yaml"
+        yaml_path.write_text("avatar: [\n", encoding="utf-8")
+
+        with pytest.raises(Exception):
+            mod_config.load_config(str(yaml_path))
@@ -0,0 +1,123 @@
+"""
+test_import_time.py
+起動時間のテスト
+
+アバター無効時に重いモジュール(PySide6・音声再生など)を読み込まないこと、
+MCPのinitializeに時間内に応答できることを確認する。
+"""
+
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルート
+project_root = Path(__file__).parent.parent
+
+# アバター無効時に読み込まないモジュール
+HEAVY_MODULES = [
+    "PySide6",
+    "sounddevice",
+    "soundfile",
+    "numpy",
+    "PIL",
+    "pygetwindow",
+    "pvv_mcp_server.mod_avatar_manager",
+]
+
+# initializeの応答までの上限(秒)。MCPホストの起動タイムアウトより十分短くする
+INITIALIZE_BUDGET = 10.0
+
+
+def run_python(code):
+    """別プロセスのPythonでコードを実行し、標準出力を返す"""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=project_root, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+class TestLazyImport:
+    """起動時に読み込むモジュールのテスト"""
+
+    def test_no_heavy_modules(self):
+        """エントリポイントの読み込みでは重いモジュールを読み込まない"""
+        out = run_python(
+            "import sys, json\n"
+            "import pvv_mcp_server.main\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+        )
+
+        assert json.loads(out.splitlines()[-1]) == []
+
+    def test_import_time(self):
+        """エントリポイントの読み込み時間(-X importtimeの累積)を表示する"""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import pvv_mcp_server.main"],
+            cwd=project_root, capture_output=True, text=True, timeout=60,
+        )
+        assert result.returncode == 0, result.stderr
+
+        # "import time: self [us] | cumulative | imported package"
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                fields = [field.strip() for field in line[len("import time:"):].split("|")]
+                if fields[1].isdigit():
+                    cumulative[fields[2].strip()] = int(fields[1])
+
+        assert "pvv_mcp_server.main" in cumulative
+        print(f"import pvv_mcp_server.main: {cumulative['pvv_mcp_server.main'] / 1000:.1f} ms")
+        assert not any(name.split(".")[0] in ("PySide6", "sounddevice", "PIL") for name in cumulative)
+
+
+class TestInitialize:
+    """MCPのinitializeの応答時間のテスト"""
+
+    def test_initialize_response(self, tmp_path):
+        """アバター無効で起動し、時間内にinitializeに応答する"""
+        yaml_path = tmp_path / "pvv-mcp-server.yaml"
+        yaml_path.write_text('avatar:\n  "enabled" : False\n', encoding="utf-8")
+
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "pvv_mcp_server.main", "-y", str(yaml_path)],
+            cwd=project_root, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        lines = queue.Queue()
+        threading.Thread(target=lambda: lines.put(proc.stdout.readline()), daemon=True).start()
+
+        try:
+            request = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "test", "version": "0.0.0"},
+                },
+            }
+            proc.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+            proc.stdin.flush()
+
+            try:
+                line = lines.get(timeout=INITIALIZE_BUDGET)
+            except queue.Empty:
+                pytest.fail(f"initialize not answered in {INITIALIZE_BUDGET} sec")
+            elapsed = time.perf_counter() - start
+        finally:
+            proc.kill()
+            proc.wait()
+
+        response = json.loads(line)
+        assert response["id"] == 1
+        assert response["result"]["serverInfo"]["name"] == "pvv-mcp-server"
+        print(f"initialize response: {elapsed * 1000:.0f} ms")
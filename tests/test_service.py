@@ -255,4 +255,84 @@ class TestService:
         
         # 検証
         mock_start_mcp_avatar.assert_called_once()
-        assert pvv_mcp_server.mod_service._avatar_enbled is True
\ No newline at end of file
+        assert pvv_mcp_server.mod_service._avatar_enbled is True
+
+
+class TestReload:
+    """設定の再読み込みのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def running_config(self, monkeypatch):
+        """実行中の設定"""
+        monkeypatch.setattr(pvv_mcp_server.mod_service, "_config", {"avatar": {"enabled": True}, "other": 1})
+        monkeypatch.setattr(pvv_mcp_server.mod_service, "_avatar_enbled", True)
+
+    @patch("pvv_mcp_server.mod_avatar_manager.reload")
+    def test_other_section(self, mock_reload):
+        """アバター以外の設定もこのプロセスの設定に反映する"""
+        conf = {"avatar": {"enabled": True}, "other": 2}
+
+        pvv_mcp_server.mod_service.reload(conf)
+
+        assert pvv_mcp_server.mod_service._config is conf
+        mock_reload.assert_not_called()
+
+    @patch("pvv_mcp_server.mod_service.mod_avatar_process")
+    def test_avatar_process(self, mock_process):
+        """アバターを別プロセスで描画している場合は、アバター設定を子プロセスに送る"""
+        mock_process.is_running.return_value = True
+        mock_process.is_shared.return_value = False
+
+        pvv_mcp_server.mod_service.reload({"avatar": {"enabled": False}})
+
+        mock_process.reload.assert_called_once_with({"enabled": False})
+        assert pvv_mcp_server.mod_service._avatar_enbled is False
+
+    @patch("pvv_mcp_server.mod_service.mod_avatar_process")
+    def test_avatar_daemon(self, mock_process):
+        """共有デーモンにはアバター設定を送らない(デーモンがYAMLを監視する)"""
+        mock_process.is_running.return_value = True
+        mock_process.is_shared.return_value = True
+
+        pvv_mcp_server.mod_service.reload({"avatar": {"enabled": False}})
+
+        mock_process.reload.assert_not_called()
+        assert pvv_mcp_server.mod_service._config == {"avatar": {"enabled": False}}
+
+    @patch("pvv_mcp_server.mod_service.reload")
+    def test_poll_config(self, mock_reload, tmp_path, monkeypatch):
+        """ポーリングでYAMLの変更を検知して再読み込みする"""
+        monkeypatch.setattr(pvv_mcp_server.mod_service, "CONFIG_RELOAD_DELAY", 0)
+        yaml_path = tmp_path / "pvv-mcp-server.yaml"
+        yaml_path.write_text('avatar:\n  "enabled" : True\n', encoding="utf-8")
+
+        pvv_mcp_server.mod_service.poll_config(str(yaml_path), interval=0.01)
+        yaml_path.write_text('avatar:\n  "enabled" : False\n', encoding="utf-8")
+
+        import time
+        deadline = time.monotonic() + 5
+        while not mock_reload.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        mock_reload.assert_called_once_with({"avatar": {"enabled": False}})
+
+    @patch("pvv_mcp_server.mod_service.reload")
+    def test_poll_config_reload_error(self, mock_reload, tmp_path, monkeypatch):
+        """反映に失敗しても監視を続ける"""
+        monkeypatch.setattr(pvv_mcp_server.mod_service, "CONFIG_RELOAD_DELAY", 0)
+        mock_reload.side_effect = [RuntimeError("pipe closed"), None]
+        yaml_path = tmp_path / "pvv-mcp-server.yaml"
+        yaml_path.write_text('avatar:\n  "enabled" : True\n', encoding="utf-8")
+
+        thread = pvv_mcp_server.mod_service.poll_config(str(yaml_path), interval=0.01)
+        yaml_path.write_text('avatar:\n  "enabled" : False\n', encoding="utf-8")
+
+        import time
+        deadline = time.monotonic() + 5
+        while not mock_reload.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        yaml_path.write_text('avatar:\n  "enabled" : True \n', encoding="utf-8")
+        while mock_reload.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert mock_reload.call_count == 2
+        assert thread.is_alive()
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import numpy as np
+from concurrent.futures import Future
 
 
 class TestSpeak(unittest.TestCase):
@@ -8,12 +9,15 @@ class TestSpeak(unittest.TestCase):
     mod_speak.speak() の単体テスト
     """
 
-    @patch("pvv_mcp_server.mod_speak.sf.read")
-    @patch("pvv_mcp_server.mod_speak.sd.OutputStream")
-    @patch("pvv_mcp_server.mod_avatar_manager")
+    @patch("pvv_mcp_server.mod_speak.sf")
+    @patch("pvv_mcp_server.mod_speak.sd")
+    @patch("pvv_mcp_server.mod_speak._avatar_manager")
     @patch("pvv_mcp_server.mod_speak.requests.post")
-    def test_speak_normal(self, mock_post, mock_avatar, mock_sd_stream, mock_sf_read):
+    def test_speak_normal(self, mock_post, mock_avatar_manager, mock_sd, mock_sf):
         """正常系: speak() が口パク→立ち絵の順に呼ばれる"""
+        mock_avatar = mock_avatar_manager.return_value
+        mock_sf_read = mock_sf.read
+        mock_sd_stream = mock_sd.OutputStream
         # --- ダミーのレスポンス設定 ---
         mock_post.side_effect = [
             MagicMock(status_code=200, json=lambda: {"speedScale": 1}),
@@ -53,12 +57,13 @@ class TestSpeak(unittest.TestCase):
             mod_speak.speak(1, "テスト")
         self.assertIn("VOICEVOX API通信エラー", str(cm.exception))
 
-    @patch("pvv_mcp_server.mod_speak.sf.read")
-    @patch("pvv_mcp_server.mod_speak.sd.OutputStream")
-    @patch("pvv_mcp_server.mod_avatar_manager")
+    @patch("pvv_mcp_server.mod_speak.sf")
+    @patch("pvv_mcp_server.mod_speak.sd")
+    @patch("pvv_mcp_server.mod_speak._avatar_manager")
     @patch("pvv_mcp_server.mod_speak.requests.post")
-    def test_speak_audio_playback_error(self, mock_post, mock_avatar, mock_sd_stream, mock_sf_read):
+    def test_speak_audio_playback_error(self, mock_post, mock_avatar_manager, mock_sd, mock_sf):
         """異常系: 再生処理中にエラーが発生する"""
+        mock_sf_read = mock_sf.read
         mock_post.side_effect = [
             MagicMock(status_code=200, json=lambda: {"speedScale": 1}),
             MagicMock(status_code=200, content=b"dummy_wav_data"),
@@ -70,6 +75,60 @@ class TestSpeak(unittest.TestCase):
             mod_speak.speak(1, "テスト")
         self.assertIn("音声再生エラー", str(cm.exception))
 
+    @patch("pvv_mcp_server.mod_speak.sf")
+    @patch("pvv_mcp_server.mod_speak.sd")
+    @patch("pvv_mcp_server.mod_speak._avatar_manager", return_value=None)
+    @patch("pvv_mcp_server.mod_speak.requests.post")
+    def test_speak_avatar_disabled(self, mock_post, mock_avatar_manager, mock_sd, mock_sf):
+        """正常系: アバター無効(mod_avatar_manager未読み込み)でも再生できる"""
+        mock_post.side_effect = [
+            MagicMock(status_code=200, json=lambda: {"speedScale": 1}),
+            MagicMock(status_code=200, content=b"dummy_wav_data"),
+        ]
+        mock_sf.read.return_value = (np.zeros((100, 1), dtype=np.float32), 24000)
+
+        from pvv_mcp_server import mod_speak
+        mod_speak.speak(1, "テストです")
+
+        mock_sd.OutputStream.return_value.__enter__.return_value.write.assert_called_once()
+
+    @patch("pvv_mcp_server.mod_speak.sd")
+    @patch("pvv_mcp_server.mod_speak.mod_avatar_process.play")
+    @patch("pvv_mcp_server.mod_speak.requests.post")
+    def test_speak_shared_daemon(self, mock_post, mock_play, mock_sd):
+        """正常系: 共有デーモンに接続中は、共有デーモンの再生キューで再生する"""
+        mock_post.side_effect = [
+            MagicMock(status_code=200, json=lambda: {"speedScale": 1}),
+            MagicMock(status_code=200, content=b"dummy_wav_data"),
+        ]
+        played = Future()
+        played.set_result(True)
+        mock_play.return_value = played
+
+        from pvv_mcp_server import mod_speak
+        mod_speak.speak(1, "テストです")
+
+        mock_play.assert_called_once_with(1, b"dummy_wav_data")
+        mock_sd.OutputStream.assert_not_called()
+
+    @patch("pvv_mcp_server.mod_speak.mod_avatar_process.PLAY_TIMEOUT", 0.01)
+    @patch("pvv_mcp_server.mod_speak.sd")
+    @patch("pvv_mcp_server.mod_speak.mod_avatar_process.play")
+    @patch("pvv_mcp_server.mod_speak.requests.post")
+    def test_speak_shared_daemon_timeout(self, mock_post, mock_play, mock_sd):
+        """異常系: 共有デーモンの再生が終わらない場合は、タイムアウトして戻る"""
+        mock_post.side_effect = [
+            MagicMock(status_code=200, json=lambda: {"speedScale": 1}),
+            MagicMock(status_code=200, content=b"dummy_wav_data"),
+        ]
+        mock_play.return_value = Future()
+
+        from pvv_mcp_server import mod_speak
+        with self.assertLogs("pvv_mcp_server.mod_speak", level="WARNING"):
+            mod_speak.speak(1, "テストです")
+
+        mock_sd.OutputStream.assert_not_called()
+
     def test_remove_bracket_text(self):
         """remove_bracket_text() の単体テスト"""
         from pvv_mcp_server.mod_speak import remove_bracket_text